@@ -1,5 +1,7 @@
 """Para: Burmese text detection and conversion toolkit."""
 
+import importlib
+
 __all__ = [
     "is_zawgyi",
     "detect_encoding",
@@ -7,8 +9,26 @@ __all__ = [
     "normalize_unicode",
 ]
 
-from para.detect import detect_encoding, is_zawgyi
-from para.convert import zg_to_unicode
-from para.normalize import normalize_unicode
-
 __version__ = "0.1.0"
+
+# Exported names and the modules they live in.  They are imported on first
+# access, so ``import para.detect`` (and the CLI) does not load the converter.
+_EXPORTS = {
+    "detect_encoding": "para.detect",
+    "is_zawgyi": "para.detect",
+    "zg_to_unicode": "para.convert",
+    "normalize_unicode": "para.normalize",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
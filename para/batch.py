@@ -0,0 +1,163 @@
+"""Deduplicated, optionally parallel mapping over many texts or files."""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from multiprocessing.context import BaseContext
+
+    from para.rulesets import RuleSet
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Batches whose distinct texts add up to fewer characters than this run in
+# the calling process; starting workers costs more than the rule work saved.
+PARALLEL_MIN_CHARS = 1 << 18
+
+# Each worker gets about this many chunks, so uneven texts still balance.
+_CHUNKS_PER_WORKER = 4
+
+# Chunks submitted ahead of the one being yielded, per worker; results that
+# arrive early wait in memory, so this bounds how many are held.
+_PENDING_PER_WORKER = 2
+
+
+def _active_rule_set() -> Optional[RuleSet]:
+    # None stands for the built-in rules, which workers start out with.
+    # Nothing can have changed the rule set before ``para.convert`` is imported.
+    convert = sys.modules.get("para.convert")
+    if convert is None or convert.active_rule_set() == convert.BUILTIN:
+        return None
+    return convert.active_rule_set()
+
+
+def _init_worker(modules: Sequence[str], rule_set: Optional[RuleSet] = None) -> None:
+    # Spawned and forkserver workers start from a fresh interpreter, so the
+    # parent's rule set is passed in rather than inherited.
+    if rule_set is not None:
+        from para.convert import use_rule_set
+
+        use_rule_set(rule_set)
+    # Importing loads the module once per worker; a module's ``_preload()``,
+    # when it has one, compiles what it would otherwise compile on first use.
+    for module in modules:
+        warm = getattr(importlib.import_module(module), "_preload", None)
+        if warm is not None:
+            warm()
+
+
+def _run_chunk(func: Callable[[T], R], chunk: Sequence[T]) -> list[R]:
+    return [func(item) for item in chunk]
+
+
+def parallel_imap(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    *,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    preload: Sequence[str] = (),
+    mp_context: Optional[BaseContext] = None,
+) -> Iterator[R]:
+    """Apply ``func`` to every item on a process pool, yielding results in order.
+
+    Results are yielded as soon as they and every earlier one are done, so
+    callers can record progress while the pool is still working.  Only a
+    few chunks per worker are submitted ahead of the caller, so results do
+    not pile up when the caller is slower than the pool.
+
+    Args:
+        func: A picklable function (module level, or a ``functools.partial``
+            of one).
+        items: Picklable inputs.
+        workers: Worker processes; ``None`` uses every CPU and ``1`` runs
+            serially in this process.
+        chunksize: Items sent to a worker at a time; by default the items
+            are split into about four chunks per worker.
+        preload: Modules each worker imports before taking work.
+        mp_context: ``multiprocessing`` context the pool starts workers
+            with; defaults to the platform's start method.  Workers convert
+            with this process's active rule set either way.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    workers = min(workers, len(items))
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    if chunksize is None:
+        chunksize = max(1, -(-len(items) // (workers * _CHUNKS_PER_WORKER)))
+    # Imported here: it pulls in multiprocessing, which serial callers never need.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(tuple(preload), _active_rule_set()),
+    ) as pool:
+        pending: deque[Future[list[R]]] = deque()
+        for start in range(0, len(items), chunksize):
+            if len(pending) >= workers * _PENDING_PER_WORKER:
+                yield from pending.popleft().result()
+            pending.append(pool.submit(_run_chunk, func, items[start:start + chunksize]))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def parallel_map(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    *,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    preload: Sequence[str] = (),
+    mp_context: Optional[BaseContext] = None,
+) -> list[R]:
+    """Like ``parallel_imap``, but return the results as a list."""
+    return list(
+        parallel_imap(func, items, workers=workers, chunksize=chunksize, preload=preload, mp_context=mp_context)
+    )
+
+
+def map_unique(
+    func: Callable[[str], T],
+    texts: Iterable[str],
+    *,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    preload: Sequence[str] = (),
+) -> list[T]:
+    """Apply ``func`` once per distinct text and return results in input order.
+
+    Small batches (see ``PARALLEL_MIN_CHARS``) run serially; otherwise the
+    distinct texts go through ``parallel_map`` with the same arguments.
+
+    Args:
+        func: A picklable function that depends only on its argument.
+        texts: Input texts; duplicates are computed once.
+        workers: Worker processes; ``None`` uses every CPU and ``1`` runs
+            serially.
+        chunksize: Texts sent to a worker at a time.
+        preload: Modules each worker imports before taking work.
+    """
+    texts = list(texts)
+    unique = list(dict.fromkeys(texts))
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be at least 1")
+    if sum(map(len, unique)) < PARALLEL_MIN_CHARS:
+        workers = 1
+    results = parallel_map(func, unique, workers=workers, chunksize=chunksize, preload=preload)
+    if len(unique) == len(texts):
+        return results
+    lookup = dict(zip(unique, results))
+    return [lookup[text] for text in texts]
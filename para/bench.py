@@ -0,0 +1,358 @@
+"""Throughput and memory benchmarks on deterministic synthetic corpora.
+
+``generate_corpus`` builds Burmese text of a given kind and size from a
+seed, so every run measures the same input.  ``run_suite`` times
+``detect_encoding``, ``zg_to_unicode`` and every file handler on those
+corpora and records characters per second and peak traced memory.
+``compare`` checks a run against a stored baseline.  ``para bench`` wraps
+all three.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import platform
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Literal, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from para.convert import _preload, zg_to_unicode
+from para.detect import detect_encoding
+from para.handlers import DocxHandler, FileHandler, OdtHandler, PlainTextHandler, PptxHandler, XlsxHandler
+
+CorpusKind = Literal["zawgyi", "unicode", "mixed", "markup", "cells"]
+
+CORPUS_KINDS: tuple[CorpusKind, ...] = ("zawgyi", "unicode", "mixed", "markup", "cells")
+
+# Characters per corpus unless the caller asks for another size.
+DEFAULT_CHARS = 200_000
+
+# Throughput may drop, and peak memory grow, by this fraction of the
+# baseline before ``compare`` reports a regression.
+DEFAULT_THRESHOLD = 0.25
+
+# Bumped when corpora or measurements change, so old baselines are not compared.
+SUITE_VERSION = 1
+
+# Common Zawgyi words; the Unicode corpus uses their conversions.
+_ZAWGYI_WORDS = (
+    "ျမန္မာ", "ျပည္", "ကို", "ခ်စ္", "တယ္", "ေက်ာင္း", "သား", "စာအုပ္", "ေရး", "ဖတ္",
+    "ႏိုင္ငံ", "ေတာ္", "လူ", "မ်ား", "သည္", "၏", "ႀကီး", "ၿမိဳ႕", "ရန္ကုန္", "မဂၤလာပါ",
+    "ေန႔", "အလုပ္", "ေဆး႐ုံ", "ၾကည့္", "သြား", "ပါတယ္", "ေျပာ", "ထမင္း", "စား", "ေရ",
+)
+
+_ENGLISH_WORDS = (
+    "the", "report", "meeting", "price", "update", "school", "team", "market", "news",
+    "weather", "phone", "order", "total", "Yangon", "Mandalay", "2024", "page", "notes",
+)
+
+_DIGITS = "၀၁၂၃၄၅၆၇၈၉"
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    """One benchmark's measurement.
+
+    Args:
+        name: ``<function or handler>/<corpus kind>``.
+        chars: Characters of text processed per run.
+        seconds: Fastest run.
+        chars_per_sec: ``chars / seconds``.
+        peak_bytes: Peak memory traced by ``tracemalloc`` during one run.
+    """
+
+    name: str
+    chars: int
+    seconds: float
+    chars_per_sec: float
+    peak_bytes: int
+
+
+class _Words:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self._unicode: Optional[list[str]] = None
+
+    def myanmar(self, encoding: str, count: int) -> str:
+        if encoding == "zawgyi":
+            words = _ZAWGYI_WORDS
+        else:
+            if self._unicode is None:
+                self._unicode = [zg_to_unicode(word, force=True) for word in _ZAWGYI_WORDS]
+            words = self._unicode
+        return " ".join(self.rng.choice(words) for _ in range(count))
+
+    def english(self, count: int) -> str:
+        return " ".join(self.rng.choice(_ENGLISH_WORDS) for _ in range(count))
+
+    def sentence(self, encoding: str) -> str:
+        return self.myanmar(encoding, self.rng.randint(3, 8)) + "။"
+
+    def number(self) -> str:
+        return "".join(self.rng.choice(_DIGITS) for _ in range(self.rng.randint(1, 6)))
+
+
+def _line(words: _Words, kind: CorpusKind, number: int) -> str:
+    rng = words.rng
+    if kind in ("zawgyi", "unicode"):
+        return " ".join(words.sentence(kind) for _ in range(rng.randint(1, 3)))
+    if kind == "mixed":
+        pick = rng.random()
+        if pick < 0.2:
+            return words.english(rng.randint(4, 12)) + "."
+        return words.sentence("zawgyi" if pick < 0.6 else "unicode")
+    if kind == "markup":
+        text = words.english(rng.randint(2, 6))
+        if rng.random() < 0.35:
+            text += " " + words.sentence("zawgyi")
+        return (
+            f'<div class="post c{rng.randint(1, 9)}" data-id="{number}">'
+            f'<a href="https://example.com/post/{number}?ref=feed">{text}</a>'
+            f'<span class="time">2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}</span></div>'
+        )
+    if kind == "cells":
+        cells = []
+        for _ in range(rng.randint(3, 8)):
+            pick = rng.random()
+            if pick < 0.3:
+                cells.append(words.number())
+            elif pick < 0.45:
+                cells.append(words.english(1))
+            else:
+                cells.append(words.myanmar("zawgyi" if pick < 0.75 else "unicode", rng.randint(1, 2)))
+        return "\t".join(cells)
+    raise ValueError(f"unknown corpus kind: {kind!r}")
+
+
+def generate_corpus(kind: CorpusKind, chars: int = DEFAULT_CHARS, seed: int = 0) -> str:
+    """Return about ``chars`` characters of synthetic text; the same arguments give the same text.
+
+    Kinds:
+        zawgyi / unicode: Burmese sentences in one encoding.
+        mixed: Lines of Zawgyi, Unicode and English.
+        markup: HTML-like lines, mostly ASCII, a third with a Zawgyi sentence.
+        cells: Tab-separated rows of short cells (numbers, words, Burmese in
+            either encoding), like a spreadsheet export.
+
+    The text is made of whole lines ending in a newline, cut after the line
+    that reaches ``chars``.
+    """
+    if kind not in CORPUS_KINDS:
+        raise ValueError(f"unknown corpus kind: {kind!r}")
+    words = _Words(seed)
+    lines = []
+    total = 0
+    while total < chars:
+        line = _line(words, kind, len(lines)) + "\n"
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)
+
+
+def _package(path: Path, types: dict[str, str], parts: dict[str, str]) -> None:
+    overrides = "".join(f'<Override PartName="/{name}" ContentType="{kind}"/>' for name, kind in types.items())
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", f"<Types>{overrides}</Types>")
+        for name, data in parts.items():
+            package.writestr(name, data)
+
+
+def _write_docx(path: Path, text: str) -> None:
+    body = "".join(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>" for line in text.splitlines())
+    _package(
+        path,
+        {"word/document.xml": "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"},
+        {"word/document.xml": f'<w:document xmlns:w="urn:w"><w:body>{body}</w:body></w:document>'},
+    )
+
+
+def _write_pptx(path: Path, text: str) -> None:
+    body = "".join(f"<a:p><a:r><a:t>{escape(line)}</a:t></a:r></a:p>" for line in text.splitlines())
+    _package(
+        path,
+        {"ppt/slides/slide1.xml": "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"},
+        {"ppt/slides/slide1.xml": f'<p:sld xmlns:p="urn:p" xmlns:a="urn:a">{body}</p:sld>'},
+    )
+
+
+def _write_xlsx(path: Path, text: str) -> None:
+    main = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+    strings = list(dict.fromkeys(cell for cell in re.split(r"[\t\n]", text) if cell))
+    index = {cell: number for number, cell in enumerate(strings)}
+    rows = "".join(
+        "<row>" + "".join(f'<c t="s"><v>{index[cell]}</v></c>' for cell in line.split("\t") if cell) + "</row>"
+        for line in text.splitlines()
+    )
+    _package(
+        path,
+        {
+            "xl/workbook.xml": f"{main}.sheet.main+xml",
+            "xl/sharedStrings.xml": f"{main}.sharedStrings+xml",
+            "xl/worksheets/sheet1.xml": f"{main}.worksheet+xml",
+        },
+        {
+            "xl/workbook.xml": '<workbook><sheets><sheet name="Sheet1" sheetId="1"/></sheets></workbook>',
+            "xl/sharedStrings.xml": "<sst>" + "".join(f"<si><t>{escape(s)}</t></si>" for s in strings) + "</sst>",
+            "xl/worksheets/sheet1.xml": f"<worksheet><sheetData>{rows}</sheetData></worksheet>",
+        },
+    )
+
+
+def _write_odt(path: Path, text: str) -> None:
+    body = "".join(f"<text:p>{escape(line)}</text:p>" for line in text.splitlines())
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("mimetype", "application/vnd.oasis.opendocument.text", zipfile.ZIP_STORED)
+        package.writestr(
+            "content.xml",
+            '<office:document-content xmlns:office="urn:o" xmlns:text="urn:t"><office:body><office:text>'
+            f"{body}</office:text></office:body></office:document-content>",
+        )
+
+
+def _write_txt(path: Path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
+
+
+# Handler benchmarks: file suffix, handler, how to write the document and
+# which corpus fills it.
+_HANDLERS: tuple[tuple[str, Callable[[], FileHandler], Callable[[Path, str], None], CorpusKind], ...] = (
+    ("txt", PlainTextHandler, _write_txt, "mixed"),
+    ("docx", DocxHandler, _write_docx, "mixed"),
+    ("pptx", PptxHandler, _write_pptx, "mixed"),
+    ("xlsx", XlsxHandler, _write_xlsx, "cells"),
+    ("odt", OdtHandler, _write_odt, "mixed"),
+)
+
+
+def _measure(name: str, chars: int, func: Callable[[], object], repeat: int) -> BenchResult:
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+    # Traced separately: tracemalloc slows allocation down.
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return BenchResult(name, chars, seconds, chars / seconds if seconds > 0 else float("inf"), peak)
+
+
+def benchmark_names() -> list[str]:
+    """Return the names of every benchmark ``run_suite`` knows, in run order."""
+    names = [f"detect_encoding/{kind}" for kind in CORPUS_KINDS]
+    names += [f"zg_to_unicode/{kind}" for kind in CORPUS_KINDS]
+    names += [f"handler.{suffix}/{kind}" for suffix, _, _, kind in _HANDLERS]
+    return names
+
+
+def run_suite(
+    *,
+    chars: int = DEFAULT_CHARS,
+    repeat: int = 3,
+    only: Sequence[str] = (),
+    seed: int = 0,
+    progress: Optional[Callable[[BenchResult], None]] = None,
+) -> list[BenchResult]:
+    """Run the benchmarks and return their results.
+
+    Args:
+        chars: Size of each corpus in characters.
+        repeat: Timed runs per benchmark; the fastest counts.
+        only: Glob patterns (``"zg_to_unicode/*"``); when given, only
+            benchmarks whose name matches one of them run.
+        seed: Corpus seed.
+        progress: Called with each result as soon as it is measured.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    selected = [
+        name for name in benchmark_names() if not only or any(fnmatch.fnmatchcase(name, pattern) for pattern in only)
+    ]
+    _preload()
+    corpora: dict[str, str] = {}
+
+    def corpus(kind: CorpusKind) -> str:
+        if kind not in corpora:
+            corpora[kind] = generate_corpus(kind, chars, seed)
+        return corpora[kind]
+
+    handlers = {f"handler.{suffix}/{kind}": (suffix, handler, write, kind) for suffix, handler, write, kind in _HANDLERS}
+    results = []
+    with tempfile.TemporaryDirectory(prefix="para-bench-") as scratch:
+        for name in selected:
+            if name in handlers:
+                suffix, handler, write, kind = handlers[name]
+                source = Path(scratch) / f"in.{suffix}"
+                target = Path(scratch) / f"out.{suffix}"
+                write(source, corpus(kind))
+
+                def run(handler=handler(), source=source, target=target):
+                    handler.convert(source, target, zg_to_unicode)
+            else:
+                func_name, kind = name.split("/")
+                func = detect_encoding if func_name == "detect_encoding" else zg_to_unicode
+
+                def run(func=func, text=corpus(kind)):
+                    func(text)
+            result = _measure(name, len(corpus(name.split("/")[1])), run, repeat)
+            if progress is not None:
+                progress(result)
+            results.append(result)
+    return results
+
+
+def to_json(results: Iterable[BenchResult], *, chars: int, seed: int = 0) -> dict:
+    """Return a JSON-ready report of ``results``, with what is needed to compare it later."""
+    return {
+        "suite": SUITE_VERSION,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "chars": chars,
+        "seed": seed,
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Return one line per regression of ``report`` against ``baseline``; empty when there is none.
+
+    A benchmark regresses when its throughput is more than ``threshold``
+    (a fraction) below the baseline's, or its peak memory more than
+    ``threshold`` above it.  Benchmarks missing from either side are
+    ignored.
+
+    Raises:
+        ValueError: The reports come from different suite versions, corpus
+            sizes or seeds, so their numbers are not comparable.
+    """
+    for key in ("suite", "chars", "seed"):
+        if report.get(key) != baseline.get(key):
+            raise ValueError(f"baseline {key} is {baseline.get(key)!r}, this run's is {report.get(key)!r}")
+    before = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        if result["chars_per_sec"] < old["chars_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{result['name']}: {result['chars_per_sec']:,.0f} chars/s, "
+                f"baseline {old['chars_per_sec']:,.0f} ({result['chars_per_sec'] / old['chars_per_sec'] - 1:+.0%})"
+            )
+        if result["peak_bytes"] > old["peak_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{result['name']}: peak {result['peak_bytes']:,} bytes, "
+                f"baseline {old['peak_bytes']:,} ({result['peak_bytes'] / max(old['peak_bytes'], 1) - 1:+.0%})"
+            )
+    return regressions
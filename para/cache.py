@@ -0,0 +1,90 @@
+"""Bounded caches for conversion results."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of a cache's counters and size."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    chars: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache (0.0 before any lookup)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache(Generic[K]):
+    """Least-recently-used string cache bounded by entry count and total characters.
+
+    An entry weighs the length of its value plus the length of its key (or
+    an explicit ``weight``).  Entries heavier than ``max_chars`` are never
+    stored.
+
+    Args:
+        max_entries: Maximum number of entries kept.
+        max_chars: Maximum total weight kept.
+    """
+
+    def __init__(self, max_entries: int, max_chars: int):
+        if max_entries <= 0 or max_chars <= 0:
+            raise ValueError("cache bounds must be positive")
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._data: OrderedDict[K, tuple[str, int]] = OrderedDict()
+        self._chars = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> Optional[str]:
+        """Return the cached value for ``key`` (marking it recently used), or None."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: K, value: str, weight: Optional[int] = None) -> None:
+        """Store ``value`` under ``key``, evicting least recently used entries as needed."""
+        if weight is None:
+            weight = len(value) + (len(key) if isinstance(key, str) else 0)
+        if weight > self.max_chars:
+            return
+        previous = self._data.pop(key, None)
+        if previous is not None:
+            self._chars -= previous[1]
+        self._data[key] = (value, weight)
+        self._chars += weight
+        while len(self._data) > self.max_entries or self._chars > self.max_chars:
+            _key, (_value, dropped) = self._data.popitem(last=False)
+            self._chars -= dropped
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        self._data.clear()
+        self._chars = 0
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        """Current counters, entry count and total weight."""
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._data), self._chars)
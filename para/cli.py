@@ -4,68 +4,388 @@ from __future__ import annotations
 
 import argparse
 import sys
-from typing import Optional
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
-from para.convert import zg_to_unicode
-from para.detect import detect_encoding, is_zawgyi
-from para.io import convert_file, read_text, write_text
-from para.normalize import normalize_unicode
+from para.detect import _BOUNDARY_SLACK, detect_encoding_chunks, detect_encoding_report
+from para.formats import is_document
+
+# ``para.io``, ``para.convert`` and ``para.handlers`` are imported by the
+# commands that use them: ``para detect`` on plain text loads none of them.
 
 
 def _read_input(input_path: Optional[str]) -> str:
     if input_path:
+        from para.io import read_text
+
         return read_text(input_path)
     return sys.stdin.read()
 
 
 def _write_output(data: str, output_path: Optional[str]) -> None:
     if output_path:
+        from para.io import write_text
+
         write_text(output_path, data)
     else:
         sys.stdout.write(data)
 
 
+def _read_chunks(input_path: Optional[str]) -> Iterator[str]:
+    from para.handlers import READ_CHUNK_CHARS
+
+    if input_path:
+        with open(input_path, encoding="utf-8") as stream:
+            yield from iter(partial(stream.read, READ_CHUNK_CHARS), "")
+    else:
+        yield from iter(partial(sys.stdin.read, READ_CHUNK_CHARS), "")
+
+
+def _write_chunks(pieces: Iterable[str], output_path: Optional[str]) -> None:
+    if output_path:
+        from para.handlers import atomic_write_text
+
+        with atomic_write_text(Path(output_path)) as stream:
+            for piece in pieces:
+                stream.write(piece)
+    else:
+        for piece in pieces:
+            sys.stdout.write(piece)
+
+
+def _read_head(input_path: Optional[str], chars: int) -> tuple[str, bool]:
+    """Read at most ``chars`` characters; also return whether more input followed."""
+    if input_path:
+        with open(input_path, encoding="utf-8") as stream:
+            data = stream.read(chars + 1)
+    else:
+        data = sys.stdin.read(chars + 1)
+    return data[:chars], len(data) > chars
+
+
 def _cmd_detect(args: argparse.Namespace) -> int:
-    data = _read_input(args.input)
-    encoding = detect_encoding(data)
-    sys.stdout.write(f"{encoding}\n")
+    truncated = False
+    if args.input and is_document(args.input):
+        from para.io import read_document_text
+
+        data = read_document_text(args.input, max_chars=args.max_chars)
+    elif args.max_chars is not None and args.sampling == "head":
+        # Head windows end at most ``_BOUNDARY_SLACK`` characters past
+        # ``max_chars``, so reading that much scores exactly as the whole
+        # input would, in time and memory bounded by --max-chars.
+        data, truncated = _read_head(args.input, args.max_chars + _BOUNDARY_SLACK)
+    else:
+        data = _read_input(args.input)
+    report = detect_encoding_report(
+        data,
+        max_chars=args.max_chars,
+        sampling=args.sampling,
+        confidence=args.confidence,
+    )
+    sys.stdout.write(f"{report.encoding}\n")
+    if args.report:
+        if truncated:
+            scanned = (
+                f"scanned: {report.scanned_chars} chars in {report.windows} window(s); "
+                f"only the first {report.total_chars} chars were read\n"
+            )
+        else:
+            scanned = (
+                f"scanned: {report.scanned_chars}/{report.total_chars} chars "
+                f"({report.coverage:.1%}) in {report.windows} window(s)\n"
+            )
+        sys.stdout.write(
+            f"zawgyi_score: {report.zawgyi_score}\n"
+            f"unicode_score: {report.unicode_score}\n"
+            + scanned
+            + f"early_exit: {'yes' if report.early_exit else 'no'}\n"
+        )
     return 0
 
 
+def _convert_recursive(args: argparse.Namespace) -> int:
+    from para.io import convert_tree
+
+    if not args.output_dir:
+        raise SystemExit("para convert: --recursive requires --output-dir")
+    if args.input or args.output or args.segment or args.detect_head:
+        raise SystemExit(
+            "para convert: --recursive cannot be combined with --input, --output, --segment or --detect-head"
+        )
+    if not Path(args.recursive).is_dir():
+        raise SystemExit(f"para convert: not a directory: {args.recursive}")
+    summary = convert_tree(
+        input_dir=args.recursive,
+        output_dir=args.output_dir,
+        include=args.include or (),
+        exclude=args.exclude or (),
+        jobs=args.jobs,
+        assume_zawgyi=args.force,
+        normalize=not args.no_normalize,
+        manifest=args.manifest,
+        detection=args.detection,
+        font_hints=not args.no_font_hints,
+        unicode_font=args.unicode_font,
+    )
+    for result in summary.failed:
+        sys.stderr.write(f"failed: {result.input_path}: {result.error}\n")
+    formats = ", ".join(f"{suffix}: {count}" for suffix, count in summary.formats.items())
+    sys.stderr.write(
+        f"converted {len(summary.converted)} file(s), {summary.bytes} bytes in "
+        f"{summary.seconds:.2f}s; {len(summary.skipped)} unchanged, {len(summary.failed)} failed"
+        + (f" ({formats})" if formats else "")
+        + "\n"
+    )
+    return 1 if summary.failed else 0
+
+
+def _load_rules(path: Optional[str]):
+    """Return the rule set in ``path``, or the built-in one when no path is given."""
+    from para.rulesets import BUILTIN, load_rule_set
+
+    if not path:
+        return BUILTIN
+    try:
+        return load_rule_set(path)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"para: cannot load rules: {exc}")
+
+
 def _cmd_convert(args: argparse.Namespace) -> int:
-    if args.input:
+    from para.convert import use_rule_set, zg_to_unicode, zg_to_unicode_segments, zg_to_unicode_stream
+    from para.io import convert_file
+
+    use_rule_set(_load_rules(args.rules))
+    if args.recursive:
+        return _convert_recursive(args)
+    if args.detect_head and (args.segment or args.jobs is not None or (args.input and is_document(args.input))):
+        raise SystemExit("para convert: --detect-head only applies to plain text without --segment or --jobs")
+    if args.jobs is not None and (args.segment or not (args.input and args.output)):
+        raise SystemExit("para convert: --jobs needs --recursive, or --input and --output without --segment")
+    if args.input and is_document(args.input):
+        if args.jobs is not None:
+            raise SystemExit("para convert: --jobs only splits plain text; use --recursive for many files")
         converted = convert_file(
             input_path=args.input,
             output_path=args.output,
             assume_zawgyi=args.force,
             normalize=not args.no_normalize,
+            return_text=not args.output,
+            detection=args.detection,
+            font_hints=not args.no_font_hints,
+            unicode_font=args.unicode_font,
         )
         if not args.output:
             sys.stdout.write(converted)
-    else:
-        data = sys.stdin.read()
-        converted = zg_to_unicode(
-            data,
+        return 0
+    if args.segment:
+        if args.force:
+            raise SystemExit("para convert: --segment cannot be combined with --force")
+        result = zg_to_unicode_segments(
+            _read_input(args.input),
+            segment=args.segment,
+            normalize=not args.no_normalize,
+        )
+        _write_output(result.text, args.output)
+        if args.report:
+            for seg in result.segments:
+                if seg.encoding is not None:
+                    verdict = "converted" if seg.converted else "kept"
+                    sys.stderr.write(f"{seg.start}-{seg.end}\t{seg.encoding}\t{verdict}\n")
+        return 0
+    if args.jobs is not None:
+        convert_file(
+            input_path=args.input,
+            output_path=args.output,
+            assume_zawgyi=args.force,
+            normalize=not args.no_normalize,
+            return_text=False,
+            jobs=args.jobs,
+        )
+        return 0
+    if args.detect_head:
+        # Streams in bounded memory, deciding from the first
+        # ``STREAM_DETECT_CHARS`` characters only.
+        pieces = zg_to_unicode_stream(
+            _read_chunks(args.input),
             normalize=not args.no_normalize,
             force=args.force,
         )
-        _write_output(converted, args.output)
+    elif args.input:
+        # A first pass scores the whole file, then the file streams through
+        # converted exactly as its whole text would be.
+        if args.force or detect_encoding_chunks(_read_chunks(args.input)) == "zawgyi":
+            pieces = zg_to_unicode_stream(
+                _read_chunks(args.input), normalize=not args.no_normalize, force=True
+            )
+        else:
+            pieces = _read_chunks(args.input)
+    else:
+        # Stdin can only be read once, so it is converted whole.
+        pieces = [zg_to_unicode(sys.stdin.read(), normalize=not args.no_normalize, force=args.force)]
+    _write_chunks(pieces, args.output)
+    return 0
+
+
+def _cmd_rules(args: argparse.Namespace) -> int:
+    from para.rulesets import cache_path, compile_rule_set
+
+    rule_set = _load_rules(args.rules)
+    compile_rule_set(rule_set)
+    path = cache_path(rule_set)
+    sys.stdout.write(
+        f"name: {rule_set.name}\n"
+        f"version: {rule_set.version}\n"
+        f"rules: {len(rule_set.rules)}\n"
+        f"fingerprint: {rule_set.fingerprint}\n"
+        f"cache: {path if path is not None else 'off'}\n"
+    )
+    return 0
+
+
+def _cmd_bench(args: argparse.Namespace) -> int:
+    import json
+
+    from para.bench import compare, run_suite, to_json
+
+    def progress(result) -> None:
+        sys.stderr.write(
+            f"{result.name:<26} {result.chars_per_sec:>14,.0f} chars/s "
+            f"{result.peak_bytes / 1024:>10,.0f} KiB peak\n"
+        )
+
+    results = run_suite(chars=args.chars, repeat=args.repeat, only=args.only or (), progress=progress)
+    report = to_json(results, chars=args.chars)
+    _write_output(json.dumps(report, indent=2) + "\n", args.output)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as stream:
+        baseline = json.load(stream)
+    try:
+        regressions = compare(report, baseline, args.threshold)
+    except ValueError as exc:
+        raise SystemExit(f"para bench: {args.baseline}: {exc}")
+    for line in regressions:
+        sys.stderr.write(f"regression: {line}\n")
+    return 1 if regressions else 0
+
+
+def _cmd_profile_rules(args: argparse.Namespace) -> int:
+    from para.convert import use_rule_set, zg_to_unicode
+    from para.engine import RuleProfile
+
+    use_rule_set(_load_rules(args.rules))
+    if is_document(args.input):
+        from para.io import read_document_text
+
+        data = read_document_text(args.input)
+    else:
+        data = _read_input(args.input)
+    profile = RuleProfile()
+    zg_to_unicode(data, force=args.force, segment=args.segment, normalize=False, stats=profile)
+    if not profile.rules:
+        sys.stderr.write("para profile-rules: no text was converted; pass --force or --segment for this input\n")
+        return 1
+    total = profile.seconds or 1.0
+    ranked = profile.ranked()
+    shown = ranked if args.top is None else ranked[: args.top]
+    sys.stdout.write(
+        f"{len(data)} chars, {len(ranked)} rules, {profile.seconds * 1000:.1f} ms in rules "
+        "(each rule timed on its own)\n"
+        f"{'rank':>4} {'rule':>4} {'step':<18} {'runs':>6} {'skipped':>7} {'matches':>8} "
+        f"{'changed':>8} {'ms':>9} {'share':>6}  pattern\n"
+    )
+    for rank, timing in enumerate(shown, 1):
+        sys.stdout.write(
+            f"{rank:>4} {timing.index:>4} {timing.step:<18} {timing.runs:>6} {timing.skipped:>7} "
+            f"{timing.matches:>8} {timing.chars_changed:>8} {timing.seconds * 1000:>9.3f} "
+            f"{timing.seconds / total:>6.1%}  {timing.pattern!r}\n"
+        )
+    never = profile.never_fired()
+    sys.stdout.write(f"never fired: {len(never)} rule(s)\n")
+    for timing in never:
+        sys.stdout.write(f"{timing.index:>4} {timing.pattern!r}\n")
     return 0
 
 
+def _cmd_check_engine(args: argparse.Namespace) -> int:
+    from para.convert import use_rule_set
+    from para.differential import load_fixtures, run_differential, throughput
+
+    use_rule_set(_load_rules(args.rules))
+    if args.throughput:
+        sys.stdout.write(f"{'corpus':<8} {'path':<9} {'reference ms':>12} {'ms':>9} {'speedup':>8}\n")
+        for result in throughput(chars=args.chars, repeat=args.repeat, seed=args.seed):
+            sys.stdout.write(
+                f"{result.corpus:<8} {result.path:<9} {result.reference_seconds * 1000:>12.2f} "
+                f"{result.seconds * 1000:>9.2f} {result.speedup:>7.2f}x\n"
+            )
+        return 0
+    report = run_differential(cases=args.cases, seed=args.seed, fixtures=load_fixtures(args.fixtures or ()))
+    counts = ", ".join(f"{source}: {count}" for source, count in report.cases.items())
+    sys.stdout.write(f"checked {sum(report.cases.values())} input(s) ({counts})\n")
+    for mismatch in report.mismatches:
+        sys.stdout.write(
+            f"mismatch in {mismatch.path} ({mismatch.source}, {len(mismatch.original)} chars shrunk to "
+            f"{len(mismatch.text)}):\n"
+            f"  input:    {mismatch.text!r}\n"
+            f"  expected: {mismatch.expected!r}\n"
+            f"  actual:   {mismatch.actual!r}\n"
+        )
+    return 0 if report.ok else 1
+
+
 def _cmd_normalize(args: argparse.Namespace) -> int:
+    from para.normalize import normalize_unicode
+
     data = _read_input(args.input)
     normalized = normalize_unicode(data)
     _write_output(normalized, args.output)
     return 0
 
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, not {value}")
+    return number
+
+
+def _fraction(value: str) -> float:
+    number = float(value)
+    if not 0 < number <= 1:
+        raise argparse.ArgumentTypeError(f"must be a fraction in (0, 1], not {value}")
+    return number
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Para: Zawgyi ↔ Unicode tooling")
     sub = parser.add_subparsers(dest="command", required=True)
 
     detect_parser = sub.add_parser("detect", help="Detect encoding of input text")
     detect_parser.add_argument("--input", help="Input file path; defaults to stdin")
+    detect_parser.add_argument(
+        "--max-chars",
+        type=_positive_int,
+        help="Score at most about this many characters; with head sampling only about that much is read",
+    )
+    detect_parser.add_argument(
+        "--sampling",
+        choices=["head", "stratified"],
+        default="head",
+        help="Where --max-chars are taken from: the start, or spread across the text",
+    )
+    detect_parser.add_argument(
+        "--confidence",
+        type=_fraction,
+        help="Stop early once the score margin reaches this fraction (0-1]",
+    )
+    detect_parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Also print scores and sample coverage",
+    )
     detect_parser.set_defaults(func=_cmd_detect)
 
     convert_parser = sub.add_parser("convert", help="Convert Zawgyi text to Unicode")
@@ -81,8 +401,174 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Skip Unicode normalization step",
     )
+    convert_parser.add_argument(
+        "--detect-head",
+        action="store_true",
+        help="Plain text: decide from the first 1 MiB and stream in one pass (bounded memory for "
+        "stdin, which is otherwise read whole); longer inputs may then convert differently",
+    )
+    convert_parser.add_argument(
+        "--segment",
+        choices=["line", "paragraph", "run"],
+        help="Detect and convert each line, paragraph or Myanmar run on its own (mixed input)",
+    )
+    convert_parser.add_argument(
+        "--detection",
+        choices=["document", "fragment"],
+        default="document",
+        help="For Office and OpenDocument files: one verdict for the whole document "
+        "(default), or per cell, paragraph or node for files that mix encodings",
+    )
+    convert_parser.add_argument(
+        "--no-font-hints",
+        action="store_true",
+        help="For Word, Excel and OpenDocument files: detect text in known Zawgyi "
+        "or Unicode fonts too, instead of trusting the font",
+    )
+    convert_parser.add_argument(
+        "--unicode-font",
+        metavar="NAME",
+        help="For Word, Excel and OpenDocument files: rename Zawgyi fonts to NAME",
+    )
+    convert_parser.add_argument(
+        "--report",
+        action="store_true",
+        help="With --segment, print each Myanmar segment's offsets and verdict to stderr",
+    )
+    convert_parser.add_argument(
+        "--recursive",
+        metavar="SRC_DIR",
+        help="Convert every supported file under SRC_DIR into --output-dir",
+    )
+    convert_parser.add_argument(
+        "--output-dir",
+        metavar="DST_DIR",
+        help="With --recursive, where converted files are written (same layout)",
+    )
+    convert_parser.add_argument(
+        "--jobs",
+        type=_positive_int,
+        help="Worker processes: per file with --recursive (default: one per CPU), or per "
+        "range of one plain text --input written to --output (default: 1); rejected otherwise",
+    )
+    convert_parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="With --recursive, JSON Lines manifest used to skip unchanged files and resume",
+    )
+    convert_parser.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="With --recursive, only convert files matching GLOB (repeatable)",
+    )
+    convert_parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="With --recursive, skip files matching GLOB (repeatable)",
+    )
+    convert_parser.add_argument(
+        "--rules",
+        metavar="FILE",
+        help="Convert with the rule set in FILE (JSON) instead of the built-in rules",
+    )
     convert_parser.set_defaults(func=_cmd_convert)
 
+    rules_parser = sub.add_parser(
+        "rules", help="Describe a rule set and precompile it into the PARA_CACHE_DIR engine cache"
+    )
+    rules_parser.add_argument(
+        "--rules",
+        metavar="FILE",
+        help="Rule set file (JSON); defaults to the built-in rules",
+    )
+    rules_parser.set_defaults(func=_cmd_rules)
+
+    bench_parser = sub.add_parser(
+        "bench", help="Measure throughput and peak memory on synthetic Burmese corpora"
+    )
+    bench_parser.add_argument(
+        "--chars",
+        type=int,
+        default=200_000,
+        help="Characters per corpus (default: 200000); baselines only compare at the same size",
+    )
+    bench_parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per benchmark; the fastest counts (default: 3)"
+    )
+    bench_parser.add_argument(
+        "--only",
+        action="append",
+        metavar="GLOB",
+        help='Only run benchmarks matching GLOB, such as "zg_to_unicode/*" (repeatable)',
+    )
+    bench_parser.add_argument("--output", help="Write the JSON report here; defaults to stdout")
+    bench_parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="JSON report to compare against; exit status 1 on a regression",
+    )
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed throughput drop or peak memory growth, as a fraction (default: 0.25)",
+    )
+    bench_parser.set_defaults(func=_cmd_bench)
+
+    profile_parser = sub.add_parser(
+        "profile-rules", help="Time every conversion rule on a file and list rules that never fire"
+    )
+    profile_parser.add_argument("--input", required=True, help="Input file path")
+    profile_parser.add_argument(
+        "--force", action="store_true", help="Run the rules even if the input is not detected as Zawgyi"
+    )
+    profile_parser.add_argument(
+        "--segment",
+        choices=("line", "paragraph", "run"),
+        help="Detect per line, paragraph or Myanmar run, as `para convert --segment` does",
+    )
+    profile_parser.add_argument("--top", type=int, metavar="N", help="Only list the N slowest rules")
+    profile_parser.add_argument(
+        "--rules",
+        metavar="FILE",
+        help="Profile the rule set in FILE (JSON) instead of the built-in rules",
+    )
+    profile_parser.set_defaults(func=_cmd_profile_rules)
+
+    check_parser = sub.add_parser(
+        "check-engine", help="Check the fused rule engine against the rule-by-rule reference"
+    )
+    check_parser.add_argument(
+        "--cases", type=int, default=2000, help="Random inputs per generator (default: 2000)"
+    )
+    check_parser.add_argument("--seed", type=int, default=0, help="Seed for generated inputs (default: 0)")
+    check_parser.add_argument(
+        "--fixtures",
+        action="append",
+        metavar="PATH",
+        help="Also check Burmese string literals of Python files, or lines of other files, "
+        "under PATH (repeatable)",
+    )
+    check_parser.add_argument(
+        "--throughput",
+        action="store_true",
+        help="Instead of checking, report each engine path's speedup over the reference per corpus",
+    )
+    check_parser.add_argument(
+        "--chars", type=int, default=100_000, help="With --throughput, characters per corpus (default: 100000)"
+    )
+    check_parser.add_argument(
+        "--repeat", type=int, default=3, help="With --throughput, timed runs; the fastest counts (default: 3)"
+    )
+    check_parser.add_argument(
+        "--rules",
+        metavar="FILE",
+        help="Check the rule set in FILE (JSON) instead of the built-in rules",
+    )
+    check_parser.set_defaults(func=_cmd_check_engine)
+
     normalize_parser = sub.add_parser("normalize", help="Normalize Unicode Burmese text")
     normalize_parser.add_argument("--input", help="Input file path; defaults to stdin")
     normalize_parser.add_argument("--output", help="Output file path; defaults to stdout")
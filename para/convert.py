@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
+import itertools
 import re
-from typing import Iterable
+from dataclasses import dataclass
+from functools import partial
+from typing import Iterable, Iterator, Literal, Optional, Sequence
 
-from para.detect import detect_encoding, is_zawgyi
+from para.batch import map_unique
+from para.cache import LRUCache
+from para.detect import _MYANMAR_RANGE, Encoding, detect_encoding, is_zawgyi
+from para.engine import RuleEngine, RuleStats
 from para.normalize import normalize_unicode
-from para.rules import ZAWGYI_TO_UNICODE_RULES
+from para.rulesets import BUILTIN, compile_rule_set, RuleSet
+from para.syllables import zawgyi_syllables
 
 
 def _compile_rules(rules: Iterable[tuple[str, str]]) -> list[tuple[re.Pattern[str], str]]:
@@ -17,30 +24,444 @@ def _compile_rules(rules: Iterable[tuple[str, str]]) -> list[tuple[re.Pattern[st
     return compiled
 
 
-_COMPILED_RULES = _compile_rules(ZAWGYI_TO_UNICODE_RULES)
+# The rule set every conversion uses; see ``use_rule_set``.
+_RULE_SET: RuleSet = BUILTIN
 
+# Fused form of ``_RULE_SET``, built (or loaded from the engine cache, see
+# ``para.rulesets``) on first use so that importing stays cheap.
+_ENGINE: Optional[RuleEngine] = None
 
-def zg_to_unicode(text: str, *, normalize: bool = True, force: bool = False) -> str:
+
+def _compiled_rules() -> list[tuple[re.Pattern[str], str]]:
+    return _compile_rules(_RULE_SET.rules)
+
+
+def _engine() -> RuleEngine:
+    """Return the engine; its output is identical to applying ``_compiled_rules()`` in order."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = compile_rule_set(_RULE_SET)
+    return _ENGINE
+
+
+def _preload() -> None:
+    """Load the engine up front; ``para.batch`` workers call this before taking work."""
+    _engine()
+
+
+def use_rule_set(rule_set: RuleSet) -> None:
+    """Convert with ``rule_set`` from now on, in this process; ``BUILTIN`` restores the default.
+
+    Cached cluster and conversion results from the previous rule set are
+    dropped.  ``para.batch`` pools started afterwards pass the rule set to
+    their workers, whatever their start method.
+    """
+    global _RULE_SET, _ENGINE
+    if rule_set == _RULE_SET:
+        return
+    _RULE_SET = rule_set
+    _ENGINE = None
+    CLUSTER_CACHE.clear()
+    if _CONVERSION_CACHE is not None:
+        _CONVERSION_CACHE.clear()
+
+
+def active_rule_set() -> RuleSet:
+    """Return the rule set conversions use."""
+    return _RULE_SET
+
+
+# Converted syllable clusters for ``memoize=True``, shared by every call.
+CLUSTER_CACHE_ENTRIES = 1 << 16
+CLUSTER_CACHE_CHARS = 1 << 22
+CLUSTER_CACHE: LRUCache[str] = LRUCache(CLUSTER_CACHE_ENTRIES, CLUSTER_CACHE_CHARS)
+
+# Default bounds for ``enable_conversion_cache``.
+CONVERSION_CACHE_ENTRIES = 1 << 16
+CONVERSION_CACHE_CHARS = 1 << 22
+
+# Whole-string results keyed on ``(text, normalize, force)``; None while disabled.
+_CONVERSION_CACHE: Optional[LRUCache[tuple[str, bool, bool]]] = None
+
+# Streaming converts pending text once about this many characters are buffered.
+STREAM_BUFFER_CHARS = 1 << 16
+
+# Without ``force``, streaming decides from this many leading characters.
+STREAM_DETECT_CHARS = 1 << 20
+
+Segmentation = Literal["line", "paragraph", "run"]
+
+# Line and paragraph segments end just after a match of their separator.
+_SEGMENT_SEPARATORS = {
+    "line": re.compile(r"\n"),
+    "paragraph": re.compile(r"\n(?:[^\S\n]*\n)+"),
+}
+
+# A Myanmar run may contain spaces and ZWSP between letters, but no line break.
+_MYANMAR_RUN = re.compile(r"[\u1000-\u109F](?:(?:[^\S\n]|\u200B)*[\u1000-\u109F])*")
+
+
+@dataclass(frozen=True)
+class Segment:
+    """Verdict for one segment, as offsets into the input text."""
+
+    start: int
+    end: int
+    # ``None`` when the segment has no Myanmar text and was not scored.
+    encoding: Optional[Encoding]
+    converted: bool
+
+
+@dataclass(frozen=True)
+class SegmentedConversion:
+    """Result of ``zg_to_unicode_segments``."""
+
+    text: str
+    segments: tuple[Segment, ...]
+
+    @property
+    def converted_count(self) -> int:
+        """Number of segments that were converted."""
+        return sum(1 for segment in self.segments if segment.converted)
+
+
+def enable_conversion_cache(
+    max_entries: int = CONVERSION_CACHE_ENTRIES,
+    max_chars: int = CONVERSION_CACHE_CHARS,
+) -> LRUCache[tuple[str, bool, bool]]:
+    """Start caching ``zg_to_unicode`` results, replacing any previous cache.
+
+    Every caller in the process shares the cache: file handlers, segment
+    conversion and batch helpers all go through ``zg_to_unicode``.  It pays
+    off for inputs that repeat whole values, such as spreadsheet columns.
+    Results served from the cache add nothing to ``stats``.
+
+    Args:
+        max_entries: Maximum number of cached texts.
+        max_chars: Maximum total length of cached inputs plus outputs.
+
+    Returns:
+        The new cache, whose ``hits``, ``misses``, ``evictions`` and
+        ``stats`` report its use.
+    """
+    global _CONVERSION_CACHE
+    _CONVERSION_CACHE = LRUCache(max_entries, max_chars)
+    return _CONVERSION_CACHE
+
+
+def disable_conversion_cache() -> None:
+    """Stop caching ``zg_to_unicode`` results and drop the cache."""
+    global _CONVERSION_CACHE
+    _CONVERSION_CACHE = None
+
+
+def conversion_cache() -> Optional[LRUCache[tuple[str, bool, bool]]]:
+    """Return the active conversion cache, or None when caching is disabled."""
+    return _CONVERSION_CACHE
+
+
+def _apply_rules(text: str, stats: Optional[RuleStats], memoize: bool) -> str:
+    if memoize:
+        return _engine().apply_clusters(zawgyi_syllables(text), CLUSTER_CACHE, stats)
+    return _engine().apply(text, stats)
+
+
+def _segment_bounds(text: str, segment: Segmentation) -> list[tuple[int, int]]:
+    bounds: list[tuple[int, int]] = []
+    pos = 0
+    if segment == "run":
+        for m in _MYANMAR_RUN.finditer(text):
+            if m.start() > pos:
+                bounds.append((pos, m.start()))
+            bounds.append(m.span())
+            pos = m.end()
+    else:
+        for m in _SEGMENT_SEPARATORS[segment].finditer(text):
+            bounds.append((pos, m.end()))
+            pos = m.end()
+    if pos < len(text):
+        bounds.append((pos, len(text)))
+    return bounds
+
+
+def zg_to_unicode_segments(
+    text: str,
+    *,
+    segment: Segmentation = "line",
+    normalize: bool = True,
+    stats: Optional[RuleStats] = None,
+) -> SegmentedConversion:
+    """
+    Detect and convert each segment of mixed Zawgyi/Unicode text independently.
+
+    Segments without Myanmar characters are passed through without scoring
+    or rule work.  The others are converted when the detector prefers Zawgyi
+    for that segment alone, exactly as ``zg_to_unicode`` would convert it.
+
+    Args:
+        text: Input text that may mix encodings.
+        segment: ``"line"`` (each line with its newline), ``"paragraph"``
+            (blocks separated by blank lines) or ``"run"`` (Myanmar runs,
+            which may span spaces and ZWSP, and the text between them).
+        normalize: Whether to apply Unicode normalization to converted segments.
+        stats: Optional ``RuleStats`` accumulated over converted segments.
+            Converted segments go through the conversion cache when one is
+            enabled.
+    """
+    if segment not in ("line", "paragraph", "run"):
+        raise ValueError(f"unknown segmentation: {segment!r}")
+    pieces: list[str] = []
+    segments: list[Segment] = []
+    for start, end in _segment_bounds(text, segment):
+        piece = text[start:end]
+        if not _MYANMAR_RANGE.search(piece):
+            pieces.append(piece)
+            segments.append(Segment(start, end, None, False))
+            continue
+        encoding = detect_encoding(piece)
+        if encoding == "zawgyi":
+            piece = zg_to_unicode(piece, normalize=normalize, force=True, stats=stats)
+        pieces.append(piece)
+        segments.append(Segment(start, end, encoding, encoding == "zawgyi"))
+    return SegmentedConversion("".join(pieces), tuple(segments))
+
+
+def zg_to_unicode(
+    text: str,
+    *,
+    normalize: bool = True,
+    force: bool = False,
+    stats: Optional[RuleStats] = None,
+    segment: Optional[Segmentation] = None,
+    memoize: bool = False,
+) -> str:
     """
     Convert Zawgyi text to Unicode using ordered regex rules.
 
+    After ``enable_conversion_cache``, results (detection included) are
+    cached on ``(text, normalize, force)``.
+
     Args:
         text: Input text that may be Zawgyi.
         normalize: Whether to apply Unicode normalization and basic reordering.
         force: When False, conversion only runs if the detector believes the text is Zawgyi.
+        stats: Optional ``RuleStats`` that receives how many rules were applied
+            and how many were skipped because their trigger codepoints were absent.
+            A ``para.engine.RuleProfile`` also records each rule's time,
+            matches and changed characters.
+        segment: Decide per line, paragraph or Myanmar run instead of once for
+            the whole text; see ``zg_to_unicode_segments``.  Cannot be
+            combined with ``force``.
+        memoize: Convert each distinct syllable cluster once and serve repeats
+            from ``CLUSTER_CACHE``.  The output is identical; on long texts
+            with a warm cache most of the rule work becomes dictionary
+            lookups.  Ignored for rule sets that are not cluster-local.
     """
+    if segment is not None:
+        if force:
+            raise ValueError("segment and force cannot be combined")
+        return zg_to_unicode_segments(text, segment=segment, normalize=normalize, stats=stats).text
+
     if not text:
         return ""
 
+    cache = _CONVERSION_CACHE
+    if cache is None:
+        return _convert(text, normalize, force, stats, memoize)
+    key = (text, normalize, force)
+    converted = cache.get(key)
+    if converted is None:
+        converted = _convert(text, normalize, force, stats, memoize)
+        cache.put(key, converted, len(text) + len(converted))
+    return converted
+
+
+def _convert(text: str, normalize: bool, force: bool, stats: Optional[RuleStats], memoize: bool) -> str:
     # Hard guard: never modify non-Zawgyi input (contract guarantee).
     if not force and detect_encoding(text) != "zawgyi":
         return text
 
-    converted = text
-    for pattern, repl in _COMPILED_RULES:
-        converted = pattern.sub(repl, converted)
+    converted = _apply_rules(text, stats, memoize)
 
     if normalize:
         converted = normalize_unicode(converted)
 
     return converted
+
+
+def zg_to_unicode_runs(
+    runs: Sequence[str],
+    *,
+    normalize: bool = True,
+    force: bool = False,
+    stats: Optional[RuleStats] = None,
+) -> list[str]:
+    """
+    Convert consecutive runs of one paragraph as a single text, keeping the run boundaries.
+
+    The joined text gets one detection decision and one conversion; the
+    output is then split back into one piece per run.  A run boundary that
+    falls inside a syllable cluster moves to the cluster's end, so the
+    cluster is converted whole and lands in the earlier run.  Joining the
+    result always gives ``zg_to_unicode("".join(runs))``.
+
+    Args:
+        runs: Text of consecutive runs (formatting spans).
+        normalize: Whether to apply Unicode normalization and basic reordering.
+        force: When False, the runs are only converted if the detector
+            believes their joined text is Zawgyi.
+        stats: Optional ``RuleStats`` for the rules run.
+    """
+    runs = list(runs)
+    if len(runs) == 1:
+        return [zg_to_unicode(runs[0], normalize=normalize, force=force, stats=stats)]
+    text = "".join(runs)
+    if not text or (not force and detect_encoding(text) != "zawgyi"):
+        return runs
+    converted = _engine().apply_split(runs, stats)
+    return [normalize_unicode(piece) for piece in converted] if normalize else converted
+
+
+def can_cut(text: str, cut: int) -> bool:
+    """True when converting ``text[:cut]`` and ``text[cut:]`` separately gives the same output.
+
+    ``text`` may be a window out of a larger document; see
+    ``RuleEngine.can_cut``.
+    """
+    return _engine().can_cut(text, cut)
+
+
+def _convert_text(text: str, normalize: bool, force: bool) -> str:
+    return _convert(text, normalize, force, None, False) if text else ""
+
+
+def zg_to_unicode_many(
+    texts: Iterable[str],
+    *,
+    normalize: bool = True,
+    force: bool = False,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> list[str]:
+    """
+    Convert many texts, each exactly as ``zg_to_unicode`` would, in input order.
+
+    Each distinct text is converted once.  Texts already in the conversion
+    cache (see ``enable_conversion_cache``) are served from it, and new
+    results are added to it.  The rest is spread over a process pool, since
+    the regex work holds the GIL; small batches run in this process.
+
+    Args:
+        texts: Input texts that may be Zawgyi.
+        normalize: Whether to apply Unicode normalization and basic reordering.
+        force: When False, each text is only converted if the detector
+            believes it is Zawgyi.
+        workers: Worker processes; ``None`` uses every CPU, ``1`` runs serially.
+        chunksize: Distinct texts handed to a worker at a time.
+    """
+    texts = list(texts)
+    cache = _CONVERSION_CACHE
+    known: dict[str, str] = {}
+    missing: list[str] = []
+    for text in dict.fromkeys(texts):
+        converted = cache.get((text, normalize, force)) if cache is not None else None
+        if converted is None:
+            missing.append(text)
+        else:
+            known[text] = converted
+    results = map_unique(
+        partial(_convert_text, normalize=normalize, force=force),
+        missing,
+        workers=workers,
+        chunksize=chunksize,
+        preload=(__name__,),
+    )
+    for text, converted in zip(missing, results):
+        known[text] = converted
+        if cache is not None and text:
+            cache.put((text, normalize, force), converted, len(text) + len(converted))
+    return [known[text] for text in texts]
+
+
+def zg_to_unicode_stream(
+    chunks: Iterable[str],
+    *,
+    normalize: bool = True,
+    force: bool = False,
+    buffer_chars: int = STREAM_BUFFER_CHARS,
+    detect_chars: int = STREAM_DETECT_CHARS,
+    stats: Optional[RuleStats] = None,
+    memoize: bool = False,
+) -> Iterator[str]:
+    """
+    Convert text arriving in chunks, yielding converted pieces as they become final.
+
+    Pending text is only cut where the rule engine can prove no rule match
+    spans the cut (line breaks and other characters no context rule reads),
+    so clusters split across chunk boundaries are carried over and the joined
+    output equals ``zg_to_unicode("".join(chunks))``.  A stretch longer than
+    ``buffer_chars`` without such a cut point is held whole.
+
+    Args:
+        chunks: Input text pieces, split anywhere.
+        normalize: Whether to apply Unicode normalization and basic reordering.
+        force: When False, the detector decides from the first ``detect_chars``
+            characters only; output matches whole-text conversion whenever
+            that verdict agrees with the verdict on the full text (always for
+            inputs shorter than ``detect_chars``).  For exact output on a
+            source that can be read twice, score it with
+            ``detect_encoding_chunks`` first and pass ``force=True``.
+        buffer_chars: Pending size at which the buffer is cut and converted.
+        detect_chars: Characters buffered for the detection verdict.
+        stats: Optional ``RuleStats`` accumulated over every converted piece.
+        memoize: Serve repeated syllable clusters from ``CLUSTER_CACHE``; see
+            ``zg_to_unicode``.
+    """
+    if buffer_chars <= 0:
+        raise ValueError("buffer_chars must be positive")
+    chunks = iter(chunks)
+    if not force:
+        head: list[str] = []
+        size = 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= detect_chars:
+                break
+        sample = "".join(head)
+        if not sample:
+            return
+        if detect_encoding(sample) != "zawgyi":
+            yield sample
+            yield from (chunk for chunk in chunks if chunk)
+            return
+        chunks = itertools.chain([sample], chunks)
+
+    def convert(piece: str) -> str:
+        converted = _apply_rules(piece, stats, memoize)
+        return normalize_unicode(converted) if normalize else converted
+
+    pending: list[str] = []
+    size = 0
+    threshold = buffer_chars
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending.append(chunk)
+        size += len(chunk)
+        if size < threshold:
+            continue
+        text = "".join(pending)
+        cut = _engine().split_point(text)
+        if cut is None:
+            # Nothing safe to cut at yet; look again once the buffer doubles.
+            pending = [text]
+            threshold = 2 * size
+            continue
+        yield convert(text[:cut])
+        rest = text[cut:]
+        pending = [rest] if rest else []
+        size = len(rest)
+        threshold = max(buffer_chars, 2 * size)
+    if pending:
+        yield convert("".join(pending))
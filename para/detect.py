@@ -3,15 +3,34 @@
 from __future__ import annotations
 
 import re
-from typing import Literal
+from collections import Counter
+from dataclasses import dataclass
+from functools import partial
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from typing import Iterable, Literal, Optional
+
+from para.batch import map_unique
 
 Encoding = Literal["zawgyi", "unicode", "unknown"]
+Sampling = Literal["head", "stratified"]
 
 _MYANMAR_RANGE = re.compile(r"[\u1000-\u109F]")
+_NON_MYANMAR = re.compile(r"[^\u1000-\u109F]")
+_MYANMAR_CHARS = "".join(chr(cp) for cp in range(0x1000, 0x10A0))
 
 # If scores are equal or differ by less than this margin, result is "unknown".
 SCORE_TIE_MARGIN = 0
 
+# Bounded detection scores the document in windows of about this many characters.
+DETECTION_WINDOW = 4096
+
+# Early exit never fires before the two scores together reach this value.
+EARLY_EXIT_MIN_SCORE = 12
+
+# How far a window edge may move to land just after a non-Myanmar character.
+_BOUNDARY_SLACK = 256
+
 # Patterns that strongly suggest Zawgyi encoding.
 _ZG_PATTERNS = [
     (re.compile(r"[\u105A\u1060-\u1097]"), 4),
@@ -34,6 +53,51 @@ _UNI_PATTERNS = [
 ]
 
 
+# Both pattern lists as one scanner that counts every pattern's matches
+# exactly as its own ``findall`` would, in a single pass.  A branch consumes
+# only the pattern's first character and looks ahead for the rest, except
+# where a pattern could otherwise overlap itself: a pair of U+103A, and
+# U+1039 followed by U+1039.  No other pattern starts on a character those
+# consume.  U+1039, a consonant or nothing, then U+1031 also matches
+# ``\u1039[\u1000-\u109F]``, so one branch carries both weights.  Rows:
+# (first character, rest, zawgyi weight, unicode weight).
+_SCANNER_BRANCHES = [
+    (r"[\u1000-\u1021]", r"(?=\u103C)", 0, 2),
+    (r"\u1004", r"(?=\u103A\u1039)", 0, 3),
+    (r"\u1031", r"(?=[\u1000-\u1021])", 0, 3),
+    (r"\u1031", r"(?=[\u103B-\u103E])", 3, 0),
+    (r"\u1031", r"(?=\u108A)", 3, 0),
+    # The second U+1039 of a pair may start ``\u1039[\u1000-\u1021]?\u1031``.
+    (r"\u1039", r"\u1039(?=[\u1000-\u1021]?\u1031)", 2 + 3, 0),
+    (r"\u1039", r"\u1039", 2, 0),
+    (r"\u1039", r"(?=[\u1000-\u1021]?\u1031)", 3 + 2, 0),
+    (r"\u1039", r"(?=[\u1000-\u109F])", 2, 0),
+    (r"\u103A", r"\u103A", 2, 0),
+    (r"[\u105A\u1060-\u1097]", "", 4, 0),
+    (r"\u102B", r"(?=\u103A)", 0, 2),
+    (r"\u103B", r"(?=[\u103C\u103D])", 0, 2),
+    (r"\u103C", r"(?=\u103E)", 0, 2),
+    (r"\u1037", r"(?=\u103A)", 0, 2),
+]
+
+
+def _scanner(branches: list[tuple[str, str, int, int]]) -> re.Pattern[str]:
+    # Leading with a character class lets sre skip to candidates; branches
+    # sharing a first character sit behind one lookbehind.  Group ``i`` is
+    # row ``i - 1``.
+    leads = "".join(lead.strip("[]") for lead, _, _, _ in branches)
+    groups = []
+    for lead, rows in groupby(branches, key=itemgetter(0)):
+        alternatives = "|".join(f"({rest})" for _, rest, _, _ in rows)
+        groups.append(f"(?<={lead})(?:{alternatives})")
+    return re.compile(f"[{leads}](?:{'|'.join(groups)})")
+
+
+_SCANNER = _scanner(_SCANNER_BRANCHES)
+_BRANCH_WEIGHTS = [(0, 0)] + [(zg, uni) for _, _, zg, uni in _SCANNER_BRANCHES]
+_BRANCH = attrgetter("lastindex")
+
+
 def _score(text: str, patterns: list[tuple[re.Pattern[str], int]]) -> int:
     score = 0
     for pattern, weight in patterns:
@@ -43,21 +107,270 @@ def _score(text: str, patterns: list[tuple[re.Pattern[str], int]]) -> int:
     return score
 
 
-def detect_encoding(text: str) -> Encoding:
-    """Return "zawgyi", "unicode", or "unknown" based on heuristic scoring."""
+def _scores(text: str) -> tuple[int, int]:
+    """Return ``(zawgyi_score, unicode_score)`` from one scan of ``_SCANNER``.
+
+    Equal to ``_score`` over each pattern list.
+    """
+    zg_score = uni_score = 0
+    for branch, count in Counter(map(_BRANCH, _SCANNER.finditer(text))).items():
+        zg_weight, uni_weight = _BRANCH_WEIGHTS[branch]
+        zg_score += count * zg_weight
+        uni_score += count * uni_weight
+    return zg_score, uni_score
+
+
+def _verdict(zg_score: int, uni_score: int) -> Encoding:
+    if abs(zg_score - uni_score) <= SCORE_TIE_MARGIN:
+        return "unknown"
+    return "zawgyi" if zg_score > uni_score else "unicode"
+
+
+@dataclass(frozen=True)
+class DetectionReport:
+    """Verdict plus the evidence behind it."""
+
+    encoding: Encoding
+    zawgyi_score: int
+    unicode_score: int
+    scanned_chars: int
+    total_chars: int
+    windows: int
+    early_exit: bool
+
+    @property
+    def coverage(self) -> float:
+        """Fraction of the input that was scored."""
+        return self.scanned_chars / self.total_chars if self.total_chars else 1.0
+
+    @property
+    def margin(self) -> float:
+        """Score difference as a fraction of the combined score (0 when tied)."""
+        total = self.zawgyi_score + self.unicode_score
+        return abs(self.zawgyi_score - self.unicode_score) / total if total else 0.0
+
+
+def _boundary(text: str, pos: int) -> int:
+    """Return a cut position at or after ``pos`` that does not split a Myanmar run.
+
+    No weighted pattern spans a non-Myanmar character, so scoring windows
+    cut this way add up to the score of the whole range.
+    """
+    if pos <= 0:
+        return 0
+    if pos >= len(text):
+        return len(text)
+    m = _NON_MYANMAR.search(text, pos - 1, pos + _BOUNDARY_SLACK)
+    return m.end() if m else pos
+
+
+def _windows(text: str, max_chars: Optional[int], sampling: Sampling) -> list[tuple[int, int]]:
+    """Return the ``(start, end)`` ranges to score, in order."""
+    size = len(text)
+    if max_chars is not None and max_chars < size and sampling == "stratified":
+        # One window at the start of each of ``count`` equally sized strata.
+        count = -(-max_chars // DETECTION_WINDOW)
+        width = max_chars // count
+        stride = size // count
+        ranges = []
+        scored = end = 0
+        for index in range(count):
+            # A window's end can move past the next stratum's start; windows
+            # never overlap, and together stay within ``max_chars``.
+            start = max(_boundary(text, index * stride), end)
+            end = min(_boundary(text, start + width), start + max_chars - scored)
+            if start < end:
+                ranges.append((start, end))
+                scored += end - start
+            if scored >= max_chars:
+                break
+        return ranges
+
+    limit = size if max_chars is None else _boundary(text, max_chars)
+    ranges = []
+    start = 0
+    while start < limit:
+        end = min(_boundary(text, start + DETECTION_WINDOW), limit)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def detect_encoding_report(
+    text: str,
+    *,
+    max_chars: Optional[int] = None,
+    sampling: Sampling = "head",
+    confidence: Optional[float] = None,
+) -> DetectionReport:
+    """Detect the encoding and report the scores and how much text was read.
+
+    Args:
+        text: Input text.
+        max_chars: Score at most about this many characters (window edges move
+            up to a few hundred characters to avoid splitting a syllable).
+            ``None`` scores everything.
+        sampling: ``"head"`` scores the start of the text; ``"stratified"``
+            spreads the budget over equally spaced windows across the text.
+        confidence: When set, stop as soon as the score margin (see
+            ``DetectionReport.margin``) reaches this fraction and at least
+            ``EARLY_EXIT_MIN_SCORE`` points have been seen.
+    """
+    if max_chars is not None and max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    if sampling not in ("head", "stratified"):
+        raise ValueError(f"unknown sampling mode: {sampling!r}")
+    if confidence is not None and not 0 < confidence <= 1:
+        raise ValueError("confidence must be in (0, 1]")
+
+    total = len(text)
+    if max_chars is None and confidence is None:
+        zg_score, uni_score = _scores(text) if _MYANMAR_RANGE.search(text) else (0, 0)
+        return DetectionReport(
+            encoding=_verdict(zg_score, uni_score) if text else "unknown",
+            zawgyi_score=zg_score,
+            unicode_score=uni_score,
+            scanned_chars=total,
+            total_chars=total,
+            windows=1 if text else 0,
+            early_exit=False,
+        )
+
+    zg_score = uni_score = scanned = windows = 0
+    early_exit = False
+    ranges = _windows(text, max_chars, sampling)
+    for start, end in ranges:
+        window = text[start:end]
+        if _MYANMAR_RANGE.search(window):
+            window_zg, window_uni = _scores(window)
+            zg_score += window_zg
+            uni_score += window_uni
+        scanned += end - start
+        windows += 1
+        evidence = zg_score + uni_score
+        if (
+            confidence is not None
+            and evidence >= EARLY_EXIT_MIN_SCORE
+            and abs(zg_score - uni_score) / evidence >= confidence
+        ):
+            early_exit = windows < len(ranges)
+            break
+
+    return DetectionReport(
+        encoding=_verdict(zg_score, uni_score),
+        zawgyi_score=zg_score,
+        unicode_score=uni_score,
+        scanned_chars=scanned,
+        total_chars=total,
+        windows=windows,
+        early_exit=early_exit,
+    )
+
+
+def detect_encoding(
+    text: str,
+    *,
+    max_chars: Optional[int] = None,
+    sampling: Sampling = "head",
+    confidence: Optional[float] = None,
+) -> Encoding:
+    """Return "zawgyi", "unicode", or "unknown" based on heuristic scoring.
+
+    The keyword options bound the cost on large inputs; see
+    ``detect_encoding_report``.  With the defaults the whole text is scored.
+    """
+    if max_chars is not None or confidence is not None:
+        return detect_encoding_report(
+            text, max_chars=max_chars, sampling=sampling, confidence=confidence
+        ).encoding
+
     if not text:
         return "unknown"
 
     if not _MYANMAR_RANGE.search(text):
         return "unknown"
 
-    zg_score = _score(text, _ZG_PATTERNS)
-    uni_score = _score(text, _UNI_PATTERNS)
+    zg_score, uni_score = _scores(text)
+    return _verdict(zg_score, uni_score)
 
-    if abs(zg_score - uni_score) <= SCORE_TIE_MARGIN:
-        return "unknown"
 
-    return "zawgyi" if zg_score > uni_score else "unicode"
+def detect_encoding_fragments(
+    fragments: Iterable[str],
+    *,
+    max_chars: Optional[int] = None,
+) -> Encoding:
+    """Return one verdict for a document made of many short texts (cells, runs, nodes).
+
+    Scores are summed over the fragments, so a document whose fragments are
+    each too short to decide on still gets a verdict, and every fragment can
+    share it.  No weighted pattern spans two fragments.
+
+    Args:
+        fragments: The document's text pieces, in document order; read lazily.
+        max_chars: Stop after the fragment that brings the total to this many
+            characters.  ``None`` scores every fragment.
+    """
+    if max_chars is not None and max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    zg_score = uni_score = size = 0
+    for fragment in fragments:
+        if _MYANMAR_RANGE.search(fragment):
+            fragment_zg, fragment_uni = _scores(fragment)
+            zg_score += fragment_zg
+            uni_score += fragment_uni
+        size += len(fragment)
+        if max_chars is not None and size >= max_chars:
+            break
+    return _verdict(zg_score, uni_score)
+
+
+def detect_encoding_chunks(chunks: Iterable[str]) -> Encoding:
+    """Return the verdict ``detect_encoding`` gives the text ``chunks`` join to.
+
+    Chunks may be split anywhere, as read from a file.  Each is scored up to
+    its last non-Myanmar character and the Myanmar run after it is carried
+    into the next (see ``_boundary``), so the summed scores are the whole
+    text's while about one chunk is held at a time.
+    """
+    zg_score = uni_score = 0
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk if carry else chunk
+        cut = len(text.rstrip(_MYANMAR_CHARS))
+        if cut and _MYANMAR_RANGE.search(text, 0, cut):
+            chunk_zg, chunk_uni = _scores(text[:cut])
+            zg_score += chunk_zg
+            uni_score += chunk_uni
+        carry = text[cut:]
+    if carry:
+        carry_zg, carry_uni = _scores(carry)
+        zg_score += carry_zg
+        uni_score += carry_uni
+    return _verdict(zg_score, uni_score)
+
+
+def detect_encoding_many(
+    texts: Iterable[str],
+    *,
+    max_chars: Optional[int] = None,
+    sampling: Sampling = "head",
+    confidence: Optional[float] = None,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> list[Encoding]:
+    """Run ``detect_encoding`` on many texts and return the verdicts in input order.
+
+    Each distinct text is scored once; large batches are spread over a
+    process pool (``workers=None`` uses every CPU, ``1`` runs serially).
+    The remaining options are passed to ``detect_encoding``.
+    """
+    return map_unique(
+        partial(detect_encoding, max_chars=max_chars, sampling=sampling, confidence=confidence),
+        texts,
+        workers=workers,
+        chunksize=chunksize,
+        preload=(__name__,),
+    )
 
 
 def is_zawgyi(text: str) -> bool:
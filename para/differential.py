@@ -0,0 +1,314 @@
+"""Differential testing of fast rule engines against the rule-by-rule reference.
+
+The rules mean what applying them one ``re.sub`` at a time, in order,
+produces; ``reference_engine`` is exactly that loop.  A faster engine
+(``para.engine.RuleEngine`` and its memoized cluster path, or any other
+``str -> str`` function) is only correct if it agrees with the reference on
+every input.  ``run_differential`` feeds both the same inputs:
+
+* random sequences of Myanmar-block codepoints mixed with the spaces, line
+  breaks, slashes and ZWSP some rules read;
+* random text built from Zawgyi syllables (prefix vowel, medial ra,
+  consonant, stacked consonant, medials, vowels, finals);
+* fixtures: Burmese string literals from test modules, or lines of text
+  files (``load_fixtures``);
+* a few longer synthetic corpora from ``para.bench``, long enough for the
+  span-skipping path.
+
+Every disagreement is shrunk (``shrink``) to an input from which no single
+character can be removed without the engines agreeing.  ``throughput``
+reports each engine's speedup over the reference per corpus class.
+"""
+
+from __future__ import annotations
+
+import ast
+import random
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
+
+from para.bench import CORPUS_KINDS, generate_corpus
+from para.cache import LRUCache
+from para.convert import _compile_rules, active_rule_set
+from para.engine import apply_sequential, RuleEngine
+from para.rulesets import compile_rule_set, RuleSet
+from para.syllables import zawgyi_syllables
+
+Engine = Callable[[str], str]
+
+# Characters outside the Myanmar block that rules read as context.
+_CONTEXT = (" ", "\n", "/", "\u200b", "a", "1")
+
+_MYANMAR = tuple(chr(cp) for cp in range(0x1000, 0x10A0))
+
+# Zawgyi syllable parts, in visual (typed) order.
+_PREFIX_VOWELS = ("ေ",)
+_MEDIAL_RA = ("ျ", "ၾ", "ၿ", "ႀ", "ႁ", "ႂ", "ႃ", "ႄ")
+_CONSONANTS = tuple(chr(cp) for cp in range(0x1000, 0x1022)) + (
+    "ဥ", "ဧ", "၀", "၇", "ၪ", "ၫ", "ႏ", "႐",
+)
+_STACKED = tuple(chr(cp) for cp in [*range(0x1060, 0x106a), *range(0x106c, 0x107e)]) + ("ၤ", "္က")
+_MEDIALS = ("ြ", "ွ", "ႇ", "ႈ", "ႉ", "ႊ")
+_VOWELS = (
+    "ါ", "ာ", "ိ", "ီ", "ု", "ူ", "ဲ", "ဳ", "ဴ",
+    "ႋ", "ႌ", "ႍ", "ႎ",
+)
+_FINALS = ("ံ", "့", "း", "္", "႔", "႕", "္း", "့္")
+_BREAKS = ("", "", "", " ", "၊", "။", "\n", "\u200b", " / ")
+
+# Characters per corpus case; above ``para.engine.SPAN_MIN_TEXT``.
+_CORPUS_CHARS = 6000
+
+
+def reference_engine(rule_set: Optional[RuleSet] = None) -> Engine:
+    """Return the reference: one ``re.sub`` per rule of ``rule_set`` (default: the active one), in order."""
+    rule_set = active_rule_set() if rule_set is None else rule_set
+    return partial(apply_sequential, _compile_rules(rule_set.rules))
+
+
+def engine_paths(engine: RuleEngine) -> dict[str, Engine]:
+    """Return the engine's optimized paths by name, each as a ``str -> str`` function.
+
+    ``"apply"`` is ``RuleEngine.apply``; ``"clusters"`` converts the text's
+    Zawgyi syllables through ``apply_clusters`` with one cache shared by
+    every call, as ``zg_to_unicode(memoize=True)`` does.
+    """
+    cache: LRUCache[str] = LRUCache(1 << 12, 1 << 16)
+
+    def clusters(text: str) -> str:
+        return engine.apply_clusters(zawgyi_syllables(text), cache)
+
+    return {"apply": engine.apply, "clusters": clusters}
+
+
+def random_codepoints(rng: random.Random, max_length: int = 16) -> str:
+    """Return up to ``max_length`` random Myanmar-block and context characters."""
+    return "".join(
+        rng.choice(_CONTEXT) if rng.random() < 0.1 else rng.choice(_MYANMAR)
+        for _ in range(rng.randint(0, max_length))
+    )
+
+
+def _maybe(rng: random.Random, choices: Sequence[str], chance: float) -> str:
+    return rng.choice(choices) if rng.random() < chance else ""
+
+
+def random_syllables(rng: random.Random, max_syllables: int = 6) -> str:
+    """Return text of up to ``max_syllables`` random Zawgyi syllables with breaks between them."""
+    pieces = []
+    for _ in range(rng.randint(1, max_syllables)):
+        vowels = "".join(rng.choice(_VOWELS) for _ in range(rng.choice((0, 1, 1, 2))))
+        pieces.append(
+            _maybe(rng, _PREFIX_VOWELS, 0.25)
+            + _maybe(rng, _MEDIAL_RA, 0.2)
+            + rng.choice(_CONSONANTS)
+            + _maybe(rng, _STACKED, 0.15)
+            + _maybe(rng, _MEDIALS, 0.25)
+            + vowels
+            + _maybe(rng, _FINALS, 0.4)
+            + rng.choice(_BREAKS)
+        )
+    return "".join(pieces)
+
+
+def _strings(tree: ast.AST) -> Iterator[str]:
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            yield node.value
+
+
+def load_fixtures(paths: Iterable[Union[str, Path]]) -> list[str]:
+    """Collect Burmese inputs from files and directories.
+
+    Python modules contribute every string literal with a Myanmar-block
+    character (test fixtures); other files contribute each such line.
+    Directories are searched recursively for Python modules.  Duplicates
+    are dropped.
+    """
+    found: dict[str, None] = {}
+    for path in map(Path, paths):
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            if file.suffix == ".py":
+                texts: Iterable[str] = _strings(ast.parse(file.read_text(encoding="utf-8"), str(file)))
+            elif path.is_dir():
+                continue
+            else:
+                texts = file.read_text(encoding="utf-8").splitlines()
+            for text in texts:
+                if any("က" <= ch <= "႟" for ch in text):
+                    found[text] = None
+    return list(found)
+
+
+def _disagrees(fast: Engine, reference: Engine, text: str) -> bool:
+    try:
+        return fast(text) != reference(text)
+    except Exception:  # a crash is a disagreement too
+        return True
+
+
+def shrink(text: str, fails: Callable[[str], bool]) -> str:
+    """Return a part of ``text`` that still ``fails``, from which no single character can be removed.
+
+    Delta debugging: drop ever smaller chunks while the failure persists.
+    ``fails(text)`` must be true.
+    """
+    parts = 2
+    while text:
+        size = -(-len(text) // parts)
+        for start in range(0, len(text), size):
+            candidate = text[:start] + text[start + size:]
+            if fails(candidate):
+                text = candidate
+                parts = max(parts - 1, 2)
+                break
+        else:
+            if size == 1:
+                break
+            parts = min(parts * 2, len(text))
+    return text
+
+
+@dataclass(frozen=True)
+class Mismatch:
+    """An input on which a fast engine disagrees with the reference.
+
+    Args:
+        path: Name of the disagreeing engine path.
+        source: Generator that produced the input.
+        original: The input as generated.
+        text: ``original`` shrunk to a minimal reproducing input.
+        expected: Reference output for ``text``.
+        actual: Engine output for ``text``, or the exception it raised.
+    """
+
+    path: str
+    source: str
+    original: str
+    text: str
+    expected: str
+    actual: str
+
+
+@dataclass
+class DifferentialReport:
+    """Inputs checked per source and every mismatch found."""
+
+    cases: dict[str, int] = field(default_factory=dict)
+    mismatches: list[Mismatch] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+
+def _cases(
+    rng: random.Random, count: int, fixtures: Sequence[str]
+) -> Iterator[tuple[str, str]]:
+    for _ in range(count):
+        yield "codepoints", random_codepoints(rng)
+    for _ in range(count):
+        yield "syllables", random_syllables(rng)
+    for text in fixtures:
+        yield "fixtures", text
+    for kind in CORPUS_KINDS:
+        yield "corpora", generate_corpus(kind, _CORPUS_CHARS, seed=rng.randrange(1 << 16))
+
+
+def run_differential(
+    paths: Optional[dict[str, Engine]] = None,
+    reference: Optional[Engine] = None,
+    *,
+    cases: int = 2000,
+    seed: int = 0,
+    fixtures: Sequence[str] = (),
+    max_mismatches: int = 10,
+) -> DifferentialReport:
+    """Check fast engine paths against the reference on generated and fixture inputs.
+
+    Args:
+        paths: Engines to check, by name; defaults to ``engine_paths`` of the
+            active rule set's compiled engine.
+        reference: Defaults to ``reference_engine()``.
+        cases: Random inputs per generator (codepoints and syllables).
+        seed: Seed for the generators; the same seed checks the same inputs.
+        fixtures: Extra inputs, such as ``load_fixtures(["tests"])``.
+        max_mismatches: Stop after this many mismatches (each is shrunk,
+            which takes many engine runs).
+    """
+    if paths is None:
+        paths = engine_paths(compile_rule_set(active_rule_set()))
+    reference = reference_engine() if reference is None else reference
+    report = DifferentialReport()
+    for source, text in _cases(random.Random(seed), cases, fixtures):
+        report.cases[source] = report.cases.get(source, 0) + 1
+        expected = reference(text)
+        for name, fast in paths.items():
+            try:
+                agrees = fast(text) == expected
+            except Exception:
+                agrees = False
+            if agrees:
+                continue
+            fails = partial(_disagrees, fast, reference)
+            small = shrink(text, fails)
+            try:
+                actual = fast(small)
+            except Exception as exc:
+                actual = f"{type(exc).__name__}: {exc}"
+            report.mismatches.append(Mismatch(name, source, text, small, reference(small), actual))
+            if len(report.mismatches) >= max_mismatches:
+                return report
+    return report
+
+
+@dataclass(frozen=True)
+class Speedup:
+    """Fastest-run timings of one engine path and the reference on one corpus."""
+
+    path: str
+    corpus: str
+    chars: int
+    reference_seconds: float
+    seconds: float
+
+    @property
+    def speedup(self) -> float:
+        return self.reference_seconds / self.seconds if self.seconds else float("inf")
+
+
+def _best(engine: Engine, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def throughput(
+    paths: Optional[dict[str, Engine]] = None,
+    reference: Optional[Engine] = None,
+    *,
+    chars: int = 100_000,
+    repeat: int = 3,
+    seed: int = 0,
+) -> list[Speedup]:
+    """Time each path and the reference on every ``para.bench`` corpus class.
+
+    Only the rules are timed: no detection or normalization.
+    """
+    if paths is None:
+        paths = engine_paths(compile_rule_set(active_rule_set()))
+    reference = reference_engine() if reference is None else reference
+    results = []
+    for kind in CORPUS_KINDS:
+        text = generate_corpus(kind, chars, seed)
+        base = _best(reference, text, repeat)
+        for name, fast in paths.items():
+            results.append(Speedup(name, kind, len(text), base, _best(fast, text, repeat)))
+    return results
@@ -0,0 +1,1246 @@
+"""Compiled execution engine for ordered regex rule lists.
+
+The converter's rules are written as an ordered list of ``(pattern,
+replacement)`` tuples and, semantically, are applied one ``re.sub`` at a
+time.  This module compiles such a list into a shorter sequence of steps
+that produce byte-identical output:
+
+* runs of consecutive context-free single-codepoint rules are composed into
+  one ``str.translate`` table;
+* context-sensitive rules each keep their own ``re.sub``.  An alternation of
+  independent rules would scan once, but it loses sre's literal and charset
+  prefix search and adds a Python callback per match; on the built-in rules
+  it was two to ten times slower than the separate passes.
+
+The analysis reads patterns through the private ``re._parser`` module, whose
+shapes change between CPython releases.  A rule it cannot analyse (or every
+rule, without the module) becomes a plain step with no trigger set, which
+also turns off span skipping and cluster memoization: the engine then
+applies the rules one ``re.sub`` at a time.
+
+Each rule also carries a trigger set: codepoints of which at least one must
+be present for the rule to match at all.  ``RuleEngine.apply`` computes the
+input's codepoint set once, skips every step whose trigger set it misses, and
+adds whatever a step inserts so later rules still see a sound superset.
+
+On long inputs the engine also locates the spans any rule could touch: runs
+around codepoints some rule requires, widened to the nearest characters no
+rule reads and past the reach of the context rules.  When those spans are a
+small part of the text (markup, JSON, source code), only they are converted,
+joined by a private-use separator into one string, and the untouched text in
+between is stitched back around the results.
+
+For repetitive text, ``apply_clusters`` converts a sequence of pieces (such
+as syllables) cluster by cluster.  A cut between two adjacent codepoints is
+*separable* when, following the codepoints that can sit on either side of it
+through the rules in order, no rule reads an adjacent pair that could
+straddle it.  Pieces are merged across every other boundary; each distinct
+cluster is converted once and repeats are served from a cache.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import operator
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Union
+
+try:  # Python 3.11+
+    from re import _constants as _sre
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover - Python < 3.11, or a release without them
+    try:
+        import sre_constants as _sre
+        import sre_parse as _sre_parse
+    except ImportError:
+        _sre = _sre_parse = None
+
+# Character ranges wider than this are treated as "may read anything".
+_MAX_RANGE = 0x400
+
+_ALLOWED_FLAGS = re.UNICODE
+
+
+def _read_set(items) -> Optional[set[str]]:
+    """Return every codepoint a parsed pattern can consume or look at.
+
+    ``None`` means the pattern may depend on arbitrary characters (negated
+    classes, ``.``, categories, word boundaries, inline flags, ...).
+    """
+    chars: set[str] = set()
+    for op, av in items:
+        if op is _sre.LITERAL:
+            chars.add(chr(av))
+        elif op is _sre.IN:
+            for sub_op, sub_av in av:
+                if sub_op is _sre.LITERAL:
+                    chars.add(chr(sub_av))
+                elif sub_op is _sre.RANGE and sub_av[1] - sub_av[0] <= _MAX_RANGE:
+                    chars.update(chr(cp) for cp in range(sub_av[0], sub_av[1] + 1))
+                else:
+                    return None
+        elif op is _sre.SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            if add_flags or del_flags:
+                return None
+            sub_chars = _read_set(sub)
+            if sub_chars is None:
+                return None
+            chars |= sub_chars
+        elif op is _sre.BRANCH:
+            for branch in av[1]:
+                sub_chars = _read_set(branch)
+                if sub_chars is None:
+                    return None
+                chars |= sub_chars
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+            sub_chars = _read_set(av[2])
+            if sub_chars is None:
+                return None
+            chars |= sub_chars
+        elif op in (_sre.ASSERT, _sre.ASSERT_NOT):
+            sub_chars = _read_set(av[1])
+            if sub_chars is None:
+                return None
+            chars |= sub_chars
+        elif op is _sre.AT:
+            if av in (_sre.AT_BEGINNING, _sre.AT_BEGINNING_STRING, _sre.AT_END_STRING):
+                continue
+            if av is _sre.AT_END:
+                # ``$`` also matches just before a trailing newline.
+                chars.add("\n")
+                continue
+            return None
+        elif op is _sre.GROUPREF:
+            continue
+        else:
+            return None
+    return chars
+
+
+def _single_char_set(items) -> Optional[frozenset[str]]:
+    """Return the codepoints matched when a pattern is exactly one context-free character."""
+    if len(items) != 1:
+        return None
+    op, av = items[0]
+    if op is _sre.LITERAL:
+        return frozenset(chr(av))
+    if op is _sre.IN:
+        if any(sub_op not in (_sre.LITERAL, _sre.RANGE) for sub_op, _ in av):
+            return None
+        chars = _read_set(items)
+        return frozenset(chars) if chars else None
+    if op is _sre.SUBPATTERN:
+        _group, add_flags, del_flags, sub = av
+        if add_flags or del_flags:
+            return None
+        return _single_char_set(sub)
+    if op is _sre.BRANCH:
+        chars: set[str] = set()
+        for branch in av[1]:
+            sub_chars = _single_char_set(branch)
+            if sub_chars is None:
+                return None
+            chars |= sub_chars
+        return frozenset(chars)
+    return None
+
+
+def _mandatory_sets(items) -> list[frozenset[str]]:
+    """Return one codepoint set per mandatory element; each must be hit by a match."""
+    sets: list[frozenset[str]] = []
+    for op, av in items:
+        candidate: Optional[frozenset[str]] = None
+        if op is _sre.LITERAL:
+            candidate = frozenset(chr(av))
+        elif op is _sre.IN:
+            chars = _read_set([(op, av)])
+            candidate = frozenset(chars) if chars else None
+        elif op is _sre.SUBPATTERN:
+            if not (av[1] or av[2]):
+                candidate = _trigger_set(av[3])
+        elif op is _sre.BRANCH:
+            union: set[str] = set()
+            for branch in av[1]:
+                branch_set = _trigger_set(branch)
+                if branch_set is None:
+                    union = set()
+                    break
+                union |= branch_set
+            candidate = frozenset(union) or None
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+            if av[0] > 0:
+                candidate = _trigger_set(av[2])
+        elif op is _sre.ASSERT:
+            candidate = _trigger_set(av[1])
+        if candidate is not None:
+            sets.append(candidate)
+    return sets
+
+
+def _trigger_set(items) -> Optional[frozenset[str]]:
+    """Return codepoints of which at least one must occur for the pattern to match.
+
+    Every mandatory element of a sequence yields a candidate set; the smallest
+    one is kept.  ``None`` means no such set could be derived.
+    """
+    sets = _mandatory_sets(items)
+    return min(sets, key=len) if sets else None
+
+
+def _core_set(items) -> Optional[frozenset[str]]:
+    """Like ``_trigger_set``, but prefer sets without ASCII.
+
+    Markup, numbers and Latin text are ASCII, so a rule keyed on a non-ASCII
+    codepoint can be ruled out for most of such a document.
+    """
+    sets = _mandatory_sets(items)
+    if not sets:
+        return None
+    return min(sets, key=lambda chars: (sum(ch < "\x80" for ch in chars), len(chars)))
+
+
+def _reach(items) -> Optional[int]:
+    """Return an upper bound on the characters a match plus its lookarounds can span.
+
+    ``None`` means the span is unbounded (open repetition, backreference).
+    """
+    total = 0
+    for op, av in items:
+        if op in (_sre.LITERAL, _sre.NOT_LITERAL, _sre.IN, _sre.ANY):
+            width: Optional[int] = 1
+        elif op is _sre.SUBPATTERN:
+            width = _reach(av[3])
+        elif op is _sre.BRANCH:
+            widths = [_reach(branch) for branch in av[1]]
+            width = None if None in widths else max(widths)
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+            sub = _reach(av[2])
+            width = None if sub is None or av[1] == _sre.MAXREPEAT else av[1] * sub
+        elif op in (_sre.ASSERT, _sre.ASSERT_NOT):
+            width = _reach(av[1])
+        elif op is _sre.AT:
+            # ``$`` may look at a trailing newline.
+            width = 1 if av is _sre.AT_END else 0
+        else:
+            width = None
+        if width is None:
+            return None
+        total += width
+    return total
+
+
+def _keeps_context(pattern: str, replacement: str, read: frozenset[str]) -> bool:
+    """True when a rule can neither drop nor reorder characters outside ``read``.
+
+    Outside capture groups the pattern may only consume codepoints from
+    ``read``; the replacement must emit every group once, in order.
+    """
+    groups: list[int] = []
+    for op, av in _sre_parse.parse(pattern):
+        if op is _sre.SUBPATTERN and av[0] is not None:
+            groups.append(av[0])
+            continue
+        if op in (_sre.ASSERT, _sre.ASSERT_NOT, _sre.AT):
+            continue
+        chars = _read_set([(op, av)])
+        if chars is None or not chars <= read:
+            return False
+    pieces = _parse_template(replacement, "g", "g")
+    if pieces is None:
+        return False
+    refs = [piece[0] for piece in pieces if isinstance(piece, tuple)]
+    return refs == [f"g{group}" for group in groups]
+
+
+def _anchored(items) -> bool:
+    """True when the pattern contains a start or end anchor."""
+    for op, av in items:
+        if op is _sre.AT and av in (
+            _sre.AT_BEGINNING, _sre.AT_BEGINNING_STRING, _sre.AT_END, _sre.AT_END_STRING,
+        ):
+            return True
+        if op is _sre.SUBPATTERN and _anchored(av[3]):
+            return True
+        if op is _sre.BRANCH and any(_anchored(branch) for branch in av[1]):
+            return True
+        if op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT) and _anchored(av[2]):
+            return True
+        if op in (_sre.ASSERT, _sre.ASSERT_NOT) and _anchored(av[1]):
+            return True
+    return False
+
+
+# Stand-ins for the start and end of the text in adjacency pairs; longer
+# than one character, so they never equal a real codepoint.
+_BOS = "<bos>"
+_EOS = "<eos>"
+
+
+@dataclass(frozen=True)
+class _Chars:
+    """A set of codepoints, or with ``negated`` every codepoint except ``chars``."""
+
+    chars: frozenset[str]
+    negated: bool = False
+
+    def meets(self, other: Iterable[str]) -> bool:
+        if self.negated:
+            return any(len(ch) == 1 and ch not in self.chars for ch in other)
+        return not self.chars.isdisjoint(other)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.negated or self.chars)
+
+    def __or__(self, other: "_Chars") -> "_Chars":
+        if self.negated and other.negated:
+            return _Chars(self.chars & other.chars, True)
+        if self.negated:
+            return _Chars(self.chars - other.chars, True)
+        if other.negated:
+            return _Chars(other.chars - self.chars, True)
+        return _Chars(self.chars | other.chars)
+
+
+_NO_CHARS = _Chars(frozenset())
+
+
+@dataclass(frozen=True)
+class _Shape:
+    """First and last codepoints of a (sub)pattern's matches and every adjacent pair it reads."""
+
+    first: _Chars
+    last: _Chars
+    nullable: bool
+    pairs: tuple[tuple[_Chars, _Chars], ...]
+
+
+def _class_chars(op, av) -> Optional[_Chars]:
+    if op is _sre.LITERAL:
+        return _Chars(frozenset(chr(av)))
+    if op is _sre.NOT_LITERAL:
+        return _Chars(frozenset(chr(av)), True)
+    if op is _sre.ANY:
+        return _Chars(frozenset("\n"), True)
+    if op is _sre.IN:
+        negated = bool(av) and av[0][0] is _sre.NEGATE
+        chars = _read_set([(op, av[1:] if negated else av)])
+        return None if chars is None else _Chars(frozenset(chars), negated)
+    return None
+
+
+def _shape(items, groups: dict[int, _Shape]) -> Optional[_Shape]:
+    """Return the ``_Shape`` of a parsed pattern, recording capture groups in ``groups``.
+
+    Lookaheads contribute the pairs they read without consuming anything;
+    ``^`` and ``$`` act as the pseudo-codepoints ``_BOS`` and ``_EOS``.
+    ``None`` means the pattern uses syntax this analysis does not model
+    (lookbehind, word boundaries, categories, inline flags).
+    """
+    first = last = _NO_CHARS
+    nullable = True
+    pairs: list[tuple[_Chars, _Chars]] = []
+    for op, av in items:
+        chars = _class_chars(op, av)
+        if chars is not None:
+            part = _Shape(chars, chars, False, ())
+        elif op is _sre.AT:
+            if av in (_sre.AT_BEGINNING, _sre.AT_BEGINNING_STRING):
+                chars = _Chars(frozenset([_BOS]))
+            elif av in (_sre.AT_END, _sre.AT_END_STRING):
+                chars = _Chars(frozenset([_EOS]))
+            else:
+                return None
+            part = _Shape(chars, chars, False, ())
+        elif op is _sre.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            if add_flags or del_flags:
+                return None
+            part = _shape(sub, groups)
+            if part is None:
+                return None
+            if group is not None:
+                groups[group] = part
+        elif op is _sre.BRANCH:
+            branches = [_shape(branch, groups) for branch in av[1]]
+            if any(branch is None for branch in branches):
+                return None
+            part = _Shape(
+                first=_union_chars(branch.first for branch in branches),
+                last=_union_chars(branch.last for branch in branches),
+                nullable=any(branch.nullable for branch in branches),
+                pairs=tuple(pair for branch in branches for pair in branch.pairs),
+            )
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+            low, high, sub = av
+            inner = _shape(sub, groups)
+            if inner is None:
+                return None
+            loop = ((inner.last, inner.first),) if high > 1 else ()
+            part = _Shape(inner.first, inner.last, low == 0 or inner.nullable, inner.pairs + loop)
+        elif op is _sre.GROUPREF:
+            part = groups.get(av)
+            if part is None:
+                return None
+        elif op in (_sre.ASSERT, _sre.ASSERT_NOT):
+            direction, sub = av
+            if direction < 0:
+                return None
+            ahead = _shape(sub, groups)
+            if ahead is None:
+                return None
+            pairs.extend(ahead.pairs)
+            if not last.empty:
+                pairs.append((last, ahead.first))
+            continue
+        else:
+            return None
+        pairs.extend(part.pairs)
+        if not last.empty:
+            pairs.append((last, part.first))
+        if nullable:
+            first = first | part.first
+        last = last | part.last if part.nullable else part.last
+        nullable = nullable and part.nullable
+    return _Shape(first, last, nullable, tuple(pairs))
+
+
+def _union_chars(sets: Iterable[_Chars]) -> _Chars:
+    result = _NO_CHARS
+    for chars in sets:
+        result = result | chars
+    return result
+
+
+@dataclass(frozen=True)
+class _Adjacency:
+    """What a rule reads and writes at the edges of its matches."""
+
+    pairs: tuple[tuple[_Chars, _Chars], ...]
+    first: _Chars
+    last: _Chars
+    # Codepoints a substitution can put at the start or end of its output
+    # (empty when the edge character is copied through), or ``None`` when
+    # the output may be empty or begin or end with an arbitrary codepoint.
+    head: Optional[frozenset[str]]
+    tail: Optional[frozenset[str]]
+
+
+def _edge(pieces, groups: dict[str, _Shape], solid: set[str], kept: set[str], at_start: bool):
+    """Return the codepoints a template can start (or end) with; see ``_Adjacency``."""
+    chars: set[str] = set()
+    for piece in pieces:
+        if isinstance(piece, str):
+            if piece:
+                chars.add(piece[0] if at_start else piece[-1])
+                return frozenset(chars)
+            continue
+        name = piece[0]
+        if name in kept:
+            return frozenset(chars)
+        shape = groups.get(name)
+        if shape is None:
+            return None
+        edge = shape.first if at_start else shape.last
+        if edge.negated:
+            return None
+        chars |= edge.chars
+        if name in solid:
+            return frozenset(chars)
+    return None
+
+
+def _adjacency(items, replacement: str) -> Optional[_Adjacency]:
+    numbered: dict[int, _Shape] = {}
+    shape = _shape(items, numbered)
+    pieces = _parse_template(replacement, "g", "g0")
+    if shape is None or shape.nullable or pieces is None:
+        return None
+    groups = {f"g{number}": group for number, group in numbered.items()}
+    groups["g0"] = shape
+    # Groups that take part in every match.
+    solid = {"g0"} | {
+        f"g{av[0]}" for op, av in items
+        if op is _sre.SUBPATTERN and av[0] is not None and not numbered[av[0]].nullable
+    }
+    consumed = [(op, av) for op, av in items if op not in (_sre.ASSERT, _sre.ASSERT_NOT, _sre.AT)]
+
+    def kept(item) -> set[str]:
+        # A group holding the match's first (last) character copies it through.
+        op, av = item
+        if op is _sre.SUBPATTERN and f"g{av[0]}" in solid:
+            return {"g0", f"g{av[0]}"}
+        return {"g0"}
+
+    return _Adjacency(
+        pairs=shape.pairs,
+        first=shape.first,
+        last=shape.last,
+        head=_edge(pieces, groups, solid, kept(consumed[0]), True),
+        tail=_edge(list(reversed(pieces)), groups, solid, kept(consumed[-1]), False),
+    )
+
+
+_TEMPLATE_TOKEN = re.compile(r"\\(?:g<(\w+)>|([1-9][0-9]?)|(.))", re.DOTALL)
+
+_TEMPLATE_ESCAPES = {
+    "n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v", "a": "\a", "b": "\b", "\\": "\\",
+}
+
+
+def _parse_template(template: str, prefix: str, wrapper: str) -> Optional[list[Union[str, tuple[str]]]]:
+    """Split a replacement template into literal strings and ``(group_name,)`` pieces."""
+    pieces: list[Union[str, tuple[str]]] = []
+    pos = 0
+    for m in _TEMPLATE_TOKEN.finditer(template):
+        if m.start() > pos:
+            pieces.append(template[pos:m.start()])
+        named, numbered, escaped = m.groups()
+        if named is not None:
+            if named == "0":
+                pieces.append((wrapper,))
+            elif named.isdigit():
+                pieces.append((f"{prefix}{int(named)}",))
+            else:
+                return None
+        elif numbered is not None:
+            pieces.append((f"{prefix}{numbered}",))
+        elif escaped in _TEMPLATE_ESCAPES:
+            pieces.append(_TEMPLATE_ESCAPES[escaped])
+        else:
+            return None
+        pos = m.end()
+    if pos < len(template):
+        pieces.append(template[pos:])
+    return pieces
+
+
+@dataclass(frozen=True)
+class _Rule:
+    index: int
+    pattern: str
+    replacement: str
+    compiled: re.Pattern[str]
+    single: Optional[frozenset[str]]
+    reads: Optional[frozenset[str]]
+    min_width: int
+    trigger: Optional[frozenset[str]]
+    emits: Optional[frozenset[str]]
+    reach: Optional[int]
+    anchored: bool
+    core: Optional[frozenset[str]]
+    adjacency: Optional[_Adjacency]
+
+
+def _analyze(index: int, pattern: str, replacement: str) -> _Rule:
+    compiled = re.compile(pattern)
+    # Codepoints a substitution can introduce; backreferences only copy text
+    # that was already present.
+    if "\\" not in replacement:
+        emits: Optional[frozenset[str]] = frozenset(replacement)
+    else:
+        pieces = _parse_template(replacement, "g", "g0")
+        emits = None if pieces is None else frozenset(
+            "".join(piece for piece in pieces if isinstance(piece, str))
+        )
+    if _sre_parse is not None:
+        try:
+            return _analyze_parsed(index, compiled, replacement, emits)
+        except Exception:  # the private parser's output changed shape
+            pass
+    # Nothing is known about what the rule reads, so it runs as is, every time.
+    return _Rule(
+        index=index,
+        pattern=pattern,
+        replacement=replacement,
+        compiled=compiled,
+        single=None,
+        reads=None,
+        min_width=0,
+        trigger=None,
+        emits=emits,
+        reach=None,
+        anchored=False,
+        core=None,
+        adjacency=None,
+    )
+
+
+def _analyze_parsed(
+    index: int, compiled: re.Pattern[str], replacement: str, emits: Optional[frozenset[str]]
+) -> _Rule:
+    parsed = _sre_parse.parse(compiled.pattern)
+    items = list(parsed)
+    plain_flags = (compiled.flags & ~_ALLOWED_FLAGS) == 0
+    reads = _read_set(items) if plain_flags else None
+    single = _single_char_set(items) if plain_flags and "\\" not in replacement else None
+    return _Rule(
+        index=index,
+        pattern=compiled.pattern,
+        replacement=replacement,
+        compiled=compiled,
+        single=single,
+        reads=frozenset(reads) if reads is not None else None,
+        min_width=parsed.getwidth()[0],
+        trigger=_trigger_set(items) if plain_flags else None,
+        emits=emits,
+        reach=_reach(items),
+        anchored=_anchored(items),
+        core=_core_set(items) if plain_flags else None,
+        adjacency=_adjacency(items, replacement) if plain_flags else None,
+    )
+
+
+# CPython's ``str.translate`` performs a table lookup for every codepoint of
+# the input, hit or miss, while a single-character ``re.sub`` is a fast
+# substring search plus C-level replacement.  A table only pays for itself
+# once it replaces this many separate scans.
+TRANSLATE_MIN_RULES = 8
+
+# Sequence tables are roughly twice as fast as dicts for ``str.translate``;
+# codepoints past the end raise LookupError, which leaves them untouched.
+_MAX_SEQUENCE_TABLE = 0x10000
+
+# Up to this length ``set(text)`` is the cheapest way to collect codepoints;
+# beyond it, probing for each trigger codepoint with ``in`` is faster.
+_SMALL_TEXT = 256
+
+# Inputs at least this long are checked for spans the rules cannot touch,
+# which are then skipped when they make up enough of the text.
+SPAN_MIN_TEXT = 4096
+SPAN_MAX_COVERAGE = 0.75
+
+# Backward scans for barriers first look at this many preceding characters.
+_LOOKBEHIND = 64
+
+# Private-use codepoints tried, in order, as the separator between spans.
+_SEPARATORS = tuple(chr(cp) for cp in range(0xE000, 0xE010))
+
+
+@dataclass
+class RuleStats:
+    """Counts of rules executed and rules skipped by the trigger prefilter."""
+
+    applied: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class RuleTiming:
+    """What one rule did while profiled.
+
+    Args:
+        index: Position in the rule list.
+        pattern: The rule's pattern.
+        step: Kind of engine step the rule belongs to: ``"translate"``,
+            ``"translate (fused)"`` or ``"pattern"``.
+        runs: Passes in which the rule ran.
+        skipped: Passes the trigger prefilter skipped it in.
+        matches: Matches replaced.
+        chars_changed: Characters rewritten, counting the longer side of
+            each match whose replacement differs from it.
+        seconds: Time spent in the rule's ``re.sub``.
+    """
+
+    index: int
+    pattern: str
+    step: str
+    runs: int = 0
+    skipped: int = 0
+    matches: int = 0
+    chars_changed: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class RuleProfile(RuleStats):
+    """``RuleStats`` that also times each rule and counts its matches.
+
+    Pass one wherever a ``RuleStats`` is accepted.  The engine then runs the
+    rules of every step one at a time instead of through the fused translate
+    tables, so each rule's time is its own; the output is
+    unchanged.  Without a profile the engine pays nothing for this mode.
+    """
+
+    rules: dict[int, RuleTiming] = field(default_factory=dict)
+
+    def _timing(self, rule: _Rule, step: Step) -> RuleTiming:
+        timing = self.rules.get(rule.index)
+        if timing is None:
+            if isinstance(step, TranslateStep):
+                kind = "translate (fused)" if step.fused else "translate"
+            else:
+                kind = "pattern"
+            timing = self.rules[rule.index] = RuleTiming(rule.index, rule.pattern, kind)
+        return timing
+
+    @property
+    def seconds(self) -> float:
+        """Time spent in every rule together."""
+        return sum(timing.seconds for timing in self.rules.values())
+
+    def ranked(self) -> list[RuleTiming]:
+        """Return the rules seen, slowest first."""
+        return sorted(self.rules.values(), key=lambda timing: (-timing.seconds, timing.index))
+
+    def never_fired(self) -> list[RuleTiming]:
+        """Return the rules seen that never matched, in rule order."""
+        return sorted(
+            (timing for timing in self.rules.values() if not timing.matches), key=lambda timing: timing.index
+        )
+
+
+def _profile_rule(rule: _Rule, step: Step, text: str, present: Optional[set[str]], profile: RuleProfile) -> str:
+    timing = profile._timing(rule, step)
+    if present is not None and rule.trigger is not None and present.isdisjoint(rule.trigger):
+        profile.skipped += 1
+        timing.skipped += 1
+        return text
+    profile.applied += 1
+    timing.runs += 1
+    start = time.perf_counter()
+    converted, matches = rule.compiled.subn(rule.replacement, text)
+    timing.seconds += time.perf_counter() - start
+    if matches:
+        timing.matches += matches
+        literal = "\\" not in rule.replacement
+        for m in rule.compiled.finditer(text):
+            old = m.group()
+            new = rule.replacement if literal else m.expand(rule.replacement)
+            if old != new:
+                timing.chars_changed += max(len(old), len(new))
+        if present is not None:
+            present.update(rule.emits)
+    return converted
+
+
+def _char_class(chars: Iterable[str]) -> str:
+    return "".join(re.escape(ch) for ch in sorted(chars))
+
+
+def _union(sets) -> Optional[frozenset[str]]:
+    result: set[str] = set()
+    for item in sets:
+        if item is None:
+            return None
+        result |= item
+    return frozenset(result)
+
+
+def _apply_rule(rule: _Rule, text: str, present: Optional[set[str]], stats: RuleStats) -> str:
+    if present is not None and rule.trigger is not None and present.isdisjoint(rule.trigger):
+        stats.skipped += 1
+        return text
+    stats.applied += 1
+    converted = rule.compiled.sub(rule.replacement, text)
+    if present is not None and converted is not text:
+        present.update(rule.emits)
+    return converted
+
+
+class TranslateStep:
+    """A run of single-codepoint rules composed into one ``str.translate`` table."""
+
+    kind = "translate"
+
+    def __init__(self, rule: _Rule):
+        self.rules: list[_Rule] = []
+        self.mapping: dict[str, str] = {}
+        self.add(rule)
+
+    def add(self, rule: _Rule) -> None:
+        source = rule.single or frozenset()
+        composed = {
+            key: "".join(rule.replacement if ch in source else ch for ch in value)
+            for key, value in self.mapping.items()
+        }
+        for ch in source:
+            composed.setdefault(ch, rule.replacement)
+        self.mapping = {key: value for key, value in composed.items() if key != value}
+        self.rules.append(rule)
+        self.table = _translate_table(self.mapping)
+        self.trigger = frozenset(self.mapping)
+        self.emits = frozenset("".join(self.mapping.values()))
+
+    @property
+    def fused(self) -> bool:
+        return len(self.rules) >= TRANSLATE_MIN_RULES
+
+    def apply(self, text: str, present: Optional[set[str]], stats: RuleStats) -> str:
+        if present is not None and present.isdisjoint(self.trigger):
+            stats.skipped += len(self.rules)
+            return text
+        if not self.fused:
+            for rule in self.rules:
+                text = _apply_rule(rule, text, present, stats)
+            return text
+        stats.applied += len(self.rules)
+        if present is not None:
+            present.update(self.emits)
+        return text.translate(self.table)
+
+
+def _translate_table(mapping: dict[str, str]):
+    if not mapping:
+        return {}
+    top = max(ord(key) for key in mapping)
+    if top >= _MAX_SEQUENCE_TABLE:
+        return {ord(key): value for key, value in mapping.items()}
+    table: list[Union[int, str]] = list(range(top + 1))
+    for key, value in mapping.items():
+        table[ord(key)] = value
+    return table
+
+
+class PatternStep:
+    """A context rule applied with its own ``re.sub``."""
+
+    kind = "pattern"
+
+    def __init__(self, rule: _Rule):
+        # A list, like ``TranslateStep.rules``, so profiling walks both alike.
+        self.rules: list[_Rule] = [rule]
+        self.pattern: re.Pattern[str] = rule.compiled
+        self.replacement = rule.replacement
+        self.trigger = rule.trigger
+        self.emits = rule.emits
+
+    def apply(self, text: str, present: Optional[set[str]], stats: RuleStats) -> str:
+        if present is not None and self.trigger is not None and present.isdisjoint(self.trigger):
+            stats.skipped += 1
+            return text
+        stats.applied += 1
+        converted = self.pattern.sub(self.replacement, text)
+        if present is not None and converted is not text:
+            present.update(self.emits)
+        return converted
+
+
+Step = Union[TranslateStep, PatternStep]
+
+
+class RuleEngine:
+    """Execute an ordered rule list as a short sequence of fused steps."""
+
+    def __init__(self, rules: Iterable[tuple[str, str]]):
+        self.rules = [_analyze(i, pattern, repl) for i, (pattern, repl) in enumerate(rules)]
+        self.steps: list[Step] = []
+        for rule in self.rules:
+            last = self.steps[-1] if self.steps else None
+            if rule.single is not None:
+                if isinstance(last, TranslateStep):
+                    last.add(rule)
+                else:
+                    self.steps.append(TranslateStep(rule))
+                continue
+            self.steps.append(PatternStep(rule))
+        # Prefiltering needs to know every codepoint a rule can introduce.
+        self.prefilter = all(rule.emits is not None for rule in self.rules)
+        self.alphabet = tuple(sorted(_union(
+            rule.trigger for rule in self.rules if rule.trigger is not None
+        ) or ()))
+        self._barrier: Optional[re.Pattern[str]] = None
+        self._sensitive: Optional[re.Pattern[str]] = None
+        self._margin = 0
+        self._core: Optional[re.Pattern[str]] = None
+        self._separators: tuple[str, ...] = ()
+        plan = self._cut_points()
+        if plan is not None:
+            self._plan_cuts(*plan)
+        # Cuts between adjacent characters are judged pair by pair; see ``separable``.
+        self.cluster_local = all(
+            rule.adjacency is not None and rule.min_width > 0 for rule in self.rules
+        )
+        self._separable: dict[str, bool] = {}
+
+    def _cut_points(self) -> Optional[tuple[frozenset[str], frozenset[str], int]]:
+        """Derive where text can be cut without changing any rule's matches.
+
+        Rules with a bounded read set only ever match runs of those codepoints,
+        so they cannot match across a character none of them reads (a
+        *barrier*).  The remaining rules (negated classes, anchors) are only
+        handled when each has a trigger set and a bounded reach that no rule
+        can write into: a cut is then safe if no trigger codepoint lies within
+        that reach of it.  Distances count barriers only: other characters
+        may be deleted by earlier rules, while barriers are never removed.
+
+        Returns the codepoints read by bounded rules, the trigger codepoints
+        of the other rules and their reach, or ``None`` when no cut is safe.
+        """
+        opaque = [rule for rule in self.rules if rule.reads is not None and not rule.anchored]
+        context = [rule for rule in self.rules if rule.reads is None or rule.anchored]
+        if any(rule.trigger is None or rule.reach is None for rule in context):
+            return None
+        sensitive = _union(rule.trigger for rule in context) or frozenset()
+        if any(rule.emits is None or rule.emits & sensitive for rule in self.rules):
+            return None
+        read = _union(rule.reads for rule in opaque) or frozenset()
+        if not all(_keeps_context(rule.pattern, rule.replacement, read) for rule in context):
+            return None
+        margin = max((rule.reach for rule in context), default=0)
+        return read, sensitive, margin
+
+    def _plan_cuts(self, read: frozenset[str], sensitive: frozenset[str], margin: int) -> None:
+        self._read = read
+        self._margin = margin
+        self._barrier = re.compile(r"(?s).*[^%s]" % _char_class(read))
+        self._next_barrier = re.compile("[^%s]" % _char_class(read))
+        # Matches up to and including the ``margin``-th barrier.
+        self._barrier_run = re.compile(
+            r"(?:[%s]*[^%s]){%d}" % (_char_class(read), _char_class(read), margin)
+        )
+        # Matched against a prefix, group 1 starts at its ``margin``-th last barrier.
+        self._barrier_tail = re.compile(
+            r"(?s).*([^%s](?:[%s]*[^%s]){%d})[%s]*\Z"
+            % (_char_class(read), _char_class(read), _char_class(read), max(margin - 1, 0),
+               _char_class(read))
+        )
+        if sensitive:
+            self._sensitive = re.compile("[%s]" % _char_class(sensitive))
+        # Text without any rule's core codepoint (or a sensitive one) is
+        # never touched, so only spans around those need the rules.
+        if all(rule.core is not None for rule in self.rules):
+            core = _union(rule.core for rule in self.rules) | sensitive
+            self._core = re.compile("[%s]" % _char_class(core))
+            used = read | core | _union(rule.emits for rule in self.rules)
+            self._separators = tuple(ch for ch in _SEPARATORS if ch not in used)
+
+    def codepoints(self, text: str) -> set[str]:
+        """Return the trigger codepoints present in ``text`` (possibly more)."""
+        if len(text) <= _SMALL_TEXT:
+            return set(text)
+        return {ch for ch in self.alphabet if ch in text}
+
+    def apply(self, text: str, stats: Optional[RuleStats] = None) -> str:
+        """Apply every step in order; equivalent to applying each rule with ``re.sub``.
+
+        Args:
+            text: Input text.
+            stats: Optional counter that receives the number of rules applied
+                and skipped by the trigger prefilter.
+        """
+        if stats is None:
+            stats = RuleStats()
+        if len(text) >= SPAN_MIN_TEXT and self._core is not None:
+            spans = self._spans(text, SPAN_MAX_COVERAGE)
+            if spans is not None:
+                return self._apply_spans(text, spans, stats)
+        return self._apply_steps(text, stats)
+
+    def _apply_steps(self, text: str, stats: RuleStats) -> str:
+        present = self.codepoints(text) if self.prefilter else None
+        if stats.__class__ is not RuleStats and isinstance(stats, RuleProfile):
+            return self._profile_steps(text, present, stats)
+        for step in self.steps:
+            text = step.apply(text, present, stats)
+        return text
+
+    def _profile_steps(self, text: str, present: Optional[set[str]], profile: RuleProfile) -> str:
+        """``_apply_steps`` one rule at a time, recording each rule in ``profile``."""
+        for step in self.steps:
+            if present is not None and step.trigger is not None and present.isdisjoint(step.trigger):
+                profile.skipped += len(step.rules)
+                for rule in step.rules:
+                    profile._timing(rule, step).skipped += 1
+                continue
+            # Within a step that runs whole, no rule is skipped on its own.
+            whole = isinstance(step, PatternStep) or step.fused
+            for rule in step.rules:
+                text = _profile_rule(rule, step, text, None if whole else present, profile)
+                if whole and present is not None:
+                    present.update(rule.emits)
+        return text
+
+    def _apply_spans(self, text: str, spans: list[tuple[int, int]], stats: RuleStats) -> str:
+        """Run the steps once over the spans only and stitch the gaps back in."""
+        if not spans:
+            return text
+        separator = next((ch for ch in self._separators if ch not in text), None)
+        if separator is None:
+            return self._apply_steps(text, stats)
+        # Separators are barriers no rule reads or writes, so the joined
+        # spans convert exactly as they would in place.
+        converted = self._apply_steps(separator.join(text[s:e] for s, e in spans), stats)
+        out: list[str] = []
+        pos = 0
+        for (start, end), piece in zip(spans, converted.split(separator)):
+            out.append(text[pos:start])
+            out.append(piece)
+            pos = end
+        out.append(text[pos:])
+        return "".join(out)
+
+    def spans(self, text: str) -> list[tuple[int, int]]:
+        """Return the sorted, disjoint ``(start, end)`` spans the rules can change.
+
+        Every span holds at least one codepoint some rule requires and extends
+        to the nearest barriers (and past the reach of context rules), so text
+        outside the spans is left as is and each span converts as it would in
+        place.  Without a cut analysis the whole text is one span.
+        """
+        if self._core is None:
+            return [(0, len(text))] if text else []
+        spans = self._spans(text, None)
+        assert spans is not None
+        return spans
+
+    def _spans(self, text: str, max_coverage: Optional[float]) -> Optional[list[tuple[int, int]]]:
+        """``spans``, giving up with ``None`` once they cover more than ``max_coverage``."""
+        size = len(text)
+        spans: list[tuple[int, int]] = []
+        covered = 0
+        pos = 0
+        while pos < size:
+            hit = self._core.search(text, pos)
+            if hit is None:
+                break
+            start, end = self._extend(text, hit.start(), hit.end())
+            if spans and start <= spans[-1][1]:
+                previous = spans.pop()
+                covered -= previous[1] - previous[0]
+                start = previous[0]
+            spans.append((start, end))
+            covered += end - start
+            pos = end
+            if max_coverage is not None and pos >= SPAN_MIN_TEXT and covered > max_coverage * pos:
+                return None
+        if max_coverage is not None and covered > max_coverage * size:
+            return None
+        return spans
+
+    def _extend(self, text: str, start: int, end: int) -> tuple[int, int]:
+        """Grow ``[start, end)`` to barriers and past the reach of sensitive codepoints."""
+        while True:
+            start = self._after_barrier(text, start)
+            m = self._next_barrier.search(text, end)
+            end = m.start() if m else len(text)
+            if self._sensitive is None:
+                return start, end
+            lo, hi = start, end
+            first = self._sensitive.search(text, start, end)
+            if first is not None:
+                if self._barrier_run.match(text, start, first.start()) is None:
+                    lo = self._barriers_before(text, first.start())
+                last = first
+                for last in self._sensitive.finditer(text, first.end(), end):
+                    pass
+                if self._barrier_run.match(text, last.end(), end) is None:
+                    m = self._barrier_run.match(text, last.end())
+                    hi = m.end() if m else len(text)
+            if (lo, hi) == (start, end):
+                return start, end
+            start, end = lo, hi
+
+    def _after_barrier(self, text: str, pos: int) -> int:
+        """Return the offset just after the last barrier before ``pos`` (or 0)."""
+        lo = max(0, pos - _LOOKBEHIND)
+        m = self._barrier.match(text, lo, pos)
+        if m is None and lo:
+            m = self._barrier.match(text, 0, pos)
+        return m.end() if m else 0
+
+    def _barriers_before(self, text: str, pos: int) -> int:
+        """Return the offset of the ``margin``-th barrier before ``pos`` (or 0)."""
+        if not self._margin:
+            return pos
+        lo = max(0, pos - _LOOKBEHIND)
+        m = self._barrier_tail.match(text, lo, pos)
+        if m is None and lo:
+            m = self._barrier_tail.match(text, 0, pos)
+        return m.start(1) if m else 0
+
+    def _clear_of_context(self, text: str, cut: int, sensitive: list[int]) -> bool:
+        """True when every sensitive codepoint is ``margin`` barriers away from ``cut``.
+
+        Text after the end of ``text`` is unknown, so that many barriers must
+        follow ``cut`` within it.
+        """
+        i = bisect.bisect_left(sensitive, cut)
+        if i and self._barrier_run.match(text, sensitive[i - 1] + 1, cut) is None:
+            return False
+        stop = sensitive[i] if i < len(sensitive) else len(text)
+        return self._barrier_run.match(text, cut, stop) is not None
+
+    def split_point(self, text: str) -> Optional[int]:
+        """Return the last offset at which ``text`` can be cut without changing the output.
+
+        For the returned ``cut``, ``apply(text[:cut]) + apply(text[cut:])``
+        equals ``apply(text)`` whatever follows ``text``.  Returns ``None`` when
+        the text has no such offset (or the rule set allows none at all).
+        """
+        if self._barrier is None:
+            return None
+        sensitive = [m.start() for m in self._sensitive.finditer(text)] if self._sensitive else []
+        end = len(text)
+        while end > 0:
+            m = self._barrier.match(text, 0, end)
+            if m is None:
+                return None
+            cut = m.end()
+            if self._clear_of_context(text, cut, sensitive):
+                return cut
+            end = cut - 1
+        return None
+
+    def can_cut(self, text: str, cut: int) -> bool:
+        """True when ``text`` is known to be cuttable at ``cut`` wherever it sits in a document.
+
+        ``text`` may be a window out of a larger document: the cut must follow
+        a barrier, and every sensitive codepoint (or an edge of ``text``,
+        beyond which anything may lie) must be ``margin`` barriers away.
+        """
+        if self._barrier is None or not 0 < cut < len(text) or text[cut - 1] in self._read:
+            return False
+        if self._sensitive is None:
+            return True
+        before = None
+        for before in self._sensitive.finditer(text, 0, cut):
+            pass
+        after = self._sensitive.search(text, cut)
+        return (
+            self._barrier_run.match(text, before.end() if before else 0, cut) is not None
+            and self._barrier_run.match(text, cut, after.start() if after else len(text)) is not None
+        )
+
+    def separable(self, before: str, after: str) -> bool:
+        """True when text ending in ``before`` and text starting with ``after`` convert independently.
+
+        For such a pair, ``apply(left) + apply(right) == apply(left + right)``
+        whenever ``left`` ends with ``before`` and ``right`` starts with
+        ``after``.  The codepoints that can sit on either side of the cut are
+        followed through the rules in order; the cut is rejected as soon as a
+        rule reads an adjacent pair (or a ``^``/``$`` anchor) that could
+        straddle it, or may delete an edge character.  Results are memoized
+        per pair.
+        """
+        key = before + after
+        known = self._separable.get(key)
+        if known is None:
+            known = self._separable[key] = self._check_separable(before, after)
+        return known
+
+    def _check_separable(self, before: str, after: str) -> bool:
+        if not self.cluster_local:
+            return False
+        left = frozenset(before)
+        right = frozenset(after)
+        start = frozenset([_BOS])
+        for rule in self.rules:
+            adjacency = rule.adjacency
+            # Alone, the left part ends at ``$`` and the right part starts at ``^``.
+            right_end = right | {_EOS}
+            for x, y in adjacency.pairs:
+                if (x.meets(left) and y.meets(right_end)) or (x.meets(start) and y.meets(right)):
+                    return False
+            if adjacency.last.meets(left):
+                if adjacency.tail is None:
+                    return False
+                left |= adjacency.tail
+            if adjacency.first.meets(right):
+                if adjacency.head is None:
+                    return False
+                right |= adjacency.head
+        return True
+
+    def apply_clusters(self, pieces: Iterable[str], cache, stats: Optional[RuleStats] = None) -> str:
+        """Convert the concatenation of ``pieces``, caching each independent cluster.
+
+        Consecutive pieces are grouped into clusters across every boundary
+        that is not ``separable``; each distinct cluster is converted once and
+        looked up in ``cache`` (a ``para.cache.LRUCache``) first, so repeated
+        syllables cost a dictionary lookup.  The result equals
+        ``apply("".join(pieces))``.
+
+        Args:
+            pieces: Consecutive, non-empty slices of the input, e.g. syllables.
+            cache: Maps cluster text to its converted form.  Repeated clusters
+                within one call count as hits.
+            stats: Optional counter for the rules run on cache misses.
+        """
+        pieces = list(pieces)
+        text = "".join(pieces)
+        if not self.cluster_local or len(pieces) < 2:
+            return self.apply(text, stats)
+        if stats is None:
+            stats = RuleStats()
+        # Boundary i lies between pieces i and i + 1, keyed by its two codepoints.
+        boundaries = list(map(operator.add, map(operator.itemgetter(-1), pieces),
+                              map(operator.itemgetter(0), pieces[1:])))
+        for key in set(boundaries).difference(self._separable):
+            self.separable(key[0], key[1])
+        ends = list(itertools.accumulate(map(len, pieces)))
+        cuts = [0, *itertools.compress(ends, map(self._separable.__getitem__, boundaries)), len(text)]
+        clusters = list(map(text.__getitem__, map(slice, cuts, cuts[1:])))
+        converted: dict[str, str] = {}
+        missing: list[str] = []
+        for cluster in set(clusters):
+            result = cache.get(cluster)
+            if result is None:
+                missing.append(cluster)
+            else:
+                converted[cluster] = result
+        for cluster, result in zip(missing, self._apply_many(missing, text, stats)):
+            cache.put(cluster, result)
+            converted[cluster] = result
+        cache.hits += len(clusters) - len(converted)
+        return "".join(map(converted.__getitem__, clusters))
+
+    def apply_split(self, pieces: Iterable[str], stats: Optional[RuleStats] = None) -> list[str]:
+        """Convert the concatenation of ``pieces`` and split the output into as many pieces.
+
+        The pieces' boundaries are kept where they are ``separable``; a
+        boundary inside a cluster (say, a syllable whose vowel and consonant
+        sit in differently formatted runs) moves forward to the cluster's
+        end, so the whole cluster lands in the earlier piece.  The joined
+        result always equals ``apply("".join(pieces))``.
+        """
+        pieces = list(pieces)
+        text = "".join(pieces)
+        if stats is None:
+            stats = RuleStats()
+        if len(pieces) < 2 or not self.cluster_local:
+            return [self.apply(text, stats)] + [""] * (len(pieces) - 1)
+        cuts = [0]
+        for end in itertools.accumulate(map(len, pieces[:-1])):
+            cut = max(end, cuts[-1])
+            while 0 < cut < len(text) and not self.separable(text[cut - 1], text[cut]):
+                cut += 1
+            cuts.append(cut)
+        cuts.append(len(text))
+        segments = list(map(text.__getitem__, map(slice, cuts, cuts[1:])))
+        converted = iter(self._apply_many([segment for segment in segments if segment], text, stats))
+        return [next(converted) if segment else "" for segment in segments]
+
+    def _apply_many(self, texts: list[str], context: str, stats: RuleStats) -> list[str]:
+        """Convert several texts, sharing one pass over those a separator can join.
+
+        ``context`` is searched for a separator codepoint it does not contain.
+        """
+        separator = next((ch for ch in self._separators if ch not in context), None)
+        if separator is None or self._apply_steps(separator, RuleStats()) != separator:
+            return [self._apply_steps(text, stats) for text in texts]
+        joined = [
+            i for i, text in enumerate(texts)
+            if self.separable(text[-1], separator) and self.separable(separator, text[0])
+        ]
+        results: list[Optional[str]] = [None] * len(texts)
+        if len(joined) > 1:
+            parts = self._apply_steps(separator.join(texts[i] for i in joined), stats).split(separator)
+            if len(parts) == len(joined):
+                for i, part in zip(joined, parts):
+                    results[i] = part
+        return [
+            self._apply_steps(text, stats) if result is None else result
+            for text, result in zip(texts, results)
+        ]
+
+
+def apply_sequential(rules: Iterable[tuple[re.Pattern[str], str]], text: str) -> str:
+    """Reference implementation: one ``re.sub`` per rule, in order."""
+    for pattern, repl in rules:
+        text = pattern.sub(repl, text)
+    return text
@@ -0,0 +1,80 @@
+"""Myanmar font names that tell how the text set in them is encoded.
+
+Office documents usually set Zawgyi text in a Zawgyi font and Unicode text
+in a Unicode Myanmar font, so a run's font is a cheaper and surer verdict
+than scoring its few characters.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Optional
+
+from para.detect import Encoding
+
+# Fonts that map the Myanmar block to Zawgyi shapes.
+ZAWGYI_FONTS = frozenset({
+    "Zawgyi-One",
+    "Zawgyi-One 2008",
+    "Zawgyi3",
+    "Smart Zawgyi",
+})
+
+# Unicode Myanmar fonts.
+UNICODE_FONTS = frozenset({
+    "Myanmar Text",
+    "Pyidaungsu",
+    "Myanmar3",
+    "Padauk",
+    "Padauk Book",
+    "Noto Sans Myanmar",
+    "Noto Sans Myanmar UI",
+    "Noto Serif Myanmar",
+    "Myanmar Sangam MN",
+    "Myanmar MN",
+    "Masterpiece Uni Sans",
+    "Yunghkio",
+    "Tharlon",
+})
+
+_IGNORED = re.compile(r"[\s_-]")
+
+
+def _key(name: str) -> str:
+    return _IGNORED.sub("", name.strip().strip("'\"")).casefold()
+
+
+_ENCODINGS: dict[str, Encoding] = {
+    **{_key(name): "unicode" for name in UNICODE_FONTS},
+    **{_key(name): "zawgyi" for name in ZAWGYI_FONTS},
+}
+
+
+def font_encoding(name: str) -> Optional[Encoding]:
+    """Return "zawgyi" or "unicode" for a known Myanmar font, None for any other font.
+
+    Case, spaces, hyphens, underscores and surrounding quotes are ignored,
+    so "Zawgyi One" and "'zawgyi-one'" match "Zawgyi-One".
+    """
+    return _ENCODINGS.get(_key(name))
+
+
+def fonts_encoding(names: Iterable[str]) -> Optional[Encoding]:
+    """Return the hint for text whose font settings name ``names``.
+
+    A Zawgyi font wins over a Unicode one: it only makes sense for text that
+    was typed in Zawgyi.
+    """
+    found = {font_encoding(name) for name in names}
+    if "zawgyi" in found:
+        return "zawgyi"
+    return "unicode" if "unicode" in found else None
+
+
+def rename_zawgyi_font(name: str, replacement: str) -> str:
+    """Return ``replacement`` if ``name`` is a Zawgyi font, else ``name``; quotes are kept."""
+    if font_encoding(name) != "zawgyi":
+        return name
+    stripped = name.strip()
+    quote = stripped[0] if stripped[:1] in ("'", '"') else ""
+    return f"{quote}{replacement}{quote}"
@@ -0,0 +1,48 @@
+"""File extensions of the formats Para reads, by handler.
+
+Apart from ``para.handlers`` so that the CLI can tell packaged documents
+from plain text without loading the handlers.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Union
+
+# File extensions grouped by handler type
+PLAIN_TEXT_EXTENSIONS = {
+    # Plain text
+    ".txt", ".text", ".log", ".md", ".rst", ".asc",
+    # Web/markup
+    ".html", ".htm", ".xhtml", ".xml", ".csv", ".tsv",
+    ".json", ".yaml", ".yml",
+    # Documentation
+    ".tex", ".latex", ".adoc", ".org", ".wiki", ".mediawiki",
+    # Config files
+    ".ini", ".cfg", ".conf", ".properties", ".env", ".toml", ".lock",
+    # Source code
+    ".py", ".js", ".ts", ".java", ".c", ".cpp", ".h", ".cs",
+    ".php", ".rb", ".go", ".rs", ".sh", ".bat", ".ps1", ".sql",
+    # Notes/misc
+    ".note", ".eml", ".mbox",
+    # Subtitles
+    ".srt", ".vtt", ".sub",
+    # Translation
+    ".po", ".pot",
+    # Other
+    ".texi", ".man", ".nfo", ".readme",
+}
+
+DOCX_EXTENSIONS = {".docx", ".docm"}
+PPTX_EXTENSIONS = {".pptx", ".pptm"}
+XLSX_EXTENSIONS = {".xlsx", ".xlsm"}
+ODT_EXTENSIONS = {".odt"}
+RTF_EXTENSIONS = {".rtf"}
+
+# Zip packages; every other file is read as plain text.
+DOCUMENT_EXTENSIONS = DOCX_EXTENSIONS | PPTX_EXTENSIONS | XLSX_EXTENSIONS | ODT_EXTENSIONS
+
+
+def is_document(path: Union[str, Path]) -> bool:
+    """True when ``path`` names an Office or OpenDocument file rather than plain text."""
+    return Path(path).suffix.lower() in DOCUMENT_EXTENSIONS
@@ -2,59 +2,192 @@
 
 from __future__ import annotations
 
+import codecs
+import itertools
 import json
+import mmap
+import os
+import posixpath
 import re
+import shutil
+import tempfile
+import zipfile
 from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager
+from dataclasses import replace
+from functools import partial
 from pathlib import Path
-from typing import Callable, Optional
-
-# Optional imports - will be None if not installed
-try:
-    import openpyxl
-except ImportError:
-    openpyxl = None
-
-try:
-    from docx import Document as DocxDocument
-except ImportError:
-    DocxDocument = None
-
-try:
-    from odf import text as odf_text
-    from odf.opendocument import load as odf_load
-except ImportError:
-    odf_text = None
-    odf_load = None
-
-
-# File extensions grouped by handler type
-PLAIN_TEXT_EXTENSIONS = {
-    # Plain text
-    ".txt", ".text", ".log", ".md", ".rst", ".asc",
-    # Web/markup
-    ".html", ".htm", ".xhtml", ".xml", ".csv", ".tsv",
-    ".json", ".yaml", ".yml",
-    # Documentation
-    ".tex", ".latex", ".adoc", ".org", ".wiki", ".mediawiki",
-    # Config files
-    ".ini", ".cfg", ".conf", ".properties", ".env", ".toml", ".lock",
-    # Source code
-    ".py", ".js", ".ts", ".java", ".c", ".cpp", ".h", ".cs",
-    ".php", ".rb", ".go", ".rs", ".sh", ".bat", ".ps1", ".sql",
-    # Notes/misc
-    ".note", ".eml", ".mbox",
-    # Subtitles
-    ".srt", ".vtt", ".sub",
-    # Translation
-    ".po", ".pot",
-    # Other
-    ".texi", ".man", ".nfo", ".readme",
+from typing import IO, BinaryIO, Callable, Iterable, Iterator, Mapping, Optional, Sequence, TextIO
+
+from para.batch import parallel_imap
+from para.cache import LRUCache
+from para.detect import Encoding
+from para.fonts import font_encoding, fonts_encoding, rename_zawgyi_font
+from para.formats import (
+    DOCX_EXTENSIONS,
+    ODT_EXTENSIONS,
+    PLAIN_TEXT_EXTENSIONS,
+    PPTX_EXTENSIONS,
+    RTF_EXTENSIONS,
+    XLSX_EXTENSIONS,
+)
+from para.ooxml import (
+    content_types,
+    Converters,
+    FontRule,
+    iter_blocks,
+    iter_elements,
+    PartRule,
+    rewrite_package,
+)
+
+
+# Plain text is read and converted in chunks of this many characters.
+READ_CHUNK_CHARS = 1 << 16
+
+# What ``XlsxHandler.convert`` rewrites, by part content type.
+_SPREADSHEETML = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+_XLSX_MAIN_TYPES = frozenset({
+    f"{_SPREADSHEETML}.sheet.main+xml",
+    f"{_SPREADSHEETML}.template.main+xml",
+    "application/vnd.ms-excel.sheet.macroEnabled.main+xml",
+})
+_XLSX_WORKSHEET = f"{_SPREADSHEETML}.worksheet+xml"
+_XLSX_SHARED_STRINGS = f"{_SPREADSHEETML}.sharedStrings+xml"
+_XLSX_COMMENTS = f"{_SPREADSHEETML}.comments+xml"
+_XLSX_STYLES = f"{_SPREADSHEETML}.styles+xml"
+_XLSX_SHEET_NAMES = PartRule(attributes={"sheet": frozenset({"name"})})
+XLSX_PART_RULES = {
+    _XLSX_SHARED_STRINGS: PartRule(elements=frozenset({"t"})),
+    # Inline strings (``<is><t>``) and header/footer text.
+    _XLSX_WORKSHEET: PartRule(
+        elements=frozenset({
+            "t", "oddHeader", "oddFooter", "evenHeader", "evenFooter", "firstHeader", "firstFooter",
+        })
+    ),
+    _XLSX_COMMENTS: PartRule(elements=frozenset({"t"})),
+    **{kind: _XLSX_SHEET_NAMES for kind in _XLSX_MAIN_TYPES},
+}
+_XLSX_CELL_ELEMENTS = frozenset({"c", "v", "t"})
+# Font names: ``<name>`` of a style's ``<font>``, ``<rFont>`` of a rich text run.
+_XLSX_FONT_NAMES = {"name": frozenset({"val"}), "rFont": frozenset({"val"})}
+
+_WORDPROCESSINGML = "application/vnd.openxmlformats-officedocument.wordprocessingml"
+_DOCX_MAIN_TYPES = frozenset({
+    f"{_WORDPROCESSINGML}.document.main+xml",
+    f"{_WORDPROCESSINGML}.template.main+xml",
+    "application/vnd.ms-word.document.macroEnabled.main+xml",
+    "application/vnd.ms-word.template.macroEnabledTemplate.main+xml",
+})
+_DOCX_STYLES = f"{_WORDPROCESSINGML}.styles+xml"
+_DOCX_FONT_TABLE = f"{_WORDPROCESSINGML}.fontTable+xml"
+# Font slots of ``<w:rFonts>``, and the elements whose font hints are read.
+_DOCX_FONT_SLOTS = frozenset({"ascii", "hAnsi", "eastAsia", "cs"})
+_DOCX_FONT_NAMES = {"rFonts": _DOCX_FONT_SLOTS, "font": frozenset({"name"})}
+_DOCX_HINT_ELEMENTS = frozenset({"p", "pPr", "r", "pStyle", "rStyle", "rFonts"})
+# Runs of a paragraph are converted together, up to any tab, break or
+# embedded object between them.
+_DOCX_RUNS = PartRule(
+    elements=frozenset({"t"}),
+    group="p",
+    breaks=frozenset({
+        "tab", "ptab", "br", "cr", "sym", "noBreakHyphen", "softHyphen", "drawing", "pict", "object",
+    }),
+)
+DOCX_PART_RULES = {
+    **{kind: _DOCX_RUNS for kind in _DOCX_MAIN_TYPES},
+    **{
+        f"{_WORDPROCESSINGML}.{part}+xml": _DOCX_RUNS
+        for part in ("header", "footer", "footnotes", "endnotes", "comments")
+    },
+}
+
+_PRESENTATIONML = "application/vnd.openxmlformats-officedocument.presentationml"
+_PPTX_SLIDE = f"{_PRESENTATIONML}.slide+xml"
+_PPTX_RUNS = PartRule(elements=frozenset({"t"}), group="p", breaks=frozenset({"br"}))
+PPTX_PART_RULES = {
+    f"{_PRESENTATIONML}.{part}+xml": _PPTX_RUNS
+    for part in ("slide", "slideLayout", "slideMaster", "notesSlide", "notesMaster", "handoutMaster")
 }
+_OOXML_TEXT_ELEMENTS = frozenset({"p", "t"})
+
+# What ``OdtHandler.convert`` rewrites, by member name.  The text nodes of a
+# paragraph or heading are converted together, up to any spacer, tab, line
+# break, note, annotation or frame between them.
+_ODT_PARAGRAPHS = PartRule(
+    elements=frozenset({"p", "h"}),
+    breaks=frozenset({"s", "tab", "line-break", "note", "annotation", "frame"}),
+    mixed=True,
+)
+ODT_PART_RULES = {"content.xml": _ODT_PARAGRAPHS, "styles.xml": _ODT_PARAGRAPHS}
+# Read as a space between words by ``OdtHandler.iter_text``.
+_ODT_SPACES = frozenset({"s", "tab", "line-break"})
+# ``<style:text-properties>`` names fonts by font face declaration or by family.
+_ODT_FONT_FACES = frozenset({"font-name", "font-name-asian", "font-name-complex"})
+_ODT_FONT_FAMILIES = frozenset({"font-family", "font-family-asian", "font-family-complex"})
+_ODT_FONT_NAMES = {
+    "font-face": frozenset({"name", "font-family"}),
+    "text-properties": _ODT_FONT_FACES | _ODT_FONT_FAMILIES,
+}
+_ODT_STYLED = frozenset({"p", "h", "span"})
+_ODT_STYLE_ELEMENTS = frozenset({
+    "font-face", "text-properties", "style", "default-style", "automatic-styles",
+})
+
+# Bounds of the per-workbook memo that converts repeated strings once.
+XLSX_MEMO_ENTRIES = 1 << 16
+XLSX_MEMO_CHARS = 1 << 24
+
+# Plain text converted in parallel is split into ranges of about this many bytes.
+RANGE_BYTES = 1 << 23
+
+# Bytes decoded on each side of a candidate range boundary to judge the cut.
+_CUT_WINDOW_BYTES = 1 << 14
+
+# A range boundary is looked for among the first line feeds this many bytes
+# past its target size; if none is accepted the range grows by another target.
+_CUT_SEARCH_BYTES = 1 << 16
+_CUT_TRIES = 64
+
+
+@contextmanager
+def atomic_write_text(path: Path, encoding: str = "utf-8") -> Iterator[TextIO]:
+    """Open a text stream whose contents replace ``path`` only if the block succeeds.
 
-DOCX_EXTENSIONS = {".docx", ".docm"}
-XLSX_EXTENSIONS = {".xlsx", ".xlsm"}
-ODT_EXTENSIONS = {".odt"}
-RTF_EXTENSIONS = {".rtf"}
+    Data is written to a temporary file in the same directory and moved over
+    ``path`` with ``os.replace``, so readers never see a half-written file and
+    a failure leaves any existing file untouched.
+    """
+    with _atomic_open(Path(path), "w", encoding) as stream:
+        yield stream
+
+
+@contextmanager
+def atomic_write_bytes(path: Path) -> Iterator[BinaryIO]:
+    """Binary counterpart of ``atomic_write_text``."""
+    with _atomic_open(Path(path), "wb", None) as stream:
+        yield stream
+
+
+@contextmanager
+def _atomic_open(path: Path, mode: str, encoding: Optional[str]) -> Iterator[IO]:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as stream:
+            yield stream
+        if path.exists():
+            shutil.copymode(path, tmp)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
 
 
 class FileHandler(ABC):
@@ -65,6 +198,10 @@ class FileHandler(ABC):
         """Read file and return text content."""
         pass
 
+    def iter_text(self, path: Path) -> Iterator[str]:
+        """Yield the file's text in pieces; handlers that can read lazily override this."""
+        yield self.read(path)
+
     @abstractmethod
     def convert(
         self,
@@ -75,12 +212,102 @@ class FileHandler(ABC):
         """Convert file in-place or to new file, preserving format."""
         pass
 
+    def uses_zawgyi_fonts(self, path: Path) -> bool:
+        """True when the file may set text in a Zawgyi font; formats without font hints say False."""
+        return False
+
     @staticmethod
     def can_handle(path: Path) -> bool:
         """Check if this handler can process the given file."""
         return False
 
 
+def _splits_at_newlines(encoding: str) -> bool:
+    """True when a 0x0A byte in ``encoding`` is always a whole line feed."""
+    name = codecs.lookup(encoding).name
+    return name in ("utf-8", "ascii", "latin-1") or name.startswith(("iso8859-", "cp125"))
+
+
+def _decode_lines(data: bytes, encoding: str) -> str:
+    # Same result as reading in text mode: universal newlines.
+    text = data.decode(encoding)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _char_start(data: bytes, pos: int, encoding: str) -> int:
+    # Step off UTF-8 continuation bytes; the other splittable encodings are single-byte.
+    if codecs.lookup(encoding).name == "utf-8":
+        while pos < len(data) and 0x80 <= data[pos] < 0xC0:
+            pos += 1
+    return pos
+
+
+def _find_cut(
+    data: bytes, encoding: str, can_cut: Callable[[str, int], bool], target: int, start: int
+) -> Optional[int]:
+    # The first line feeds at or after ``target`` are judged in one decoded
+    # region; None when ``can_cut`` accepts none of them.
+    stop = min(target + _CUT_SEARCH_BYTES, len(data))
+    pos = data.find(b"\n", target, stop)
+    if pos == -1:
+        return None
+    lo = _char_start(data, max(pos + 1 - _CUT_WINDOW_BYTES, start), encoding)
+    hi = _char_start(data, min(stop + _CUT_WINDOW_BYTES, len(data)), encoding)
+    head = data[lo:pos + 1].decode(encoding)
+    text = head + data[pos + 1:hi].decode(encoding)
+    lines = text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+    char = len(head) - 1
+    counted = crlf = 0
+    for _ in range(_CUT_TRIES):
+        # ``lines`` is shorter than ``text`` by one character per CRLF.
+        crlf += text.count("\r\n", counted, char + 1)
+        counted = char + 1
+        cut = char + 1 - crlf
+        window = lines[max(cut - _CUT_WINDOW_BYTES, 0):cut + _CUT_WINDOW_BYTES]
+        if can_cut(window, min(cut, _CUT_WINDOW_BYTES)):
+            return pos + 1
+        pos = data.find(b"\n", pos + 1, stop)
+        if pos == -1:
+            return None
+        char = text.find("\n", char + 1)
+    return None
+
+
+def _split_ranges(
+    data: bytes, encoding: str, can_cut: Callable[[str, int], bool], range_bytes: int
+) -> list[tuple[int, int]]:
+    """Split ``data`` into ranges of about ``range_bytes`` ending at line feeds ``can_cut`` accepts.
+
+    Only ``_CUT_TRIES`` line feeds within ``_CUT_SEARCH_BYTES`` of each
+    target are tried; when none is accepted the range runs on to the next
+    target, so a file with no usable line feed stays one range.
+    """
+    bounds = [0]
+    target = range_bytes
+    while target < len(data):
+        cut = _find_cut(data, encoding, can_cut, target, bounds[-1])
+        if cut is None:
+            target += range_bytes
+            continue
+        if cut >= len(data):
+            break
+        bounds.append(cut)
+        target = cut + range_bytes
+    bounds.append(len(data))
+    return list(zip(bounds, bounds[1:]))
+
+
+def _convert_range(
+    converter: Callable[[str], str], path: str, encoding: str, span: tuple[int, int]
+) -> str:
+    start, end = span
+    with open(path, "rb") as stream:
+        stream.seek(start)
+        return converter(_decode_lines(stream.read(end - start), encoding))
+
+
 class PlainTextHandler(FileHandler):
     """Handler for plain text files."""
 
@@ -93,199 +320,751 @@ class PlainTextHandler(FileHandler):
         output_path: Path,
         converter: Callable[[str], str],
         encoding: str = "utf-8",
+        stream_converter: Optional[Callable[[Iterable[str]], Iterable[str]]] = None,
+    ) -> None:
+        """Convert a text file, writing the result atomically.
+
+        With ``stream_converter`` the input is read and converted in chunks of
+        ``READ_CHUNK_CHARS`` so memory stays bounded; otherwise the whole file
+        is passed to ``converter``.
+        """
+        with open(input_path, encoding=encoding) as src:
+            if stream_converter is None:
+                pieces: Iterable[str] = [converter(src.read())]
+            else:
+                pieces = stream_converter(iter(partial(src.read, READ_CHUNK_CHARS), ""))
+            with atomic_write_text(output_path, encoding=encoding) as dst:
+                for piece in pieces:
+                    dst.write(piece)
+
+    @staticmethod
+    def can_split(encoding: str) -> bool:
+        """True when ``convert_ranges`` supports ``encoding``."""
+        return _splits_at_newlines(encoding)
+
+    def convert_ranges(
+        self,
+        input_path: Path,
+        output_path: Path,
+        converter: Callable[[str], str],
+        can_cut: Callable[[str, int], bool],
+        encoding: str = "utf-8",
+        workers: Optional[int] = None,
+        preload: Sequence[str] = (),
     ) -> None:
-        text = self.read(input_path, encoding=encoding)
-        converted = converter(text)
-        output_path.write_text(converted, encoding=encoding)
+        """Convert a text file range by range on a process pool, writing the result atomically.
+
+        The input is memory-mapped and split into ranges of about
+        ``RANGE_BYTES`` that end at line feeds where ``can_cut`` allows a cut.
+        Workers decode and convert the ranges, and the results are written
+        in order as they arrive, so only the ranges in flight are held in
+        memory.
+
+        Args:
+            input_path: Text file in an encoding ``can_split`` accepts.
+            output_path: Destination file.
+            converter: Picklable function applied to each range's text.
+            can_cut: Called with a decoded window and an offset into it;
+                returns True when converting either side separately gives
+                the same output.
+            encoding: Encoding of the input and the output.
+            workers: Worker processes; ``None`` uses every CPU.
+            preload: Modules each worker imports before taking work.
+        """
+        if not self.can_split(encoding):
+            raise ValueError(f"cannot split {encoding} text at line feeds")
+        with open(input_path, "rb") as src:
+            if os.fstat(src.fileno()).st_size:
+                with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    spans = _split_ranges(data, encoding, can_cut, RANGE_BYTES)
+            else:
+                spans = []
+        pieces = parallel_imap(
+            partial(_convert_range, converter, str(input_path), encoding),
+            spans,
+            workers=workers,
+            chunksize=1,
+            preload=preload,
+        )
+        with atomic_write_text(output_path, encoding=encoding) as dst:
+            for piece in pieces:
+                dst.write(piece)
 
     @staticmethod
     def can_handle(path: Path) -> bool:
         return path.suffix.lower() in PLAIN_TEXT_EXTENSIONS or path.suffix == ""
 
 
-class DocxHandler(FileHandler):
-    """Handler for Microsoft Word .docx files."""
+def _attr(attrs: Mapping[str, str], name: str) -> Optional[str]:
+    """Return the value of the attribute whose local name is ``name``, whatever its prefix."""
+    for key, value in attrs.items():
+        if key.rpartition(":")[2] == name:
+            return value
+    return None
 
-    def __init__(self):
-        if DocxDocument is None:
-            raise ImportError(
-                "python-docx is required for .docx support. "
-                "Install with: pip install paraencoder[office]"
-            )
+
+def _attr_values(attrs: Mapping[str, str], names: frozenset[str]) -> list[str]:
+    return [value for key, value in attrs.items() if key.rpartition(":")[2] in names]
+
+
+def _resolve_styles(
+    own: Mapping[str, Optional[Encoding]], parents: Mapping[str, str]
+) -> dict[str, Encoding]:
+    """Return the font hint of each style that has one, its own or its nearest ancestor's."""
+    resolved: dict[str, Encoding] = {}
+    for name in own.keys() | parents.keys():
+        seen: set[str] = set()
+        style: Optional[str] = name
+        while style is not None and style not in seen:
+            seen.add(style)
+            hint = own.get(style)
+            if hint is not None:
+                resolved[name] = hint
+                break
+            style = parents.get(style)
+    return resolved
+
+
+class _OoxmlTextHandler(FileHandler):
+    """Base for OOXML formats whose text is in ``<t>`` runs inside ``<p>`` paragraphs.
+
+    Subclasses list the parts to rewrite by content type; ``main_types`` are
+    read before the other parts.
+    """
+
+    part_rules: dict[str, PartRule] = {}
+    main_types: frozenset[str] = frozenset()
 
     def read(self, path: Path) -> str:
-        doc = DocxDocument(str(path))
-        paragraphs = [p.text for p in doc.paragraphs]
-        return "\n".join(paragraphs)
+        return "\n".join(self.iter_text(path))
+
+    def iter_text(self, path: Path) -> Iterator[str]:
+        """Lazily yield the text of each non-empty paragraph, main part first."""
+        with zipfile.ZipFile(path) as package:
+            types = content_types(package)
+            parts = [name for name, kind in types.items() if kind in self.part_rules]
+            parts.sort(key=lambda name: types[name] not in self.main_types)
+            for name in parts:
+                with package.open(name) as stream:
+                    # Runs not yet claimed by a paragraph, with their depth; a
+                    # paragraph ends after its runs and any nested paragraphs
+                    # (text boxes), which claim the deeper runs first.
+                    runs: list[tuple[int, str]] = []
+                    for element in iter_elements(stream, _OOXML_TEXT_ELEMENTS):
+                        if element.name == "t":
+                            runs.append((element.depth, element.text))
+                            continue
+                        keep = len(runs)
+                        while keep and runs[keep - 1][0] > element.depth:
+                            keep -= 1
+                        text = "".join(run for _, run in runs[keep:])
+                        del runs[keep:]
+                        if text:
+                            yield text
 
     def convert(
         self,
         input_path: Path,
         output_path: Path,
         converter: Callable[[str], str],
+        convert_runs: Optional[Callable[[list[str]], list[str]]] = None,
+        *,
+        hinted: Optional[Mapping[str, Converters]] = None,
+        unicode_font: Optional[str] = None,
     ) -> None:
-        doc = DocxDocument(str(input_path))
-
-        # Convert text in paragraphs
-        for para in doc.paragraphs:
-            for run in para.runs:
-                if run.text:
-                    run.text = converter(run.text)
-
-        # Convert text in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        for run in para.runs:
-                            if run.text:
-                                run.text = converter(run.text)
-
-        # Convert text in headers/footers
-        for section in doc.sections:
-            for header in [section.header, section.first_page_header, section.even_page_header]:
-                if header:
-                    for para in header.paragraphs:
-                        for run in para.runs:
-                            if run.text:
-                                run.text = converter(run.text)
-            for footer in [section.footer, section.first_page_footer, section.even_page_footer]:
-                if footer:
-                    for para in footer.paragraphs:
-                        for run in para.runs:
-                            if run.text:
-                                run.text = converter(run.text)
-
-        doc.save(str(output_path))
+        """Convert every text run of the listed parts, copying everything else unchanged.
+
+        With ``convert_runs`` (such as ``para.convert.zg_to_unicode_runs``),
+        the runs of each paragraph are converted as one text and mapped back
+        onto the runs, keeping their formatting; otherwise every run goes
+        through ``converter`` on its own.  The output is written atomically,
+        so ``output_path`` may be ``input_path``.
+
+        Args:
+            input_path: Document to convert.
+            output_path: Where to write the converted document.
+            converter: Applied to text without a font hint.
+            convert_runs: Applied to the runs of a paragraph without a font hint.
+            hinted: Font hint ("zawgyi" or "unicode", see ``para.fonts``) to
+                the converters for text set in such a font; text under a
+                hint missing here is left unchanged.  None ignores fonts.
+                Formats without font hints ignore it.
+            unicode_font: Rename the Zawgyi fonts the document names to this font.
+        """
+        with open(input_path, "rb") as src, atomic_write_bytes(output_path) as dst:
+            with zipfile.ZipFile(src) as package:
+                rules = self._rules(package, hinted is not None, unicode_font)
+            rewrite_package(src, dst, rules, converter, convert_runs, hinted)
+
+    def _rules(
+        self, package: zipfile.ZipFile, hints: bool, unicode_font: Optional[str]
+    ) -> Callable[[str, str], Optional[PartRule]]:
+        """Return the rule for each part of ``package``; formats with font hints add them."""
+        return lambda name, kind: self.part_rules.get(kind)
+
+
+def _docx_styles(stream: BinaryIO) -> tuple[dict[str, Encoding], Optional[Encoding]]:
+    """Read the font hints of a Word styles part.
+
+    Returns the hint of each style by id, inherited through ``basedOn``, and
+    that of text with no style: the default paragraph style's, else the
+    document defaults'.  Theme fonts are not followed.
+    """
+    own: dict[str, Optional[Encoding]] = {}
+    parents: dict[str, str] = {}
+    default_style = None
+    defaults: Optional[Encoding] = None
+    # The last ``<w:rFonts>`` seen, with its depth: 4 in a style's own run
+    # properties, 5 in the document defaults (and in table style conditions).
+    fonts: Optional[tuple[int, Optional[Encoding]]] = None
+    based_on = None
+    for element in iter_elements(stream, frozenset({"rFonts", "basedOn", "style", "rPrDefault"})):
+        if element.name == "rFonts":
+            fonts = (element.depth, fonts_encoding(_attr_values(element.attrs, _DOCX_FONT_SLOTS)))
+        elif element.name == "basedOn":
+            based_on = _attr(element.attrs, "val")
+        elif element.name == "rPrDefault":
+            if fonts is not None and fonts[0] == 5:
+                defaults = fonts[1]
+            fonts = None
+        else:
+            style = _attr(element.attrs, "styleId")
+            if style is not None:
+                own[style] = fonts[1] if fonts is not None and fonts[0] == 4 else None
+                if based_on is not None:
+                    parents[style] = based_on
+                default = _attr(element.attrs, "default") in ("1", "true", "on")
+                if default and _attr(element.attrs, "type") == "paragraph":
+                    default_style = style
+            fonts = based_on = None
+    styles = _resolve_styles(own, parents)
+    return styles, styles.get(default_style or "", defaults)
+
+
+def _docx_hint(styles: Mapping[str, Encoding]) -> Callable[[str, Mapping[str, str]], Optional[Encoding]]:
+    """Return a ``FontRule.hint`` for Word text parts, given the hints of the styles."""
+    # Run properties inside ``<w:pPr>`` format the paragraph mark, not its text.
+    paragraph_mark = False
+
+    def hint(local: str, attrs: Mapping[str, str]) -> Optional[Encoding]:
+        nonlocal paragraph_mark
+        if local == "rFonts":
+            return None if paragraph_mark else fonts_encoding(_attr_values(attrs, _DOCX_FONT_SLOTS))
+        if local in ("pStyle", "rStyle"):
+            return styles.get(_attr(attrs, "val") or "")
+        paragraph_mark = local == "pPr"
+        return None
+
+    return hint
+
+
+class DocxHandler(_OoxmlTextHandler):
+    """Handler for Microsoft Word .docx files.
+
+    The body (tables, text boxes and nested tables included), headers,
+    footers, footnotes, endnotes and comments are rewritten ``<w:t>`` by
+    ``<w:t>``; see ``para.ooxml``.
+    """
+
+    part_rules = DOCX_PART_RULES
+    main_types = _DOCX_MAIN_TYPES
+
+    def uses_zawgyi_fonts(self, path: Path) -> bool:
+        """True when the font table or the styles name a Zawgyi font, or there is no font table."""
+        with zipfile.ZipFile(path) as package:
+            types = content_types(package)
+            if _DOCX_FONT_TABLE not in types.values():
+                return True
+            for name, kind in types.items():
+                if kind not in (_DOCX_FONT_TABLE, _DOCX_STYLES):
+                    continue
+                with package.open(name) as stream:
+                    for element in iter_elements(stream, frozenset(_DOCX_FONT_NAMES)):
+                        names = _attr_values(element.attrs, _DOCX_FONT_NAMES[element.name])
+                        if fonts_encoding(names) == "zawgyi":
+                            return True
+        return False
+
+    def _rules(
+        self, package: zipfile.ZipFile, hints: bool, unicode_font: Optional[str]
+    ) -> Callable[[str, str], Optional[PartRule]]:
+        if not hints and unicode_font is None:
+            return super()._rules(package, hints, unicode_font)
+        rename = None if unicode_font is None else partial(rename_zawgyi_font, replacement=unicode_font)
+        names = None if rename is None else _DOCX_FONT_NAMES
+        fonts = FontRule(names=names, rename=rename)
+        if hints:
+            types = content_types(package)
+            styles: dict[str, Encoding] = {}
+            default = None
+            part = next((name for name, kind in types.items() if kind == _DOCX_STYLES), None)
+            if part is not None:
+                with package.open(part) as stream:
+                    styles, default = _docx_styles(stream)
+            fonts = replace(
+                fonts,
+                scopes=frozenset({"p", "r"}),
+                elements=_DOCX_HINT_ELEMENTS,
+                hint=_docx_hint(styles),
+                default=default,
+            )
+        rules = {kind: replace(rule, fonts=fonts) for kind, rule in self.part_rules.items()}
+        if rename is not None:
+            rules[_DOCX_STYLES] = rules[_DOCX_FONT_TABLE] = PartRule(
+                fonts=FontRule(names=names, rename=rename)
+            )
+        return lambda name, kind: rules.get(kind)
 
     @staticmethod
     def can_handle(path: Path) -> bool:
         return path.suffix.lower() in DOCX_EXTENSIONS
 
 
+class PptxHandler(_OoxmlTextHandler):
+    """Handler for Microsoft PowerPoint .pptx files.
+
+    Slides, layouts, masters and notes are rewritten ``<a:t>`` by ``<a:t>``;
+    see ``para.ooxml``.
+    """
+
+    part_rules = PPTX_PART_RULES
+    main_types = frozenset({_PPTX_SLIDE})
+
+    @staticmethod
+    def can_handle(path: Path) -> bool:
+        return path.suffix.lower() in PPTX_EXTENSIONS
+
+
+def _xlsx_parts(package: zipfile.ZipFile) -> tuple[list[str], Optional[str]]:
+    """Return a workbook's worksheet part names in tab order and its shared strings part."""
+    types = content_types(package)
+    workbook = next((name for name, kind in types.items() if kind in _XLSX_MAIN_TYPES), None)
+    shared = next((name for name, kind in types.items() if kind == _XLSX_SHARED_STRINGS), None)
+    if workbook is None:
+        return [], shared
+    folder, _, base = workbook.rpartition("/")
+    rels = posixpath.join(folder, "_rels", f"{base}.rels")
+    targets: dict[str, str] = {}
+    if rels in package.NameToInfo:
+        with package.open(rels) as stream:
+            for rel in iter_elements(stream, frozenset({"Relationship"})):
+                target = rel.attrs.get("Target", "")
+                if target.startswith("/"):
+                    targets[rel.attrs.get("Id", "")] = target.lstrip("/")
+                else:
+                    targets[rel.attrs.get("Id", "")] = posixpath.normpath(posixpath.join(folder, target))
+    sheets = []
+    with package.open(workbook) as stream:
+        for sheet in iter_elements(stream, frozenset({"sheet"})):
+            rel = next((value for key, value in sheet.attrs.items() if key.rpartition(":")[2] == "id"), "")
+            part = targets.get(rel)
+            if part is not None and types.get(part) == _XLSX_WORKSHEET:
+                sheets.append(part)
+    return sheets, shared
+
+
+def _xlsx_shared_strings(stream: BinaryIO) -> Iterator[str]:
+    """Yield each shared string, rich text runs joined and phonetic runs skipped."""
+    parts: list[str] = []
+    for element in iter_elements(stream, frozenset({"si", "t"})):
+        if element.name == "si":
+            yield "".join(parts)
+            parts = []
+        elif element.parent != "rPh":
+            parts.append(element.text)
+
+
+def _xlsx_cell_hints(stream: BinaryIO) -> list[Optional[Encoding]]:
+    """Return the font hint of each cell format (``<xf>`` of ``<cellXfs>``) in a styles part."""
+    fonts: list[Optional[Encoding]] = []
+    formats: list[Optional[Encoding]] = []
+    name = None
+    for element in iter_elements(stream, frozenset({"name", "font", "xf"})):
+        if element.name == "name":
+            if element.parent == "font":
+                name = element.attrs.get("val")
+        elif element.name == "font":
+            if element.parent == "fonts":
+                fonts.append(None if name is None else font_encoding(name))
+            name = None
+        elif element.parent == "cellXfs":
+            font = element.attrs.get("fontId", "0")
+            index = int(font) if font.isdigit() else 0
+            formats.append(fonts[index] if index < len(fonts) else None)
+    return formats
+
+
+def _xlsx_cell_hint(
+    formats: Sequence[Optional[Encoding]], attrs: Mapping[str, str]
+) -> Optional[Encoding]:
+    """Return the font hint of a ``<c>`` cell, by its format index."""
+    style = attrs.get("s", "0")
+    index = int(style) if style.isdigit() else 0
+    return formats[index] if index < len(formats) else None
+
+
+def _xlsx_run_hint(local: str, attrs: Mapping[str, str]) -> Optional[Encoding]:
+    """``FontRule.hint`` for the ``<rFont>`` of a rich text run."""
+    return font_encoding(attrs.get("val", "")) if local == "rFont" else None
+
+
+def _xlsx_shared_hints(
+    package: zipfile.ZipFile, sheets: Iterable[str], formats: Sequence[Optional[Encoding]]
+) -> dict[int, Optional[Encoding]]:
+    """Return the font hint of each shared string, from the cells that show it.
+
+    A string shown in cells with different hints has none.
+    """
+    hints: dict[int, Optional[Encoding]] = {}
+    for sheet in sheets:
+        with package.open(sheet) as stream:
+            value = None
+            for element in iter_elements(stream, frozenset({"c", "v"})):
+                if element.name == "v":
+                    value = element.text
+                    continue
+                if element.attrs.get("t") == "s" and value is not None and value.strip().isdigit():
+                    index = int(value)
+                    hint = _xlsx_cell_hint(formats, element.attrs)
+                    hints[index] = hint if hints.get(index, hint) == hint else None
+                value = None
+    return hints
+
+
+def _memoized(converter: Callable[[str], str]) -> Callable[[str], str]:
+    """Return ``converter`` converting each distinct string once, within the memo's bounds."""
+    seen = LRUCache(XLSX_MEMO_ENTRIES, XLSX_MEMO_CHARS)
+
+    def convert_once(text: str) -> str:
+        converted = seen.get(text)
+        if converted is None:
+            converted = converter(text)
+            seen.put(text, converted)
+        return converted
+
+    return convert_once
+
+
 class XlsxHandler(FileHandler):
-    """Handler for Microsoft Excel .xlsx files."""
+    """Handler for Microsoft Excel .xlsx files.
 
-    def __init__(self):
-        if openpyxl is None:
-            raise ImportError(
-                "openpyxl is required for .xlsx support. "
-                "Install with: pip install paraencoder[office]"
-            )
+    Both reading and conversion work on the package's XML directly (see
+    ``para.ooxml``) and need no third-party library.
+    """
 
     def read(self, path: Path) -> str:
-        wb = openpyxl.load_workbook(str(path), data_only=True)
-        lines = []
-        for sheet in wb.worksheets:
-            for row in sheet.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str):
-                        lines.append(cell.value)
-        return "\n".join(lines)
+        return "\n".join(self.iter_text(path))
+
+    def iter_text(
+        self,
+        path: Path,
+        *,
+        max_sheets: Optional[int] = None,
+        max_cells: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Lazily yield the non-empty string values of a workbook's cells.
+
+        Sheets are read in tab order and cells in file order, one chunk of
+        XML at a time.  Shared strings are parsed only as far as the highest
+        index referenced so far, so stopping early (or passing limits) keeps
+        both time and memory proportional to what was read.
+
+        Args:
+            path: Workbook to read.
+            max_sheets: Read at most this many worksheets.
+            max_cells: Stop after yielding this many strings.
+        """
+        if max_cells is not None and max_cells <= 0:
+            return
+        with zipfile.ZipFile(path) as package:
+            sheets, shared = _xlsx_parts(package)
+            with ExitStack() as stack:
+                strings: Iterator[str] = iter(())
+                if shared is not None:
+                    strings = _xlsx_shared_strings(stack.enter_context(package.open(shared)))
+                table: list[str] = []
+                count = 0
+                for sheet in sheets[:max_sheets]:
+                    with package.open(sheet) as stream:
+                        value: Optional[str] = None
+                        parts: list[str] = []
+                        for element in iter_elements(stream, _XLSX_CELL_ELEMENTS):
+                            if element.name == "v":
+                                value = element.text
+                                continue
+                            if element.name == "t":
+                                if element.parent != "rPh":
+                                    parts.append(element.text)
+                                continue
+                            kind = element.attrs.get("t")
+                            string = None
+                            if kind == "s" and value is not None and value.strip().isdigit():
+                                index = int(value)
+                                if index >= len(table):
+                                    table.extend(itertools.islice(strings, index + 1 - len(table)))
+                                string = table[index] if index < len(table) else None
+                            elif kind == "inlineStr":
+                                string = "".join(parts)
+                            elif kind == "str":
+                                string = value
+                            value = None
+                            parts = []
+                            if string:
+                                yield string
+                                count += 1
+                                if count == max_cells:
+                                    return
 
     def convert(
         self,
         input_path: Path,
         output_path: Path,
         converter: Callable[[str], str],
+        *,
+        hinted: Optional[Mapping[str, Converters]] = None,
+        unicode_font: Optional[str] = None,
     ) -> None:
-        # Load workbook preserving everything (images, charts, etc.)
-        wb = openpyxl.load_workbook(str(input_path))
-
-        for sheet in wb.worksheets:
-            # Convert regular cell values
-            for row in sheet.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str):
-                        cell.value = converter(cell.value)
-
-            # Convert merged cell values (they're stored in the top-left cell)
-            for merged_range in sheet.merged_cells.ranges:
-                cell = sheet.cell(merged_range.min_row, merged_range.min_col)
-                if cell.value and isinstance(cell.value, str):
-                    cell.value = converter(cell.value)
-
-            # Convert comments
-            for row in sheet.iter_rows():
-                for cell in row:
-                    if cell.comment and cell.comment.text:
-                        cell.comment.text = converter(cell.comment.text)
-
-            # Convert header/footer
-            if sheet.oddHeader and sheet.oddHeader.center:
-                if sheet.oddHeader.center.text:
-                    sheet.oddHeader.center.text = converter(sheet.oddHeader.center.text)
-            if sheet.oddHeader and sheet.oddHeader.left:
-                if sheet.oddHeader.left.text:
-                    sheet.oddHeader.left.text = converter(sheet.oddHeader.left.text)
-            if sheet.oddHeader and sheet.oddHeader.right:
-                if sheet.oddHeader.right.text:
-                    sheet.oddHeader.right.text = converter(sheet.oddHeader.right.text)
-            if sheet.oddFooter and sheet.oddFooter.center:
-                if sheet.oddFooter.center.text:
-                    sheet.oddFooter.center.text = converter(sheet.oddFooter.center.text)
-
-        # Convert sheet names
-        for sheet in wb.worksheets:
-            original_title = sheet.title
-            converted_title = converter(original_title)
-            if converted_title != original_title:
-                sheet.title = converted_title
-
-        wb.save(str(output_path))
+        """Convert shared strings, inline strings, comments, headers, footers and sheet names.
+
+        Each distinct string is converted once; every other zip member and
+        all markup are copied unchanged.  The output is written atomically,
+        so ``output_path`` may be ``input_path``.
+
+        Args:
+            input_path: Workbook to convert.
+            output_path: Where to write the converted workbook.
+            converter: Applied to text without a font hint.
+            hinted: Font hint to the converters for text in such a font, as
+                in ``DocxHandler.convert``: a cell's hint is that of its
+                format's font, a rich text run's that of its own font, and a
+                shared string's that of the cells showing it.
+            unicode_font: Rename the Zawgyi fonts the workbook names to this font.
+        """
+        if hinted is not None:
+            hinted = {hint: (_memoized(convert), runs) for hint, (convert, runs) in hinted.items()}
+        with open(input_path, "rb") as src, atomic_write_bytes(output_path) as dst:
+            with zipfile.ZipFile(src) as package:
+                rules = self._rules(package, hinted is not None, unicode_font)
+            rewrite_package(
+                src, dst, lambda name, kind: rules.get(kind), _memoized(converter), hinted=hinted
+            )
+
+    def _rules(
+        self, package: zipfile.ZipFile, hints: bool, unicode_font: Optional[str]
+    ) -> Mapping[str, PartRule]:
+        """Return the rule for each part of ``package`` by content type."""
+        if not hints and unicode_font is None:
+            return XLSX_PART_RULES
+        rename = None if unicode_font is None else partial(rename_zawgyi_font, replacement=unicode_font)
+        fonts = FontRule(names=None if rename is None else _XLSX_FONT_NAMES, rename=rename)
+        rules = {kind: replace(rule, fonts=fonts) for kind, rule in XLSX_PART_RULES.items()}
+        if rename is not None:
+            rules[_XLSX_STYLES] = PartRule(fonts=fonts)
+        if not hints:
+            return rules
+        types = content_types(package)
+        formats: list[Optional[Encoding]] = []
+        styles = next((name for name, kind in types.items() if kind == _XLSX_STYLES), None)
+        if styles is not None:
+            with package.open(styles) as stream:
+                formats = _xlsx_cell_hints(stream)
+
+        def cell_hint(local: str, attrs: Mapping[str, str]) -> Optional[Encoding]:
+            return _xlsx_cell_hint(formats, attrs) if local == "c" else _xlsx_run_hint(local, attrs)
+
+        rules[_XLSX_WORKSHEET] = replace(
+            rules[_XLSX_WORKSHEET],
+            fonts=replace(
+                fonts, scopes=frozenset({"c", "r"}), elements=frozenset({"c", "rFont"}), hint=cell_hint
+            ),
+        )
+        rules[_XLSX_COMMENTS] = replace(
+            rules[_XLSX_COMMENTS],
+            fonts=replace(
+                fonts, scopes=frozenset({"r"}), elements=frozenset({"rFont"}), hint=_xlsx_run_hint
+            ),
+        )
+        # Every cell shows its shared string with the same hint unless the
+        # formats disagree; only then are the worksheets read first.
+        found = set(formats)
+        default = found.pop() if len(found) == 1 else None
+        shared: Mapping[int, Optional[Encoding]] = {}
+        if len(found) > 1:
+            shared = _xlsx_shared_hints(package, _xlsx_parts(package)[0], formats)
+        counter = itertools.count()
+
+        def string_hint(local: str, attrs: Mapping[str, str]) -> Optional[Encoding]:
+            return shared.get(next(counter)) if local == "si" else _xlsx_run_hint(local, attrs)
+
+        rules[_XLSX_SHARED_STRINGS] = replace(
+            rules[_XLSX_SHARED_STRINGS],
+            fonts=replace(
+                fonts,
+                scopes=frozenset({"si", "r"}),
+                elements=frozenset({"si", "rFont"}),
+                hint=string_hint,
+                default=default,
+            ),
+        )
+        return rules
+
+    def uses_zawgyi_fonts(self, path: Path) -> bool:
+        """True when the styles name a Zawgyi font, or there are no styles."""
+        with zipfile.ZipFile(path) as package:
+            types = content_types(package)
+            styles = next((name for name, kind in types.items() if kind == _XLSX_STYLES), None)
+            if styles is None:
+                return True
+            with package.open(styles) as stream:
+                return "zawgyi" in _xlsx_cell_hints(stream)
 
     @staticmethod
     def can_handle(path: Path) -> bool:
         return path.suffix.lower() in XLSX_EXTENSIONS
 
 
-class OdtHandler(FileHandler):
-    """Handler for OpenDocument .odt files."""
+def _odt_styles(
+    package: zipfile.ZipFile,
+) -> tuple[dict[str, dict[str, Encoding]], Optional[Encoding], bool]:
+    """Read the font hints of an OpenDocument text's styles.
+
+    Returns the hint of each style by name for each of ``ODT_PART_RULES``
+    (automatic styles apply to their own part only), inherited through
+    ``parent-style-name``; that of text with no style, from the default
+    paragraph style; and whether a Zawgyi font is declared or used.
+    """
+    faces: dict[str, str] = {}
+    # Own hints and parents of the common styles (under ""), then of each part's automatic ones.
+    own: dict[str, dict[str, Optional[Encoding]]] = {"": {}}
+    parents: dict[str, dict[str, str]] = {"": {}}
+    default = None
+    zawgyi = False
+    fonts: Optional[Encoding] = None
+    for part in ODT_PART_RULES:
+        own[part], parents[part] = {}, {}
+        if part not in package.NameToInfo:
+            continue
+        with package.open(part) as stream:
+            for element in iter_elements(stream, _ODT_STYLE_ELEMENTS):
+                attrs = element.attrs
+                if element.name == "font-face":
+                    face = _attr(attrs, "name")
+                    family = _attr(attrs, "font-family") or face
+                    if face is not None and family is not None:
+                        faces[face] = family
+                        zawgyi = zawgyi or fonts_encoding((face, family)) == "zawgyi"
+                elif element.name == "text-properties":
+                    if element.parent in ("style", "default-style"):
+                        names = [faces.get(face, face) for face in _attr_values(attrs, _ODT_FONT_FACES)]
+                        fonts = fonts_encoding(names + _attr_values(attrs, _ODT_FONT_FAMILIES))
+                        zawgyi = zawgyi or fonts == "zawgyi"
+                elif element.name == "style":
+                    scope = part if element.parent == "automatic-styles" else ""
+                    style = _attr(attrs, "name")
+                    if style is not None:
+                        own[scope][style] = fonts
+                        parent = _attr(attrs, "parent-style-name")
+                        if parent is not None:
+                            parents[scope][style] = parent
+                    fonts = None
+                elif element.name == "default-style":
+                    if _attr(attrs, "family") == "paragraph":
+                        default = fonts
+                    fonts = None
+                elif part == "content.xml":
+                    # The body follows the automatic styles.
+                    break
+    styles = {
+        part: _resolve_styles({**own[""], **own[part]}, {**parents[""], **parents[part]})
+        for part in ODT_PART_RULES
+    }
+    return styles, default, zawgyi
 
-    def __init__(self):
-        if odf_load is None:
-            raise ImportError(
-                "odfpy is required for .odt support. "
-                "Install with: pip install paraencoder[office]"
-            )
 
-    def _get_text_elements(self, element):
-        """Recursively get all text elements."""
-        from odf.text import P, H, Span
-        from odf.element import Text
-
-        elements = []
-        for child in element.childNodes:
-            if isinstance(child, (P, H, Span)):
-                elements.extend(self._get_text_elements(child))
-            elif isinstance(child, Text):
-                elements.append(child)
-            elif hasattr(child, 'childNodes'):
-                elements.extend(self._get_text_elements(child))
-        return elements
+def _odt_hint(
+    styles: Mapping[str, Encoding], local: str, attrs: Mapping[str, str]
+) -> Optional[Encoding]:
+    """``FontRule.hint`` for a paragraph, heading or span, by its style."""
+    return styles.get(_attr(attrs, "style-name") or "")
+
+
+class OdtHandler(FileHandler):
+    """Handler for OpenDocument .odt files.
+
+    Paragraphs and headings in the body (``content.xml``) and in headers and
+    footers (``styles.xml``) are rewritten text node by text node, spans and
+    other markup left in place; see ``para.ooxml``.  No third-party library
+    is needed.
+    """
 
     def read(self, path: Path) -> str:
-        doc = odf_load(str(path))
-        text_content = []
-        for para in doc.getElementsByType(odf_text.P):
-            text_content.append(str(para))
-        return "\n".join(text_content)
+        return "\n".join(self.iter_text(path))
+
+    def iter_text(self, path: Path) -> Iterator[str]:
+        """Lazily yield the text of each non-empty paragraph and heading, body first."""
+        with zipfile.ZipFile(path) as package:
+            for name in ODT_PART_RULES:
+                if name not in package.NameToInfo:
+                    continue
+                with package.open(name) as stream:
+                    for text in iter_blocks(stream, _ODT_PARAGRAPHS.elements, _ODT_SPACES):
+                        if text:
+                            yield text
 
     def convert(
         self,
         input_path: Path,
         output_path: Path,
         converter: Callable[[str], str],
+        convert_runs: Optional[Callable[[list[str]], list[str]]] = None,
+        *,
+        hinted: Optional[Mapping[str, Converters]] = None,
+        unicode_font: Optional[str] = None,
     ) -> None:
-        doc = odf_load(str(input_path))
+        """Convert the text of every paragraph and heading, copying everything else unchanged.
 
-        # Get all text elements and convert them
-        text_elements = self._get_text_elements(doc.body)
-        for text_node in text_elements:
-            if text_node.data:
-                text_node.data = converter(text_node.data)
+        ``convert_runs`` converts the text nodes of each paragraph together,
+        and ``hinted`` and ``unicode_font`` act on the fonts of paragraph,
+        heading and span styles, as in ``_OoxmlTextHandler.convert``.  The
+        output is written atomically, so ``output_path`` may be ``input_path``.
+        """
+        rules: Mapping[str, PartRule] = ODT_PART_RULES
+        with open(input_path, "rb") as src, atomic_write_bytes(output_path) as dst:
+            if hinted is not None or unicode_font is not None:
+                with zipfile.ZipFile(src) as package:
+                    rules = self._rules(package, hinted is not None, unicode_font)
+            rewrite_package(
+                src, dst, lambda name, kind: rules.get(name), converter, convert_runs, hinted
+            )
+
+    @staticmethod
+    def _rules(
+        package: zipfile.ZipFile, hints: bool, unicode_font: Optional[str]
+    ) -> dict[str, PartRule]:
+        """Return the rule for each part of ``package`` by name, with font hints and renames."""
+        rename = None if unicode_font is None else partial(rename_zawgyi_font, replacement=unicode_font)
+        fonts = FontRule(names=None if rename is None else _ODT_FONT_NAMES, rename=rename)
+        if not hints:
+            return {name: replace(rule, fonts=fonts) for name, rule in ODT_PART_RULES.items()}
+        styles, default, _ = _odt_styles(package)
+        return {
+            name: replace(
+                rule,
+                fonts=replace(
+                    fonts,
+                    scopes=_ODT_STYLED,
+                    elements=_ODT_STYLED,
+                    hint=partial(_odt_hint, styles[name]),
+                    default=default,
+                ),
+            )
+            for name, rule in ODT_PART_RULES.items()
+        }
 
-        doc.save(str(output_path))
+    def uses_zawgyi_fonts(self, path: Path) -> bool:
+        """True when a Zawgyi font is declared or named by a style."""
+        with zipfile.ZipFile(path) as package:
+            return _odt_styles(package)[2]
 
     @staticmethod
     def can_handle(path: Path) -> bool:
@@ -299,6 +1078,8 @@ def get_handler(path: Path) -> FileHandler:
 
     if suffix in DOCX_EXTENSIONS:
         return DocxHandler()
+    elif suffix in PPTX_EXTENSIONS:
+        return PptxHandler()
     elif suffix in XLSX_EXTENSIONS:
         return XlsxHandler()
     elif suffix in ODT_EXTENSIONS:
@@ -314,6 +1095,7 @@ def get_supported_extensions() -> set[str]:
     """Get all supported file extensions."""
     extensions = set(PLAIN_TEXT_EXTENSIONS)
     extensions.update(DOCX_EXTENSIONS)
+    extensions.update(PPTX_EXTENSIONS)
     extensions.update(XLSX_EXTENSIONS)
     extensions.update(ODT_EXTENSIONS)
     return extensions
@@ -2,24 +2,92 @@
 
 from __future__ import annotations
 
+import shutil
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Literal, Optional
 
-from para.convert import zg_to_unicode
-from para.handlers import get_handler, is_supported, PlainTextHandler
+from para.batch import parallel_imap
+from para.convert import (
+    can_cut,
+    zg_to_unicode,
+    zg_to_unicode_runs,
+    zg_to_unicode_stream,
+)
+from para.detect import detect_encoding, detect_encoding_chunks, detect_encoding_fragments, Encoding
+from para.handlers import (
+    atomic_write_bytes,
+    atomic_write_text,
+    DocxHandler,
+    get_handler,
+    get_supported_extensions,
+    is_supported,
+    OdtHandler,
+    PlainTextHandler,
+    PptxHandler,
+    READ_CHUNK_CHARS,
+    XlsxHandler,
+)
+from para.manifest import current_entry, file_sha256, Manifest, ManifestEntry, rules_fingerprint
 
 
 DEFAULT_ENCODING = "utf-8"
 
+Detection = Literal["document", "fragment"]
+
+# Characters of a document's text scored for its shared verdict.
+DOCUMENT_DETECT_CHARS = 1 << 16
+
 
 def read_text(path: str, *, encoding: str = DEFAULT_ENCODING) -> str:
     """Read text from a file. For plain text files only."""
     return Path(path).read_text(encoding=encoding)
 
 
+def read_document_text(path: str, *, max_chars: Optional[int] = None) -> str:
+    """Read the text of any supported file, one line per text piece (cell, paragraph, ...).
+
+    With ``max_chars``, reading stops once about that many characters are
+    collected; handlers that read lazily (such as .xlsx) then parse only as
+    much of the file as needed.  Plain text is read with ``DEFAULT_ENCODING``.
+    """
+    pieces = []
+    size = 0
+    for piece in get_handler(Path(path)).iter_text(Path(path)):
+        pieces.append(piece)
+        size += len(piece) + 1
+        if max_chars is not None and size > max_chars:
+            break
+    return "\n".join(pieces)
+
+
+def detect_document_encoding(path: str, *, max_chars: Optional[int] = DOCUMENT_DETECT_CHARS) -> Encoding:
+    """Return one verdict for a whole document, from scores summed over its text pieces.
+
+    Only about ``max_chars`` characters from the start of the document are
+    read (``None`` reads everything); see ``detect_encoding_fragments``.
+    Plain text is read with ``DEFAULT_ENCODING``.
+    """
+    with closing(get_handler(Path(path)).iter_text(Path(path))) as pieces:
+        return detect_encoding_fragments(pieces, max_chars=max_chars)
+
+
+def _fragment_is_zawgyi(text: str, fallback: Encoding) -> bool:
+    verdict = detect_encoding(text)
+    return (fallback if verdict == "unknown" else verdict) == "zawgyi"
+
+
+def _unchanged(text: str) -> str:
+    return text
+
+
 def write_text(path: str, data: str, *, encoding: str = DEFAULT_ENCODING) -> None:
-    """Write text to a file. For plain text files only."""
-    Path(path).write_text(data, encoding=encoding)
+    """Write text to a file atomically. For plain text files only."""
+    with atomic_write_text(Path(path), encoding=encoding) as stream:
+        stream.write(data)
 
 
 def convert_file(
@@ -29,20 +97,85 @@ def convert_file(
     assume_zawgyi: bool = False,
     normalize: bool = True,
     encoding: str = DEFAULT_ENCODING,
-) -> str:
+    return_text: bool = True,
+    jobs: Optional[int] = 1,
+    detection: Detection = "document",
+    font_hints: bool = True,
+    unicode_font: Optional[str] = None,
+) -> Optional[str]:
     """
     Convert a file from Zawgyi to Unicode and write the result.
 
     Supports multiple file formats:
     - Plain text files (.txt, .md, .csv, .json, .xml, .html, etc.)
-    - Microsoft Word (.docx) - requires: pip install paraencoder[office]
-    - Microsoft Excel (.xlsx) - requires: pip install paraencoder[office]
-    - OpenDocument (.odt) - requires: pip install paraencoder[office]
+    - Microsoft Word (.docx), Excel (.xlsx) and PowerPoint (.pptx)
+    - OpenDocument (.odt)
 
     Returns the converted text. When ``output_path`` is None for plain text
     files, the caller can capture the returned string. For binary formats
     like .docx and .xlsx, output_path is required.
+
+    With ``return_text=False`` nothing is returned: plain text is then
+    streamed from input to output in bounded memory, and binary formats skip
+    re-reading the converted file.  A first streaming pass scores the whole
+    text file, so the output is the same as converting it in one piece.
+
+    ``jobs`` other than 1 (``None`` for one per CPU) converts a plain text
+    file to ``output_path`` in parallel when ``return_text`` is False: the
+    file is memory-mapped, split at line breaks no rule reads across, and
+    the ranges are converted on a process pool and written in order.  The
+    output is the same as the serial one.
+
+    Other formats are detected once per document (``detection="document"``):
+    scores are summed over the start of its text (``DOCUMENT_DETECT_CHARS``)
+    and the verdict applies to every cell, run and node.  A document that is
+    not Zawgyi is copied unchanged without being rewritten.
+    ``detection="fragment"`` lets each piece decide on its own, falling back
+    to the document verdict when its own text is inconclusive; use it for
+    documents that mix Zawgyi and Unicode.
+
+    With ``font_hints`` (the default), Word, Excel and OpenDocument text set
+    in a known Zawgyi font is converted and text in a known Unicode font is
+    left as is, whatever the detector says; only text in other fonts is
+    detected (see ``para.fonts``).  ``assume_zawgyi`` converts everything
+    regardless.  ``unicode_font`` renames the Zawgyi fonts such a document
+    names to that font.
+    """
+    return _convert_file(
+        input_path=input_path,
+        output_path=output_path,
+        assume_zawgyi=assume_zawgyi,
+        normalize=normalize,
+        encoding=encoding,
+        return_text=return_text,
+        jobs=jobs,
+        detection=detection,
+        font_hints=font_hints,
+        unicode_font=unicode_font,
+    )[0]
+
+
+def _convert_file(
+    *,
+    input_path: str,
+    output_path: Optional[str],
+    assume_zawgyi: bool,
+    normalize: bool,
+    encoding: str,
+    return_text: bool,
+    jobs: Optional[int],
+    detection: Detection,
+    font_hints: bool,
+    unicode_font: Optional[str],
+) -> tuple[Optional[str], Optional[Encoding]]:
+    """``convert_file``, also returning the verdict the file was converted on.
+
+    The verdict is None when the rules may have run regardless of it: with
+    ``assume_zawgyi``, and for documents that are not Zawgyi but were
+    detected per fragment or have text in Zawgyi fonts.
     """
+    if detection not in ("document", "fragment"):
+        raise ValueError(f"unknown detection mode: {detection!r}")
     input_p = Path(input_path)
     handler = get_handler(input_p)
 
@@ -50,20 +183,314 @@ def convert_file(
     def converter(text: str) -> str:
         return zg_to_unicode(text, normalize=normalize, force=assume_zawgyi)
 
+    def convert_runs(runs: list[str]) -> list[str]:
+        return zg_to_unicode_runs(runs, normalize=normalize, force=assume_zawgyi)
+
     # For plain text, we can return the string
     if isinstance(handler, PlainTextHandler):
-        data = handler.read(input_p, encoding=encoding)
-        converted = converter(data)
+        if output_path and not return_text:
+            # A first pass scores the whole file, so the streamed output is
+            # what converting its text in one piece would give.
+            verdict = None if assume_zawgyi else _file_encoding(input_p, encoding)
+            if verdict not in (None, "zawgyi"):
+                handler.convert(
+                    input_p, Path(output_path), converter, encoding=encoding, stream_converter=_unchanged
+                )
+                return None, verdict
+            if jobs != 1 and handler.can_split(encoding):
+                handler.convert_ranges(
+                    input_p,
+                    Path(output_path),
+                    partial(zg_to_unicode, normalize=normalize, force=True),
+                    can_cut,
+                    encoding=encoding,
+                    workers=jobs,
+                    preload=("para.convert",),
+                )
+                return None, verdict
+            handler.convert(
+                input_p,
+                Path(output_path),
+                converter,
+                encoding=encoding,
+                stream_converter=partial(zg_to_unicode_stream, normalize=normalize, force=True),
+            )
+            return None, verdict
+        converted = handler.read(input_p, encoding=encoding)
+        verdict = None if assume_zawgyi else detect_encoding(converted)
+        if verdict in (None, "zawgyi"):
+            converted = zg_to_unicode(converted, normalize=normalize, force=True)
         if output_path:
-            Path(output_path).write_text(converted, encoding=encoding)
-        return converted
+            write_text(output_path, converted, encoding=encoding)
+        return converted, verdict
     else:
         # Binary formats require output path
         if not output_path:
             output_path = input_path  # Overwrite in place
 
-        handler.convert(input_p, Path(output_path), converter)
+        forced = partial(zg_to_unicode, normalize=normalize, force=True)
+        forced_runs = partial(zg_to_unicode_runs, normalize=normalize, force=True)
+        hinted = {"zawgyi": (forced, forced_runs)} if font_hints and not assume_zawgyi else None
+        verdict = None if assume_zawgyi else detect_document_encoding(input_path)
+        if detection == "fragment" and not assume_zawgyi:
+            def converter(text: str) -> str:
+                if not _fragment_is_zawgyi(text, verdict):
+                    return text
+                return zg_to_unicode(text, normalize=normalize, force=True)
+
+            def convert_runs(runs: list[str]) -> list[str]:
+                if not _fragment_is_zawgyi("".join(runs), verdict):
+                    return list(runs)
+                return zg_to_unicode_runs(runs, normalize=normalize, force=True)
+
+        elif verdict in (None, "zawgyi"):
+            converter, convert_runs = forced, forced_runs
+        elif (hinted is not None or unicode_font is not None) and handler.uses_zawgyi_fonts(input_p):
+            # Only the text in Zawgyi fonts (and the font names) change.
+            converter, convert_runs = _unchanged, list
+        else:
+            # Nothing in a document that is not Zawgyi would change.
+            converter = convert_runs = None
+            if input_p.resolve() != Path(output_path).resolve():
+                with open(input_p, "rb") as source, atomic_write_bytes(Path(output_path)) as target:
+                    shutil.copyfileobj(source, target)
+
+        if converter is not None:
+            fonts = {"hinted": hinted, "unicode_font": unicode_font}
+            if isinstance(handler, (DocxHandler, OdtHandler, PptxHandler)):
+                handler.convert(input_p, Path(output_path), converter, convert_runs, **fonts)
+            elif isinstance(handler, XlsxHandler):
+                handler.convert(input_p, Path(output_path), converter, **fonts)
+            else:
+                handler.convert(input_p, Path(output_path), converter)
+        # Fragments or fonts may have sent text through the rules whatever the verdict.
+        acted_on = verdict if converter is None or verdict == "zawgyi" else None
+        if not return_text:
+            return None, acted_on
 
         # Return text content for display
-        return handler.read(Path(output_path))
+        return handler.read(Path(output_path)), acted_on
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """Outcome of converting one file in ``convert_tree``."""
+
+    input_path: str
+    output_path: str
+    format: str
+    bytes: int
+    # ``None`` on success, otherwise ``"ExceptionType: message"``.
+    error: Optional[str] = None
+    # True when a manifest showed the file unchanged since its last conversion.
+    skipped: bool = False
+    # What the manifest should record for this file, when one is kept.
+    entry: Optional[ManifestEntry] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
+
+@dataclass
+class TreeSummary:
+    """Totals for a ``convert_tree`` run."""
+
+    results: list[FileResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def converted(self) -> list[FileResult]:
+        return [result for result in self.results if result.ok and not result.skipped]
+
+    @property
+    def skipped(self) -> list[FileResult]:
+        return [result for result in self.results if result.skipped]
+
+    @property
+    def failed(self) -> list[FileResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def bytes(self) -> int:
+        """Input bytes of the converted files."""
+        return sum(result.bytes for result in self.converted)
+
+    @property
+    def formats(self) -> dict[str, int]:
+        """Converted files per extension."""
+        counts: dict[str, int] = {}
+        for result in self.converted:
+            counts[result.format] = counts.get(result.format, 0) + 1
+        return dict(sorted(counts.items()))
+
+
+def find_files(
+    root: str,
+    *,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+) -> list[Path]:
+    """
+    List the files under ``root`` that ``convert_tree`` would convert, sorted.
+
+    A file qualifies when its extension is in ``get_supported_extensions()``,
+    it matches one of the ``include`` globs (if any are given) and none of
+    the ``exclude`` globs.  Globs are matched against the path relative to
+    ``root`` with ``PurePath.match``, so ``*.docx`` matches at any depth.
+    """
+    base = Path(root)
+    extensions = get_supported_extensions()
+    include = list(include)
+    exclude = list(exclude)
+    found: list[Path] = []
+    for path in sorted(base.rglob("*")):
+        if path.suffix.lower() not in extensions or not path.is_file():
+            continue
+        relative = path.relative_to(base)
+        if include and not any(relative.match(pattern) for pattern in include):
+            continue
+        if any(relative.match(pattern) for pattern in exclude):
+            continue
+        found.append(path)
+    return found
+
+
+def _unchanged(chunks: Iterable[str]) -> Iterable[str]:
+    return chunks
+
+
+def _file_encoding(path: Path, encoding: str) -> Encoding:
+    """The verdict ``convert_file`` acts on for a plain text file, scored whole in chunks."""
+    with open(path, encoding=encoding) as stream:
+        return detect_encoding_chunks(iter(partial(stream.read, READ_CHUNK_CHARS), ""))
+
+
+def _convert_tree_file(
+    task: tuple[str, str, Optional[ManifestEntry]],
+    *,
+    assume_zawgyi: bool,
+    normalize: bool,
+    encoding: str,
+    rules: Optional[str],
+    detection: Detection,
+    font_hints: bool,
+    unicode_font: Optional[str],
+) -> FileResult:
+    input_path, output_path, previous = task
+    source = Path(input_path)
+    suffix = source.suffix.lower()
+    size = 0
+    try:
+        stat = source.stat()
+        size = stat.st_size
+        if rules is not None:
+            current = current_entry(
+                previous,
+                source,
+                output_path,
+                force=assume_zawgyi,
+                normalize=normalize,
+                rules=rules,
+                detection=detection,
+                font_hints=font_hints,
+                unicode_font=unicode_font,
+            )
+            if current is not None:
+                return FileResult(input_path, output_path, suffix, size, skipped=True, entry=current)
+            digest = file_sha256(source)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        _, verdict = _convert_file(
+            input_path=input_path,
+            output_path=output_path,
+            assume_zawgyi=assume_zawgyi,
+            normalize=normalize,
+            encoding=encoding,
+            return_text=False,
+            jobs=1,
+            detection=detection,
+            font_hints=font_hints,
+            unicode_font=unicode_font,
+        )
+        entry = None
+        if rules is not None:
+            entry = ManifestEntry(
+                input=input_path,
+                output=output_path,
+                size=size,
+                mtime_ns=stat.st_mtime_ns,
+                sha256=digest,
+                encoding=verdict,
+                rules=rules,
+                force=assume_zawgyi,
+                normalize=normalize,
+                detection=detection,
+                font_hints=font_hints,
+                unicode_font=unicode_font,
+            )
+    except Exception as exc:  # reported per file; the run goes on
+        return FileResult(input_path, output_path, suffix, size, f"{type(exc).__name__}: {exc}")
+    return FileResult(input_path, output_path, suffix, size, entry=entry)
+
+
+def convert_tree(
+    *,
+    input_dir: str,
+    output_dir: str,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    jobs: Optional[int] = None,
+    assume_zawgyi: bool = False,
+    normalize: bool = True,
+    encoding: str = DEFAULT_ENCODING,
+    manifest: Optional[str] = None,
+    detection: Detection = "document",
+    font_hints: bool = True,
+    unicode_font: Optional[str] = None,
+) -> TreeSummary:
+    """
+    Convert every supported file under ``input_dir`` into the same layout under ``output_dir``.
+
+    Files are selected by ``find_files`` and converted by ``convert_file``
+    on a pool of ``jobs`` worker processes (``None`` uses every CPU, ``1``
+    converts in this process), so the rules are compiled once per worker
+    rather than once per file.  A failing file is recorded in the summary
+    and does not stop the run.
+
+    With ``manifest`` (a JSON Lines path, see ``para.manifest``), files whose
+    size and mtime or content hash, options and output are unchanged since
+    they were recorded are skipped.  So are files that were passed through
+    unconverted when only ``para.rules.RULES_VERSION`` changed.  Each
+    finished file is recorded at once, so an interrupted run resumes where
+    it stopped.
+
+    ``detection``, ``font_hints`` and ``unicode_font`` are passed to ``convert_file``.
+    """
+    started = time.perf_counter()
+    base = Path(input_dir)
+    target = Path(output_dir)
+    book = Manifest(manifest) if manifest else None
+    tasks = []
+    for path in find_files(input_dir, include=include, exclude=exclude):
+        previous = book.get(str(path)) if book is not None else None
+        tasks.append((str(path), str(target / path.relative_to(base)), previous))
+    worker = partial(
+        _convert_tree_file,
+        assume_zawgyi=assume_zawgyi,
+        normalize=normalize,
+        encoding=encoding,
+        rules=rules_fingerprint() if book is not None else None,
+        detection=detection,
+        font_hints=font_hints,
+        unicode_font=unicode_font,
+    )
+    results: list[FileResult] = []
+    try:
+        for result in parallel_imap(worker, tasks, workers=jobs, chunksize=1, preload=(__name__, "para.convert")):
+            results.append(result)
+            if book is not None and result.entry is not None:
+                book.record(result.entry)
+    finally:
+        if book is not None:
+            book.close()
+    return TreeSummary(results, time.perf_counter() - started)
@@ -0,0 +1,174 @@
+"""Checkpointed record of batch-converted files.
+
+A manifest is a JSON Lines file with one entry per input file: its size,
+mtime and SHA-256, the detected encoding, the rule-set version and options it
+was converted with, and where the output went.  ``para.io.convert_tree``
+consults it to skip files that have not changed since the last run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+from para.handlers import atomic_write_text
+from para.convert import active_rule_set
+
+_HASH_CHUNK = 1 << 20
+
+
+def rules_fingerprint() -> str:
+    """Return the active rule set's version plus a digest of its rules.
+
+    The digest makes edits to the rules count as a new version even when
+    the version was not bumped; see ``para.rulesets.RuleSet.fingerprint``.
+    """
+    return active_rule_set().fingerprint
+
+
+def file_sha256(path: Path) -> str:
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for block in iter(lambda: stream.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """How one input file was last converted."""
+
+    input: str
+    output: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    # The verdict the file was converted on; None when the rules may have run
+    # whatever it was (forced conversion, or a document that is not Zawgyi
+    # but was detected per fragment or has text in Zawgyi fonts).
+    encoding: Optional[str]
+    rules: str
+    force: bool
+    normalize: bool
+    # How Office and OpenDocument files were detected; lines written before
+    # document-level detection existed were converted per fragment.
+    detection: str = "fragment"
+    # Whether Office and OpenDocument fonts decided their text (see
+    # ``para.fonts``), and the font Zawgyi fonts were renamed to.
+    font_hints: bool = False
+    unicode_font: Optional[str] = None
+
+    @property
+    def rule_dependent(self) -> bool:
+        """True unless the file was passed through without running the rules."""
+        return self.encoding not in ("unicode", "unknown")
+
+
+def current_entry(
+    previous: Optional[ManifestEntry],
+    path: Path,
+    output: str,
+    *,
+    force: bool,
+    normalize: bool,
+    rules: str,
+    detection: str = "document",
+    font_hints: bool = True,
+    unicode_font: Optional[str] = None,
+) -> Optional[ManifestEntry]:
+    """Return ``previous``, refreshed, if ``path`` needs no re-conversion; otherwise None.
+
+    A file is unchanged when its size matches and either its mtime or its
+    content hash does.  The entry is stale when the output is gone, the
+    options or output path differ, or the rules changed and the file went
+    through them.
+    """
+    if previous is None or previous.output != output:
+        return None
+    options = (force, normalize, detection, font_hints, unicode_font)
+    if (
+        previous.force, previous.normalize, previous.detection, previous.font_hints, previous.unicode_font
+    ) != options:
+        return None
+    if previous.rules != rules and previous.rule_dependent:
+        return None
+    if not Path(output).exists():
+        return None
+    stat = path.stat()
+    if stat.st_size != previous.size:
+        return None
+    if stat.st_mtime_ns != previous.mtime_ns and file_sha256(path) != previous.sha256:
+        return None
+    return replace(previous, mtime_ns=stat.st_mtime_ns, rules=rules)
+
+
+class Manifest:
+    """Append-only JSON Lines manifest keyed by input path.
+
+    ``record`` appends and flushes one line per changed entry, so an
+    interrupted run keeps every file it finished; a torn last line is
+    ignored on load.  ``close`` rewrites the file with one line per input.
+
+    Args:
+        path: Manifest file; created on the first ``record`` if missing.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: dict[str, ManifestEntry] = {}
+        self._stream = None
+        self._stale = 0
+        self._torn = False
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        data = self.path.read_text(encoding="utf-8")
+        self._torn = bool(data) and not data.endswith("\n")
+        lines = data.splitlines()
+        for line in lines:
+            try:
+                entry = ManifestEntry(**json.loads(line))
+            except (ValueError, TypeError):
+                continue
+            self.entries[entry.input] = entry
+        self._stale = len(lines) - len(self.entries)
+
+    def get(self, input_path: str) -> Optional[ManifestEntry]:
+        return self.entries.get(input_path)
+
+    def record(self, entry: ManifestEntry) -> None:
+        """Store ``entry`` and append it to the file unless it is already current."""
+        if self.entries.get(entry.input) == entry:
+            return
+        if entry.input in self.entries:
+            self._stale += 1
+        self.entries[entry.input] = entry
+        if self._stream is None:
+            self._stream = open(self.path, "a", encoding="utf-8")
+            if self._torn:
+                self._stream.write("\n")
+        self._stream.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+        self._stream.flush()
+
+    def close(self) -> None:
+        """Close the file, compacting it when it holds superseded lines."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._stale:
+            with atomic_write_text(self.path) as stream:
+                for entry in self.entries.values():
+                    stream.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+            self._stale = 0
+            self._torn = False
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,541 @@
+"""Streaming text rewriting for Office Open XML packages (.xlsx and friends).
+
+An OOXML file is a zip of XML parts.  ``rewrite_package`` copies it member
+by member; parts whose content type has a ``PartRule`` are fed through an
+incremental expat parser, and only the character data of the rule's text
+elements (and the rule's attributes) is spliced with converted text.
+Everything else, markup included, is copied byte for byte.  Other members
+keep their content and compression method, but are decompressed and
+compressed again in chunks: ``zipfile`` has no public call that copies
+compressed data as is.  Memory stays proportional to a read chunk plus the
+longest text node.  OpenDocument files are zips of XML parts too and go
+through the same code.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, Mapping, NamedTuple, Optional, Tuple
+from xml.parsers import expat
+
+# Parts are parsed and copied in reads of this many bytes.
+PART_CHUNK_BYTES = 1 << 20
+
+_CONTENT_TYPES = "[Content_Types].xml"
+
+# A start tag; attribute values may contain ``>``.
+_START_TAG = re.compile(r"<(?:[^>\"']|\"[^\"]*\"|'[^']*')*>")
+
+# A converter for single texts and one for the runs of a group.
+Converters = Tuple[Callable[[str], str], Callable[[list[str]], list[str]]]
+
+
+@dataclass(frozen=True)
+class FontRule:
+    """Font hints for the text of one kind of part, and the attributes that name fonts.
+
+    Args:
+        scopes: Local names of the elements a hint applies to (paragraphs,
+            runs, cells).  A scope starts with the hint of the scope around it.
+        elements: Local names of the elements passed to ``hint``, in
+            document order.
+        hint: Called with such an element's local name and attributes; a
+            result other than None becomes the hint of the innermost open
+            scope.  Text is converted according to the hint in effect where
+            it ends; see ``rewrite_package``.
+        default: Hint of text outside every scope.
+        names: Local element name to attribute local names that hold font names.
+        rename: Applied to each font name in ``names``; None leaves them.
+    """
+
+    scopes: frozenset[str] = frozenset()
+    elements: frozenset[str] = frozenset()
+    hint: Optional[Callable[[str, Mapping[str, str]], Optional[str]]] = None
+    default: Optional[str] = None
+    names: Optional[Mapping[str, frozenset[str]]] = None
+    rename: Optional[Callable[[str], str]] = None
+
+
+@dataclass(frozen=True)
+class PartRule:
+    """What to rewrite in one kind of XML part.
+
+    Args:
+        elements: Local names of elements whose text is converted.
+        within: When set, only text elements nested in one of these local
+            names are converted.
+        attributes: Local element name to attribute local names whose values
+            are converted.
+        group: Local name of the element (such as a paragraph) whose text
+            elements are converted together, as one list of runs.
+        breaks: Local names of elements (tabs, line breaks) that end a group
+            of runs early, so text on either side is converted apart.
+        mixed: The ``elements`` hold mixed content (as in OpenDocument): each
+            one is a group whose runs are its text nodes, at any depth, and
+            the markup between them stays in place.  A nested element of
+            ``elements`` (a note or text box) is a group of its own.
+        fonts: Font hints and font names in the part; see ``FontRule``.
+    """
+
+    elements: frozenset[str] = frozenset()
+    within: Optional[frozenset[str]] = None
+    attributes: Optional[Mapping[str, frozenset[str]]] = None
+    group: Optional[str] = None
+    breaks: frozenset[str] = frozenset()
+    mixed: bool = False
+    fonts: Optional[FontRule] = None
+
+
+def _local(name: str) -> str:
+    return name.rpartition(":")[2]
+
+
+# ``xml.sax.saxutils`` has these too, but importing it loads ``urllib``.
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _quoteattr(value: str) -> str:
+    """Quote an attribute value as ``xml.sax.saxutils.quoteattr`` does."""
+    value = _escape(value).replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;")
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"%s"' % value.replace('"', "&quot;")
+
+
+def content_types(package: zipfile.ZipFile) -> dict[str, str]:
+    """Map every member name of an OOXML package to its content type."""
+    defaults: dict[str, str] = {}
+    overrides: dict[str, str] = {}
+
+    def start(name: str, attrs: dict[str, str]) -> None:
+        if _local(name) == "Default":
+            defaults[attrs.get("Extension", "").lower()] = attrs.get("ContentType", "")
+        elif _local(name) == "Override":
+            overrides[attrs.get("PartName", "").lstrip("/")] = attrs.get("ContentType", "")
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.Parse(package.read(_CONTENT_TYPES), True)
+    return {
+        info.filename: overrides.get(info.filename)
+        or defaults.get(info.filename.rpartition(".")[2].lower(), "")
+        for info in package.infolist()
+    }
+
+
+def _part_encoding(head: bytes) -> str:
+    if head.startswith(b"\xff\xfe"):
+        return "utf-16-le"
+    if head.startswith(b"\xfe\xff"):
+        return "utf-16-be"
+    return "utf-8"
+
+
+class _PartRewriter:
+    """Splices converted text into one XML part as it streams through.
+
+    Byte offsets from expat locate each start tag; the content of a text
+    element runs from the end of its start tag to the start of its end tag.
+    Edits are queued by offset and applied as bytes are written out, and
+    input is held back only to the earliest text not yet converted: the
+    current text node, or the first run of each open group.
+    """
+
+    def __init__(
+        self,
+        rule: PartRule,
+        converter: Callable[[str], str],
+        convert_runs: Callable[[list[str]], list[str]],
+        write: Callable[[bytes], object],
+        hinted: Mapping[str, Converters],
+    ):
+        self.rule = rule
+        self.converter = converter
+        self.convert_runs = convert_runs
+        self.hinted = hinted
+        self.write = write
+        self.encoding = "utf-8"
+        self.parser = expat.ParserCreate()
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+        self.parser.CharacterDataHandler = self._text
+        if rule.mixed:
+            self.parser.CommentHandler = self._close_node
+            self.parser.ProcessingInstructionHandler = self._close_node
+            self.parser.StartCdataSectionHandler = self._start_cdata
+        self._held = bytearray()
+        self._base = 0
+        # A heap of (start, end, replacement): edits are queued out of order.
+        self._edits: list[tuple[int, int, bytes]] = []
+        self._depth = 0
+        # Depth of the enclosing ``within`` element; 0 when not required.
+        self._within_depth: Optional[int] = 0 if rule.within is None else None
+        self._text_depth: Optional[int] = None
+        self._content_start = 0
+        self._parts: list[str] = []
+        # Start of the text node being read, in ``mixed`` parts.
+        self._node_start: Optional[int] = None
+        # Open groups, innermost last: depth and runs as (start, end, text, hint).
+        self._groups: list[tuple[int, list[tuple[int, int, str, Optional[str]]]]] = []
+        # Open font scopes, innermost last: [depth, hint].
+        self._scopes: list[list] = [[0, rule.fonts.default if rule.fonts else None]]
+
+    def _start(self, name: str, attrs: dict[str, str]) -> None:
+        self._close_node()
+        self._depth += 1
+        local = _local(name)
+        fonts = self.rule.fonts
+        if fonts is not None:
+            if local in fonts.scopes:
+                self._scopes.append([self._depth, self._scopes[-1][1]])
+            if local in fonts.elements:
+                hint = fonts.hint(local, attrs)
+                if hint is not None:
+                    self._scopes[-1][1] = hint
+        if self._within_depth is None and local in self.rule.within:
+            self._within_depth = self._depth
+        selected = self._within_depth is not None and local in self.rule.elements
+        if local == self.rule.group or (selected and self.rule.mixed):
+            self._groups.append((self._depth, []))
+        elif self._groups and local in self.rule.breaks:
+            self._convert_group(self._groups[-1][1])
+        wanted = self.rule.attributes.get(local) if self.rule.attributes else None
+        renamed = fonts.names.get(local) if fonts is not None and fonts.rename and fonts.names else None
+        is_text = selected and self._text_depth is None and not self.rule.mixed
+        if not (wanted or renamed or is_text):
+            return
+        start = self.parser.CurrentByteIndex
+        end, tag = self._start_tag(start)
+        if is_text:
+            self._text_depth = self._depth
+            self._content_start = end
+            self._parts = []
+        if wanted or renamed:
+            self._rewrite_tag(start, end, tag, attrs, wanted or frozenset(), renamed or frozenset())
+
+    def _end(self, name: str) -> None:
+        self._close_node()
+        if self._text_depth == self._depth:
+            self._text_depth = None
+            text = "".join(self._parts)
+            run = (self._content_start, self.parser.CurrentByteIndex, text, self._scopes[-1][1])
+            if text and self._groups:
+                self._groups[-1][1].append(run)
+            elif text:
+                self._convert_group([run])
+        if self._groups and self._groups[-1][0] == self._depth:
+            self._convert_group(self._groups.pop()[1])
+        if self._within_depth == self._depth and self.rule.within is not None:
+            self._within_depth = None
+        if self._scopes[-1][0] == self._depth:
+            self._scopes.pop()
+        self._depth -= 1
+
+    def _text(self, data: str) -> None:
+        if self._text_depth is not None or self._node_start is not None:
+            self._parts.append(data)
+        elif self.rule.mixed and self._groups:
+            self._node_start = self.parser.CurrentByteIndex
+            self._parts = [data]
+
+    def _start_cdata(self) -> None:
+        # The section's markup belongs to the text node it starts.
+        if self._node_start is None and self._groups:
+            self._node_start = self.parser.CurrentByteIndex
+            self._parts = []
+
+    def _close_node(self, *_: object) -> None:
+        """End the ``mixed`` text node being read at the current event, adding it to its group."""
+        if self._node_start is None:
+            return
+        text = "".join(self._parts)
+        if text:
+            self._groups[-1][1].append(
+                (self._node_start, self.parser.CurrentByteIndex, text, self._scopes[-1][1])
+            )
+        self._node_start = None
+
+    def _convert_group(self, runs: list[tuple[int, int, str, Optional[str]]]) -> None:
+        """Convert runs, consecutive runs under the same font hint together."""
+        for hint, same in itertools.groupby(runs, key=lambda run: run[3]):
+            converters = (self.converter, self.convert_runs) if hint is None else self.hinted.get(hint)
+            if converters is None:
+                continue
+            same = list(same)
+            texts = [text for _, _, text, _ in same]
+            converted = converters[1](texts) if len(same) > 1 else [converters[0](texts[0])]
+            for (start, end, text, _), new in zip(same, converted):
+                if new != text:
+                    self._edit(start, end, _escape(new))
+        runs.clear()
+
+    def _start_tag(self, start: int) -> tuple[int, str]:
+        """Return the end offset and text of the start tag at ``start`` (already held)."""
+        size = 256
+        while True:
+            raw = bytes(self._held[start - self._base:start - self._base + size])
+            m = _START_TAG.match(raw.decode(self.encoding, errors="ignore"))
+            if m is not None:
+                return start + len(m.group().encode(self.encoding)), m.group()
+            if len(raw) < size:
+                raise ValueError(f"cannot find the end of the start tag at byte {start}")
+            size *= 4
+
+    def _rewrite_tag(
+        self,
+        start: int,
+        end: int,
+        tag: str,
+        attrs: dict[str, str],
+        wanted: frozenset[str],
+        renamed: frozenset[str],
+    ) -> None:
+        changed = tag
+        for key, value in attrs.items():
+            local = _local(key)
+            if local in renamed:
+                converted = self.rule.fonts.rename(value)
+            elif local in wanted:
+                converted = self.converter(value)
+            else:
+                continue
+            if converted != value:
+                pattern = re.compile(r"(\s%s\s*=\s*)(\"[^\"]*\"|'[^']*')" % re.escape(key))
+                changed = pattern.sub(lambda m: m.group(1) + _quoteattr(converted), changed, count=1)
+        if changed != tag:
+            self._edit(start, end, changed)
+
+    def _edit(self, start: int, end: int, replacement: str) -> None:
+        heapq.heappush(self._edits, (start, end, replacement.encode(self.encoding)))
+
+    def _flush(self, upto: int) -> None:
+        """Write out the input before ``upto``, applying queued edits that start there."""
+        while self._edits and self._edits[0][0] < upto:
+            start, end, data = heapq.heappop(self._edits)
+            self.write(bytes(self._held[:start - self._base]))
+            self.write(data)
+            del self._held[:end - self._base]
+            self._base = end
+        if upto > self._base:
+            self.write(bytes(self._held[:upto - self._base]))
+            del self._held[:upto - self._base]
+            self._base = upto
+
+    def _hold(self) -> int:
+        """Offset before which no edit can still be queued."""
+        pending = [runs[0][0] for _, runs in self._groups if runs]
+        if self._text_depth is not None:
+            pending.append(self._content_start)
+        if self._node_start is not None:
+            pending.append(self._node_start)
+        # Otherwise edits only start at tags expat has not reported yet.
+        return min(pending) if pending else self.parser.CurrentByteIndex
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        if not self._base and not self._held:
+            self.encoding = _part_encoding(data)
+        self._held += data
+        self.parser.Parse(data, final)
+        self._flush(self._base + len(self._held) if final else self._hold())
+
+
+def _copy_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    copy = zipfile.ZipInfo(info.filename, info.date_time)
+    copy.compress_type = info.compress_type
+    copy.comment = info.comment
+    copy.create_system = info.create_system
+    copy.external_attr = info.external_attr
+    copy.internal_attr = info.internal_attr
+    # A size hint only: it decides whether the member is written as ZIP64.
+    copy.file_size = info.file_size
+    return copy
+
+
+def _copy_member(zin: zipfile.ZipFile, info: zipfile.ZipInfo, zout: zipfile.ZipFile) -> None:
+    """Append member ``info`` of ``zin`` to ``zout`` unchanged, in chunks.
+
+    The data is decompressed and compressed again with the member's own
+    method: ``zipfile`` has no public call that copies compressed data as is.
+    """
+    with zin.open(info) as src, zout.open(_copy_info(info), "w") as dst:
+        for data in _chunks(src):
+            dst.write(data)
+
+
+def _chunks(stream: BinaryIO) -> Iterator[bytes]:
+    while True:
+        data = stream.read(PART_CHUNK_BYTES)
+        if not data:
+            return
+        yield data
+
+
+class Element(NamedTuple):
+    """An element reported by ``iter_elements``."""
+
+    name: str
+    parent: str
+    attrs: dict[str, str]
+    # Character data directly inside the element.
+    text: str
+    # 1 for the root element.
+    depth: int
+
+
+def iter_elements(stream: BinaryIO, names: frozenset[str]) -> Iterator[Element]:
+    """Lazily yield the elements of an XML part whose local name is in ``names``.
+
+    Names are local (prefixes dropped).  Elements come in the order of their
+    end tags, and the part is parsed one chunk at a time, so a caller that
+    stops early stops the parse.
+    """
+    found: list[Element] = []
+    stack: list[tuple[str, dict[str, str], Optional[list[str]]]] = []
+
+    def start(name: str, attrs: dict[str, str]) -> None:
+        local = _local(name)
+        if local in names:
+            stack.append((local, attrs, []))
+        else:
+            stack.append((local, {}, None))
+
+    def end(name: str) -> None:
+        local, attrs, parts = stack.pop()
+        if parts is not None:
+            found.append(Element(local, stack[-1][0] if stack else "", attrs, "".join(parts), len(stack) + 1))
+
+    def text(data: str) -> None:
+        if stack and stack[-1][2] is not None:
+            stack[-1][2].append(data)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+    for data in _chunks(stream):
+        parser.Parse(data, False)
+        yield from found
+        found.clear()
+    parser.Parse(b"", True)
+    yield from found
+
+
+def iter_blocks(
+    stream: BinaryIO, names: frozenset[str], spaces: frozenset[str] = frozenset()
+) -> Iterator[str]:
+    """Lazily yield the text of each element of an XML part whose local name is in ``names``.
+
+    Unlike ``iter_elements``, the text of descendants counts too (mixed
+    content, such as an OpenDocument paragraph with spans), except for
+    nested elements in ``names``, which are yielded on their own before the
+    element that holds them.  Elements in ``spaces`` (tabs, line breaks)
+    read as one space.
+    """
+    found: list[str] = []
+    # Text gathered for each open element of ``names``, innermost last.
+    open_blocks: list[tuple[int, list[str]]] = []
+    depth = 0
+
+    def start(name: str, attrs: dict[str, str]) -> None:
+        nonlocal depth
+        depth += 1
+        local = _local(name)
+        if local in names:
+            open_blocks.append((depth, []))
+        elif open_blocks and local in spaces:
+            open_blocks[-1][1].append(" ")
+
+    def end(name: str) -> None:
+        nonlocal depth
+        if open_blocks and open_blocks[-1][0] == depth:
+            found.append("".join(open_blocks.pop()[1]))
+        depth -= 1
+
+    def text(data: str) -> None:
+        if open_blocks:
+            open_blocks[-1][1].append(data)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+    for data in _chunks(stream):
+        parser.Parse(data, False)
+        yield from found
+        found.clear()
+    parser.Parse(b"", True)
+    yield from found
+
+
+def _each_run(converter: Callable[[str], str]) -> Callable[[list[str]], list[str]]:
+    return lambda runs: [converter(run) for run in runs]
+
+
+def rewrite_part(
+    source: BinaryIO,
+    target: BinaryIO,
+    rule: PartRule,
+    converter: Callable[[str], str],
+    convert_runs: Optional[Callable[[list[str]], list[str]]] = None,
+    hinted: Optional[Mapping[str, Converters]] = None,
+) -> None:
+    """Stream one XML part from ``source`` to ``target``, converting the text ``rule`` selects.
+
+    ``convert_runs`` receives the texts of each group of runs (see
+    ``PartRule.group``) and returns one text per run; by default each run
+    goes through ``converter`` on its own.  Text under a font hint (see
+    ``FontRule``) goes through the converters ``hinted`` has for that hint,
+    and is left unchanged when it has none.
+    """
+    rewriter = _PartRewriter(
+        rule, converter, convert_runs or _each_run(converter), target.write, hinted or {}
+    )
+    for data in _chunks(source):
+        rewriter.feed(data)
+    rewriter.feed(b"", final=True)
+
+
+def rewrite_package(
+    source: BinaryIO,
+    target: BinaryIO,
+    rules: Callable[[str, str], Optional[PartRule]],
+    converter: Callable[[str], str],
+    convert_runs: Optional[Callable[[list[str]], list[str]]] = None,
+    hinted: Optional[Mapping[str, Converters]] = None,
+) -> None:
+    """Copy an OOXML or OpenDocument package, rewriting the text of selected parts.
+
+    Members without a rule are copied unchanged, compressed with their own method.
+
+    Args:
+        source: Readable, seekable zip file.
+        target: Writable file for the new package.
+        rules: Called with each member's name and content type (empty
+            without ``[Content_Types].xml``, as in OpenDocument); returns the
+            ``PartRule`` to apply, or ``None`` to copy the member unchanged.
+        converter: Applied to each text node and attribute value selected.
+        convert_runs: Applied to the texts of each group of runs; see
+            ``rewrite_part``.
+        hinted: Font hint to the converters for text under it; text under
+            any other hint is left unchanged.  See ``FontRule``.
+    """
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, "w") as zout:
+        zout.comment = zin.comment
+        types = content_types(zin) if _CONTENT_TYPES in zin.NameToInfo else {}
+        for info in zin.infolist():
+            if info.is_dir():
+                zout.writestr(_copy_info(info), b"")
+                continue
+            rule = rules(info.filename, types.get(info.filename, ""))
+            if rule is None:
+                _copy_member(zin, info, zout)
+                continue
+            with zin.open(info) as src, zout.open(_copy_info(info), "w") as dst:
+                rewrite_part(src, dst, rule, converter, convert_runs, hinted)
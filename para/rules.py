@@ -4,6 +4,10 @@ Rules are applied in order. Each rule is a (pattern, replacement) tuple.
 Ported from: https://github.com/Laitei40/ParaEncoder/issues/new
 """
 
+# Bump whenever a change to the rules below alters conversion output.  Batch
+# manifests (``para.manifest``) re-convert files made under another version.
+RULES_VERSION = "1"
+
 ZAWGYI_TO_UNICODE_RULES = [
     # Remove duplicate diacritics
     (r"([\u102D\u102E\u103D\u102F\u1037\u1095])\1+", r"\1"),
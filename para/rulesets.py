@@ -0,0 +1,169 @@
+"""Versioned rule sets and their precompiled engines.
+
+A rule set is an ordered list of ``(pattern, replacement)`` rules with a
+name, a version and a content digest: the built-in ``BUILTIN`` set from
+``para.rules``, or a JSON rule file read by ``load_rule_set``.
+
+Building a ``para.engine.RuleEngine`` analyses every rule (translate tables,
+trigger sets, cut planning), which costs more than the rest of startup.
+``compile_rule_set`` therefore stores each engine it builds in a cache
+directory and loads it from there in later processes and pool workers.
+A cache file is keyed on the rules' digest, the source of
+``para.engine`` and the Python version, so editing the rules or the engine
+never serves a stale engine, and writing one removes the files it
+replaces.  The cache is off unless ``PARA_CACHE_DIR`` names a directory.
+Cache files are pickles, which run code when loaded: only point it at a
+directory no one else can write to.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+import para.engine
+from para.engine import RuleEngine
+from para.rules import RULES_VERSION, ZAWGYI_TO_UNICODE_RULES
+
+# Directory for precompiled engines; unset or empty leaves the cache off.
+CACHE_DIR_ENV = "PARA_CACHE_DIR"
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """An ordered list of ``(pattern, replacement)`` rules, applied one after another.
+
+    Args:
+        name: Short label, used in cache file names and reports.
+        version: Bumped by the rule set's author whenever a change alters
+            conversion output.
+        rules: The rules, in order.
+    """
+
+    name: str
+    version: str
+    rules: tuple[tuple[str, str], ...]
+
+    @property
+    def digest(self) -> str:
+        """Hex SHA-256 of the rules, so any edit counts as a new rule set."""
+        return hashlib.sha256(json.dumps(self.rules).encode("utf-8")).hexdigest()
+
+    @property
+    def fingerprint(self) -> str:
+        """``version`` plus the start of ``digest``, as recorded by ``para.manifest``."""
+        return f"{self.version}+{self.digest[:12]}"
+
+
+BUILTIN = RuleSet("builtin", RULES_VERSION, tuple(ZAWGYI_TO_UNICODE_RULES))
+
+
+def load_rule_set(path: Union[str, Path]) -> RuleSet:
+    """Read a rule file.
+
+    The file is a JSON object with ``"rules"``, a list of ``[pattern,
+    replacement]`` pairs in Python ``re`` syntax, and optionally ``"name"``
+    (defaults to the file's stem) and ``"version"`` (defaults to ``"0"``).
+
+    Raises:
+        ValueError: The file is not such an object or a pattern does not compile.
+    """
+    path = Path(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not isinstance(data.get("rules"), list):
+        raise ValueError(f"{path}: expected a JSON object with a list of rules")
+    rules = []
+    for number, rule in enumerate(data["rules"]):
+        if not (isinstance(rule, list) and len(rule) == 2 and all(isinstance(part, str) for part in rule)):
+            raise ValueError(f"{path}: rule {number} is not a [pattern, replacement] pair of strings")
+        try:
+            re.compile(rule[0])
+        except re.error as exc:
+            raise ValueError(f"{path}: rule {number}: {exc}") from exc
+        rules.append((rule[0], rule[1]))
+    return RuleSet(str(data.get("name", path.stem)), str(data.get("version", "0")), tuple(rules))
+
+
+def cache_dir() -> Optional[Path]:
+    """Return where precompiled engines are kept: ``PARA_CACHE_DIR``, or None when caching is off."""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    return Path(configured) if configured else None
+
+
+def _engine_source_digest() -> Optional[str]:
+    try:
+        with open(para.engine.__file__, "rb") as stream:
+            return hashlib.sha256(stream.read()).hexdigest()
+    except (OSError, TypeError):
+        return None
+
+
+def cache_path(rule_set: RuleSet, directory: Optional[Path] = None) -> Optional[Path]:
+    """Return the cache file for ``rule_set``'s engine, or None when it cannot be cached."""
+    directory = cache_dir() if directory is None else directory
+    engine = _engine_source_digest()
+    if directory is None or engine is None:
+        return None
+    key = hashlib.sha256(
+        f"{rule_set.digest}:{engine}:{sys.implementation.cache_tag}".encode("utf-8")
+    ).hexdigest()
+    return directory / f"{_cache_prefix(rule_set)}{key[:24]}.pickle"
+
+
+def _cache_prefix(rule_set: RuleSet) -> str:
+    # Files sharing a prefix hold engines of the same rule set (by name) for
+    # the same interpreter; only the newest of them is ever loaded again.
+    label = re.sub(r"[^\w.-]", "_", rule_set.name)
+    return f"engine-{label}-{sys.implementation.cache_tag}-"
+
+
+def _prune(path: Path, rule_set: RuleSet) -> None:
+    """Delete the cache files ``path`` replaces."""
+    for stale in path.parent.glob(f"{glob.escape(_cache_prefix(rule_set))}*.pickle"):
+        if stale != path:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+def compile_rule_set(rule_set: RuleSet, directory: Optional[Path] = None) -> RuleEngine:
+    """Return the engine for ``rule_set``, from the cache when it holds a current one.
+
+    A missing, unreadable or stale cache file is rebuilt and rewritten; a
+    cache directory that cannot be written only costs the rebuild.
+
+    Args:
+        rule_set: Rules to compile.
+        directory: Cache directory; defaults to ``cache_dir()``.
+    """
+    path = cache_path(rule_set, directory)
+    if path is not None:
+        try:
+            with open(path, "rb") as stream:
+                engine = pickle.load(stream)
+            if isinstance(engine, RuleEngine):
+                return engine
+        except Exception:  # missing, truncated or from an incompatible build
+            pass
+    engine = RuleEngine(rule_set.rules)
+    if path is not None:
+        # Imported here: the handlers are not needed when the cache is warm.
+        from para.handlers import atomic_write_bytes
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write_bytes(path) as stream:
+                pickle.dump(engine, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            return engine
+        _prune(path, rule_set)
+    return engine
@@ -0,0 +1,41 @@
+"""Syllable segmentation for Zawgyi text.
+
+The classes below follow Zawgyi's visual typing order, the same order the
+rules in ``para.rules`` are written against: prefix vowels and medials come
+before the consonant they belong to, marks and killed consonants (a
+consonant followed by ``U+1039``) after it.  Text outside the Myanmar block
+is kept in runs.  Segments always concatenate back to the input.
+"""
+
+from __future__ import annotations
+
+import re
+
+# Vowel sign E and the Zawgyi medial RA forms are typed before their consonant.
+ZAWGYI_PREFIXES = "\u1031\u103b\u107e-\u1084"
+
+# Characters that start a syllable: consonants, independent vowels, digits,
+# symbols and Zawgyi's consonant variants.
+ZAWGYI_BASES = "\u1000-\u102a\u103f\u1040-\u1049\u104c-\u104f\u106a\u106b\u1086\u108f\u1090"
+
+_ZAWGYI_MARKS = "".join(
+    re.escape(chr(cp))
+    for cp in range(0x1000, 0x10A0)
+    if not re.match(f"[{ZAWGYI_PREFIXES}{ZAWGYI_BASES}]", chr(cp))
+)
+
+ZAWGYI_SYLLABLE = re.compile(
+    f"[{ZAWGYI_PREFIXES}]*[{ZAWGYI_BASES}](?:[{_ZAWGYI_MARKS}]|[{ZAWGYI_BASES}]\u1039)*"
+    "|[^\u1000-\u109f]+"
+    "|.",
+    re.DOTALL,
+)
+
+
+def zawgyi_syllables(text: str) -> list[str]:
+    """Split Zawgyi text into syllables and non-Myanmar runs.
+
+    Stray prefixes and marks without a consonant become one-character
+    segments, so ``"".join(zawgyi_syllables(text)) == text`` always holds.
+    """
+    return ZAWGYI_SYLLABLE.findall(text)
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _engine_cache(tmp_path_factory, monkeypatch):
+    """Keep compiled engines out of the user's cache directory."""
+    monkeypatch.setenv("PARA_CACHE_DIR", str(tmp_path_factory.mktemp("engine-cache")))
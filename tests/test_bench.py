@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import para.cli
+from para.bench import benchmark_names, compare, CORPUS_KINDS, generate_corpus, run_suite, to_json
+from para.detect import detect_encoding
+
+
+def test_corpora_are_deterministic_and_of_their_kind():
+    for kind in CORPUS_KINDS:
+        text = generate_corpus(kind, 5000)
+        assert text == generate_corpus(kind, 5000)
+        assert 5000 <= len(text) < 6000 and text.endswith("\n")
+    assert generate_corpus("zawgyi", 5000, seed=1) != generate_corpus("zawgyi", 5000)
+    assert detect_encoding(generate_corpus("zawgyi", 5000)) == "zawgyi"
+    assert detect_encoding(generate_corpus("unicode", 5000)) == "unicode"
+    assert all("\t" in line for line in generate_corpus("cells", 2000).splitlines())
+    with pytest.raises(ValueError):
+        generate_corpus("latin", 100)
+
+
+def test_run_suite_measures_every_function_and_handler():
+    results = run_suite(chars=2000, repeat=1)
+    assert [result.name for result in results] == benchmark_names()
+    assert {name.split("/")[0] for name in benchmark_names()} >= {
+        "detect_encoding", "zg_to_unicode", "handler.txt", "handler.docx", "handler.pptx", "handler.xlsx",
+        "handler.odt",
+    }
+    assert all(result.chars >= 2000 and result.chars_per_sec > 0 and result.peak_bytes > 0 for result in results)
+    assert [r.name for r in run_suite(chars=2000, repeat=1, only=["handler.*"])] == [
+        name for name in benchmark_names() if name.startswith("handler.")
+    ]
+
+
+def _report(**speeds):
+    return {
+        "suite": 1,
+        "chars": 1000,
+        "seed": 0,
+        "results": [
+            {"name": name, "chars": 1000, "seconds": 1000 / speed, "chars_per_sec": speed, "peak_bytes": 100}
+            for name, speed in speeds.items()
+        ],
+    }
+
+
+def test_compare_reports_slowdowns_beyond_the_threshold():
+    baseline = _report(a=1000, b=1000)
+    assert compare(_report(a=800, b=1500, new=1), baseline, threshold=0.25) == []
+    regressions = compare(_report(a=700, b=1000), baseline, threshold=0.25)
+    assert len(regressions) == 1 and regressions[0].startswith("a: 700 chars/s")
+
+    grown = _report(a=1000)
+    grown["results"][0]["peak_bytes"] = 200
+    assert compare(grown, baseline)[0].startswith("a: peak 200 bytes")
+    with pytest.raises(ValueError):
+        compare({**baseline, "chars": 2000}, baseline)
+
+
+def test_cli_bench_writes_json_and_checks_the_baseline(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    args = ["bench", "--chars", "2000", "--repeat", "1", "--only", "detect_encoding/*", "--output", str(out)]
+    assert para.cli.main(args) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report == {**report, "suite": 1, "chars": 2000}
+    assert len(report["results"]) == len(CORPUS_KINDS)
+
+    for result in report["results"]:
+        result["chars_per_sec"] *= 1000
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report), encoding="utf-8")
+    assert para.cli.main(args + ["--baseline", str(baseline)]) == 1
+    assert "regression: detect_encoding/" in capsys.readouterr().err
+    assert to_json([], chars=2000)["results"] == []
@@ -0,0 +1,41 @@
+import pytest
+
+from para.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2, max_chars=100)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+
+
+def test_lru_cache_is_bounded_by_characters():
+    cache = LRUCache(max_entries=100, max_chars=10)
+    cache.put("abc", "ABC")
+    cache.put("def", "DEF")
+    assert len(cache) == 1 and cache.get("abc") is None
+    cache.put("x" * 6, "y" * 6)
+    assert cache.get("x" * 6) is None
+    assert cache.stats.chars == 6
+
+
+def test_lru_cache_stats_and_clear():
+    cache = LRUCache(max_entries=4, max_chars=100)
+    cache.put(("key", True), "value", weight=8)
+    assert cache.get(("key", True)) == "value"
+    assert cache.get("missing") is None
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.entries, stats.chars) == (1, 1, 1, 8)
+    assert stats.hit_rate == 0.5
+    cache.clear()
+    assert len(cache) == 0 and cache.stats.hit_rate == 0.0
+
+
+def test_lru_cache_rejects_empty_bounds():
+    with pytest.raises(ValueError):
+        LRUCache(max_entries=0, max_chars=10)
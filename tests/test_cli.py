@@ -1,7 +1,14 @@
 import io
+import subprocess
+import sys
+from pathlib import Path
 from typing import List
 
+import pytest
+
 import para.cli as cli
+from para.formats import is_document
+from para.handlers import get_handler, get_supported_extensions, PlainTextHandler
 
 
 def run_cli(args: List[str], input_text: str) -> str:
@@ -26,3 +33,154 @@ def test_cli_detect_reports_zawgyi():
 def test_cli_convert_stdin():
     output = run_cli(["convert", "--force"], "\u106A")
     assert "\u1009" in output
+
+
+def test_cli_detect_report_shows_scores_and_coverage():
+    output = run_cli(["detect", "--max-chars", "100", "--report"], "\u106A " * 1000)
+    lines = output.splitlines()
+    assert lines[0] == "zawgyi"
+    assert lines[1].startswith("zawgyi_score: ")
+    assert "window(s)" in lines[3]
+
+
+def test_cli_convert_streams_to_output_file(tmp_path):
+    out = tmp_path / "out.txt"
+    text = "ျမန္မာျပည္ကိုခ်စ္တယ္\n" * 10000
+    assert run_cli(["convert", "--output", str(out)], text) == ""
+    assert out.read_text(encoding="utf-8") == "မြန်မာပြည်ကိုချစ်တယ်\n" * 10000
+    assert [p.name for p in tmp_path.iterdir()] == ["out.txt"]
+
+
+def test_cli_convert_file_input_streams(tmp_path):
+    src = tmp_path / "in.txt"
+    src.write_text("\u106A\n" * 3, encoding="utf-8")
+    output = run_cli(["convert", "--force", "--input", str(src)], "")
+    assert output == "\u1009\n" * 3
+
+
+def test_cli_convert_scores_whole_input_unless_told_to_detect_from_the_head(tmp_path):
+    src = tmp_path / "late.txt"
+    text = "a\n" * (1 << 20) + "ျမန္မာျပည္ကိုခ်စ္တယ္\n"
+    src.write_text(text, encoding="utf-8")
+    converted = text.replace("ျမန္မာျပည္ကိုခ်စ္တယ္", "မြန်မာပြည်ကိုချစ်တယ်")
+    assert run_cli(["convert", "--input", str(src)], "") == converted
+    assert run_cli(["convert"], text) == converted
+    assert run_cli(["convert", "--detect-head"], text) == text
+    for args in (["--segment", "line"], ["--input", str(tmp_path / "in.docx")]):
+        with pytest.raises(SystemExit, match="--detect-head"):
+            cli.main(["convert", "--detect-head", *args])
+
+
+def test_cli_convert_by_segment():
+    text = "ျမန္မာျပည္ကိုခ်စ္တယ္\nမင်္ဂလာပါ\n"
+    output = run_cli(["convert", "--segment", "line"], text)
+    assert output == "မြန်မာပြည်ကိုချစ်တယ်\nမင်္ဂလာပါ\n"
+
+
+def test_cli_convert_recursive(tmp_path, capsys):
+    src = tmp_path / "src"
+    (src / "a" / "b").mkdir(parents=True)
+    (src / "one.txt").write_text("ျမန္မာျပည္ကိုခ်စ္တယ္\n", encoding="utf-8")
+    (src / "a" / "b" / "two.md").write_text("ၪ\n", encoding="utf-8")
+    (src / "a" / "skip.txt").write_text("ၪ\n", encoding="utf-8")
+    (src / "a" / "image.png").write_bytes(b"\x89PNG")
+    (src / "bad.txt").write_bytes(b"\xff\xfe\x00")
+    dst = tmp_path / "dst"
+    code = cli.main([
+        "convert", "--force", "--recursive", str(src), "--output-dir", str(dst),
+        "--jobs", "2", "--exclude", "a/skip.txt",
+    ])
+    err = capsys.readouterr().err
+    assert code == 1
+    assert (dst / "one.txt").read_text(encoding="utf-8") == "မြန်မာပြည်ကိုချစ်တယ်\n"
+    assert (dst / "a" / "b" / "two.md").read_text(encoding="utf-8") == "ဉ\n"
+    assert not (dst / "a" / "skip.txt").exists() and not (dst / "a" / "image.png").exists()
+    assert "failed: " in err and "bad.txt: UnicodeDecodeError" in err
+    assert "converted 2 file(s)" in err and "0 unchanged, 1 failed (.md: 1, .txt: 1)" in err
+
+
+# ``import para.cli`` took about 0.17s when it loaded the converter and the
+# process pool eagerly, and about 0.05s since.
+_STARTUP = """
+import sys
+import para.cli
+para.cli.main(["detect"])
+heavy = (
+    "para.convert", "para.engine", "para.io", "para.handlers", "para.ooxml", "para.normalize",
+    "concurrent.futures", "xml.sax.saxutils", "zipfile", "mmap", "tempfile",
+)
+print(*[name for name in heavy if name in sys.modules])
+import para.convert
+assert para.convert._ENGINE is None, "rules compiled on import"
+"""
+
+
+def test_cli_detect_starts_without_loading_the_converter():
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP], input="\u106A", capture_output=True, text=True, check=True
+    )
+    verdict, loaded = result.stdout.splitlines()
+    assert verdict == "zawgyi"
+    assert loaded == ""
+    for suffix in [*get_supported_extensions(), "", ".unknown"]:
+        plain = isinstance(get_handler(Path(f"file{suffix.upper()}")), PlainTextHandler)
+        assert is_document(f"file{suffix.upper()}") != plain
+
+
+def test_cli_convert_with_rule_file(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text('{"name": "tiny", "rules": [["a", "b"]]}', encoding="utf-8")
+    assert run_cli(["convert", "--force", "--no-normalize", "--rules", str(rules)], "xay") == "xby"
+    assert run_cli(["convert", "--force"], "ၪ") == "ဉ"
+
+
+def test_cli_profile_rules_ranks_rules_and_lists_unused_ones(tmp_path, capsys):
+    src = tmp_path / "zg.txt"
+    src.write_text("ျမန္မာျပည္ကိုခ်စ္တယ္\n" * 20, encoding="utf-8")
+    assert cli.main(["profile-rules", "--input", str(src), "--top", "3"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("420 chars, 118 rules")
+    assert lines[1].split()[:3] == ["rank", "rule", "step"]
+    assert [line.split()[0] for line in lines[2:5]] == ["1", "2", "3"]
+    assert lines[5].startswith("never fired: ")
+
+    src.write_text("hello\n", encoding="utf-8")
+    assert cli.main(["profile-rules", "--input", str(src)]) == 1
+
+
+def test_cli_check_engine_reports_checked_inputs(capsys):
+    assert cli.main(["check-engine", "--cases", "50"]) == 0
+    assert capsys.readouterr().out.startswith("checked 105 input(s) (codepoints: 50, syllables: 50")
+
+
+def test_cli_detect_reads_only_the_head_it_scores(tmp_path, capsys):
+    src = tmp_path / "big.txt"
+    src.write_text("ၪ " * 1000 + "မင်္ဂလာပါ " * 100000, encoding="utf-8")
+    assert cli.main(["detect", "--input", str(src), "--max-chars", "100", "--report"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "zawgyi"
+    assert "only the first 356 chars were read" in lines[3]
+
+
+def test_cli_detect_rejects_bad_limits(capsys):
+    for args in (["--max-chars", "0"], ["--max-chars", "x"], ["--confidence", "1.5"], ["--confidence", "-1"]):
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["detect", *args])
+        assert exc.value.code == 2
+    assert "must be a fraction" in capsys.readouterr().err
+
+
+def test_cli_convert_rejects_jobs_it_would_ignore(tmp_path):
+    src = tmp_path / "in.txt"
+    src.write_text("ၪ", encoding="utf-8")
+    for args in (
+        ["--input", str(src), "--jobs", "2"],
+        ["--input", str(src), "--output", str(tmp_path / "out.txt"), "--segment", "line", "--jobs", "2"],
+        ["--input", str(tmp_path / "in.docx"), "--output", str(tmp_path / "out.docx"), "--jobs", "2"],
+    ):
+        with pytest.raises(SystemExit, match="--jobs"):
+            cli.main(["convert", *args])
+    for jobs in ("0", "-2"):
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["convert", "--recursive", str(tmp_path), "--output-dir", str(tmp_path / "out"), "--jobs", jobs])
+        assert exc.value.code == 2
@@ -1,4 +1,8 @@
-from para.convert import zg_to_unicode
+import random
+
+import pytest
+
+from para.convert import zg_to_unicode, zg_to_unicode_runs, zg_to_unicode_segments, zg_to_unicode_stream
 
 
 def test_unicode_mingalaba_is_preserved():
@@ -198,3 +202,139 @@ def test_ascii_passthrough():
     """ASCII text passes through unchanged."""
     assert zg_to_unicode("hello world", force=True) == "hello world"
 
+
+def _random_chunks(rng, text):
+    chunks, pos = [], 0
+    while pos < len(text):
+        step = rng.randint(1, 7)
+        chunks.append(text[pos:pos + step])
+        pos += step
+    return chunks
+
+
+def test_stream_matches_whole_text_conversion():
+    """Chunks split mid-cluster still produce the whole-text output."""
+    rng = random.Random(5)
+    alphabet = [chr(cp) for cp in range(0x1000, 0x10A0)] + [" ", "\n", "/", "​", "a", "။"] * 4
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 300)))
+        pieces = zg_to_unicode_stream(_random_chunks(rng, text), force=True, buffer_chars=16)
+        assert "".join(pieces) == zg_to_unicode(text, force=True)
+
+
+def test_stream_detects_before_converting():
+    zg = "ျမန္မာျပည္ကိုခ်စ္တယ္\n" * 50
+    assert "".join(zg_to_unicode_stream(_random_chunks(random.Random(1), zg), buffer_chars=32)) == zg_to_unicode(zg)
+    uni = "မင်္ဂလာပါ\n" * 50
+    assert "".join(zg_to_unicode_stream([uni[:7], uni[7:]], buffer_chars=32)) == uni
+
+
+def test_stream_holds_text_without_cut_points():
+    """A long stretch with no safe cut is converted in one piece."""
+    zg = "ျမန္မာျပည္ကိုခ်စ္တယ္" * 20
+    pieces = list(zg_to_unicode_stream(list(zg), force=True, buffer_chars=8))
+    assert pieces == [zg_to_unicode(zg, force=True)]
+
+
+_MIXED = "ျမန္မာျပည္ကိုခ်စ္တယ္\nhello world\nမင်္ဂလာပါ\n"
+
+
+def test_segments_convert_only_zawgyi_lines():
+    result = zg_to_unicode_segments(_MIXED)
+    assert result.text == "မြန်မာပြည်ကိုချစ်တယ်\nhello world\nမင်္ဂလာပါ\n"
+    assert [(s.encoding, s.converted) for s in result.segments] == [
+        ("zawgyi", True), (None, False), ("unicode", False),
+    ]
+    assert result.segments[1].start == result.segments[0].end
+    assert result.converted_count == 1
+
+
+def test_segments_by_paragraph_and_run():
+    text = "ျမန္မာျပည္\nကိုခ်စ္တယ္\n\n  \nမင်္ဂလာပါ"
+    paragraphs = zg_to_unicode_segments(text, segment="paragraph")
+    assert [text[s.start:s.end] for s in paragraphs.segments] == [
+        "ျမန္မာျပည္\nကိုခ်စ္တယ္\n\n  \n", "မင်္ဂလာပါ",
+    ]
+    runs = zg_to_unicode_segments("<p>ျမန္မာ ျပည္</p><p>မင်္ဂလာပါ</p>", segment="run")
+    assert runs.text == "<p>မြန်မာ ပြည်</p><p>မင်္ဂလာပါ</p>"
+    assert [s.encoding for s in runs.segments] == [None, "zawgyi", None, "unicode", None]
+
+
+def test_zg_to_unicode_segment_option():
+    assert zg_to_unicode(_MIXED, segment="line") == zg_to_unicode_segments(_MIXED).text
+    with pytest.raises(ValueError):
+        zg_to_unicode(_MIXED, segment="line", force=True)
+    with pytest.raises(ValueError):
+        zg_to_unicode_segments(_MIXED, segment="word")
+
+
+def test_memoized_conversion_matches_default_path():
+    from para.convert import CLUSTER_CACHE
+
+    zg = "ျမန္မာျပည္ ေက်ာင္းသား\n" * 40
+    hits = CLUSTER_CACHE.hits
+    assert zg_to_unicode(zg, memoize=True) == zg_to_unicode(zg)
+    assert "".join(zg_to_unicode_stream([zg], memoize=True)) == zg_to_unicode(zg)
+    assert CLUSTER_CACHE.hits > hits
+
+
+def test_conversion_cache_is_opt_in_and_counts_hits():
+    from para.convert import conversion_cache, disable_conversion_cache, enable_conversion_cache
+
+    assert conversion_cache() is None
+    cache = enable_conversion_cache(max_entries=2, max_chars=1000)
+    try:
+        zg = "ျမန္မာ"
+        expected = zg_to_unicode(zg, force=True)
+        assert zg_to_unicode(zg, force=True) == expected
+        assert zg_to_unicode(zg, force=True, normalize=False) is not None
+        assert (cache.hits, cache.misses) == (1, 2)
+        zg_to_unicode("ေက်ာင္း", force=True)
+        assert cache.evictions == 1
+        zg_to_unicode_segments(zg + "\n" + zg + "\n")
+        assert cache.hits >= 2
+    finally:
+        disable_conversion_cache()
+    assert conversion_cache() is None
+
+
+def test_zg_to_unicode_many_matches_single_calls(monkeypatch):
+    import para.batch
+    from para.convert import zg_to_unicode_many
+
+    texts = ["ျမန္မာ", "", "hello", "ေက်ာင္း", "ျမန္မာ", "မြန်မာ"] * 3
+    expected = [zg_to_unicode(text) for text in texts]
+    assert zg_to_unicode_many(texts, workers=1) == expected
+    # Force the process pool even for this small batch.
+    monkeypatch.setattr(para.batch, "PARALLEL_MIN_CHARS", 0)
+    assert zg_to_unicode_many(texts, workers=2, chunksize=1) == expected
+    assert zg_to_unicode_many(texts, workers=2, force=True) == [
+        zg_to_unicode(text, force=True) for text in texts
+    ]
+
+
+def test_zg_to_unicode_many_shares_conversion_cache():
+    from para.convert import disable_conversion_cache, enable_conversion_cache, zg_to_unicode_many
+
+    cache = enable_conversion_cache()
+    try:
+        zg_to_unicode("ျမန္မာ")
+        assert zg_to_unicode_many(["ျမန္မာ", "ျပည္", "ျပည္"], workers=1) == [
+            zg_to_unicode("ျမန္မာ"), zg_to_unicode("ျပည္"), zg_to_unicode("ျပည္")
+        ]
+        assert cache.stats.entries == 2
+    finally:
+        disable_conversion_cache()
+
+
+def test_zg_to_unicode_runs_decides_once_and_keeps_run_boundaries():
+    # Alone, the one-character run would not be detected as Zawgyi.
+    runs = ["\u103b\u1019\u1014\u1039\u1019\u102c", "\u1031", "\u1000\u103a\u102c\u1004\u1039\u1038", " \u107e\u1019"]
+    converted = zg_to_unicode_runs(runs)
+    assert "".join(converted) == zg_to_unicode("".join(runs))
+    assert converted[0] == zg_to_unicode(runs[0], force=True)
+    assert converted[-1] == zg_to_unicode(runs[-1], force=True)
+    # The syllable split across runs 2 and 3 is converted whole, in run 2.
+    assert converted[1:3] == ["\u1000\u103b\u1031\u102c", "\u1004\u103a\u1038"]
+    assert zg_to_unicode_runs(["abc", "def"]) == ["abc", "def"]
+    assert zg_to_unicode_runs(["\u1019\u103c\u1014\u103a", "\u1019\u102c"]) == ["\u1019\u103c\u1014\u103a", "\u1019\u102c"]
@@ -1,3 +1,5 @@
+import random
+
 import para.detect as detect
 
 
@@ -30,3 +32,116 @@ def test_detect_on_corpus_samples():
 
 def test_detect_unknown_on_short_myanmar():
     assert detect.detect_encoding("\u1010\u1014") == "unknown"
+
+
+def _reference_encoding(text):
+    """Detector as originally written: one findall per pattern and side."""
+    if not text or not detect._MYANMAR_RANGE.search(text):
+        return "unknown"
+    zg_score = detect._score(text, detect._ZG_PATTERNS)
+    uni_score = detect._score(text, detect._UNI_PATTERNS)
+    if abs(zg_score - uni_score) <= detect.SCORE_TIE_MARGIN:
+        return "unknown"
+    return "zawgyi" if zg_score > uni_score else "unicode"
+
+
+def test_scores_match_reference_scorer():
+    rng = random.Random(1031)
+    alphabet = [chr(cp) for cp in range(0x1000, 0x10A0)] + [" ", "a", "\n"]
+    # Dense in the characters where patterns overlap each other or themselves.
+    overlapping = list("\u1039\u103A\u1031\u1000\u1004\u103C\u103E\u108A\u1060 ")
+    samples = ZAWGYI_FIXTURES + UNICODE_FIXTURES + ["", "hello", "\u1039\u1039\u1039\u1000"]
+    samples += ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 40))) for _ in range(2000)]
+    samples += ["".join(rng.choice(overlapping) for _ in range(rng.randint(1, 20))) for _ in range(5000)]
+    for sample in samples:
+        expected = (
+            detect._score(sample, detect._ZG_PATTERNS),
+            detect._score(sample, detect._UNI_PATTERNS),
+        )
+        assert detect._scores(sample) == expected
+        assert detect.detect_encoding(sample) == _reference_encoding(sample)
+
+
+def test_report_defaults_score_whole_text():
+    report = detect.detect_encoding_report(ZAWGYI_FIXTURES[0])
+    assert report.encoding == "zawgyi"
+    assert report.coverage == 1.0
+    assert report.early_exit is False
+
+
+def test_windowed_scores_add_up_to_whole_text_scores():
+    text = " ".join(ZAWGYI_FIXTURES + UNICODE_FIXTURES) * 2000
+    whole = detect.detect_encoding_report(text)
+    windowed = detect.detect_encoding_report(text, confidence=1.0)
+    assert windowed.windows > 1
+    assert (windowed.zawgyi_score, windowed.unicode_score) == (whole.zawgyi_score, whole.unicode_score)
+
+
+def test_max_chars_bounds_scanned_text():
+    text = (UNICODE_FIXTURES[0] + " ") * 100000
+    report = detect.detect_encoding_report(text, max_chars=5000)
+    assert report.encoding == "unicode"
+    assert report.scanned_chars < 5000 + 300
+    assert report.coverage < 0.01
+
+
+def test_stratified_sampling_sees_the_whole_document():
+    text = "hello world " * 50000 + ZAWGYI_FIXTURES[0] * 15000
+    assert detect.detect_encoding(text, max_chars=4000) == "unknown"
+    report = detect.detect_encoding_report(text, max_chars=40000, sampling="stratified")
+    assert report.encoding == "zawgyi"
+    assert report.windows == 10
+
+
+def test_stratified_windows_are_disjoint_and_within_budget():
+    rng = random.Random(4)
+    words = ["\u1019\u103C\u1014\u103A", "\u1031\u1000", " ", "\u1000\u102C\u1038"]
+    text = "".join(rng.choice(words) for _ in range(120000))
+    for max_chars in (len(text) - 5, len(text) // 2, 5000):
+        ranges = detect._windows(text, max_chars, "stratified")
+        assert all(start < end <= later for (start, end), (later, _) in zip(ranges, ranges[1:]))
+        assert sum(end - start for start, end in ranges) <= max_chars
+    report = detect.detect_encoding_report(text, max_chars=len(text) - 5, sampling="stratified")
+    assert report.scanned_chars <= len(text) - 5
+
+
+def test_confidence_exits_early_on_clear_zawgyi():
+    text = ("\u1060\u1031\u103B\u1000 " * 100000)
+    report = detect.detect_encoding_report(text, confidence=0.9)
+    assert report.encoding == "zawgyi"
+    assert report.early_exit is True
+    assert report.windows == 1
+
+
+def test_detect_encoding_many_keeps_input_order(monkeypatch):
+    import para.batch
+
+    texts = ["ျမန္မာ", "hello", "မြန်မာ", "ျမန္မာ", ""]
+    expected = [detect.detect_encoding(text) for text in texts]
+    assert detect.detect_encoding_many(texts, workers=1) == expected
+    monkeypatch.setattr(para.batch, "PARALLEL_MIN_CHARS", 0)
+    assert detect.detect_encoding_many(texts, workers=2) == expected
+
+
+def test_detect_encoding_fragments_sums_scores_and_stops_at_max_chars():
+    cells = ["ေက", "ၪ", "ၪ", "abc"]
+    assert [detect.detect_encoding(cell) for cell in cells] == ["unicode", "zawgyi", "zawgyi", "unknown"]
+    assert detect.detect_encoding_fragments(cells) == "zawgyi"
+    assert detect.detect_encoding_fragments(iter(cells), max_chars=2) == "unicode"
+    assert detect.detect_encoding_fragments(["abc", ""]) == "unknown"
+
+    def consumed():
+        yield "ၪ"
+        raise AssertionError("read past max_chars")
+
+    assert detect.detect_encoding_fragments(consumed(), max_chars=1) == "zawgyi"
+
+
+def test_detect_encoding_chunks_matches_whole_text_detection():
+    rng = random.Random(11)
+    alphabet = [chr(cp) for cp in range(0x1000, 0x10A0)] + [" ", "\n", "a"] * 8
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 6))))
+        chunks = [text[start:end] for start, end in zip([0, *cuts], [*cuts, len(text)])]
+        assert detect.detect_encoding_chunks(iter(chunks)) == detect.detect_encoding(text)
@@ -0,0 +1,79 @@
+import random
+from pathlib import Path
+
+from para.bench import CORPUS_KINDS
+from para.differential import (
+    load_fixtures,
+    random_codepoints,
+    random_syllables,
+    reference_engine,
+    run_differential,
+    shrink,
+    throughput,
+)
+from para.rulesets import BUILTIN
+
+_TESTS = Path(__file__).parent
+_REFERENCE = reference_engine()
+
+
+def test_shrink_keeps_a_one_minimal_failing_input():
+    def fails(text):
+        return "a" in text and "b" in text
+
+    small = shrink("xxaxxxxxxxyyb yyyya", fails)
+    assert sorted(small) == ["a", "b"]
+    assert shrink("abc", lambda text: True) == ""
+
+
+def test_generators_are_deterministic():
+    assert random_codepoints(random.Random(3)) == random_codepoints(random.Random(3))
+    text = random_syllables(random.Random(3), 20)
+    assert text == random_syllables(random.Random(3), 20)
+    assert any("က" <= ch <= "အ" for ch in text)
+
+
+def test_fused_engine_agrees_with_the_reference_on_every_source():
+    fixtures = load_fixtures([_TESTS])
+    assert "ျမန္မာျပည္ကိုခ်စ္တယ္" in fixtures
+    report = run_differential(cases=300, seed=1, fixtures=fixtures)
+    assert report.ok, report.mismatches
+    assert report.cases == {
+        "codepoints": 300, "syllables": 300, "fixtures": len(fixtures), "corpora": len(CORPUS_KINDS),
+    }
+
+
+def test_mismatches_are_shrunk_to_minimal_inputs():
+    def broken(text):
+        return _REFERENCE(text).replace("်", "")
+
+    def crashes(text):
+        if "ၤ" in text:
+            raise RuntimeError("kinzi")
+        return _REFERENCE(text)
+
+    report = run_differential({"broken": broken, "crashes": crashes}, cases=200, max_mismatches=4)
+    assert not report.ok and len(report.mismatches) == 4
+    for mismatch in report.mismatches:
+        assert len(mismatch.text) <= len(mismatch.original)
+        assert mismatch.expected == _REFERENCE(mismatch.text)
+        if mismatch.path == "broken":
+            assert mismatch.actual != mismatch.expected
+            assert len(mismatch.text) <= 2
+        else:
+            assert mismatch.text == "ၤ" and mismatch.actual == "RuntimeError: kinzi"
+
+
+def test_load_fixtures_reads_literals_and_lines(tmp_path):
+    (tmp_path / "cases.py").write_text('X = "ၪ"\nY = "ascii"\n', encoding="utf-8")
+    (tmp_path / "lines.txt").write_text("ျမန္မာ\nascii\n", encoding="utf-8")
+    assert load_fixtures([tmp_path]) == ["ၪ"]
+    assert load_fixtures([tmp_path / "lines.txt", tmp_path / "cases.py"]) == ["ျမန္မာ", "ၪ"]
+
+
+def test_throughput_reports_each_path_on_each_corpus():
+    results = throughput(reference=reference_engine(BUILTIN), chars=2000, repeat=1)
+    assert [(r.corpus, r.path) for r in results] == [
+        (kind, path) for kind in CORPUS_KINDS for path in ("apply", "clusters")
+    ]
+    assert all(r.chars >= 2000 and r.speedup > 0 for r in results)
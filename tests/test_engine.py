@@ -0,0 +1,258 @@
+import random
+
+import para.engine
+from para.convert import _compiled_rules, _engine
+from para.convert import zg_to_unicode
+from para.cache import LRUCache
+from para.engine import RuleEngine, RuleProfile, RuleStats, apply_sequential
+from para.rulesets import BUILTIN
+from para.syllables import zawgyi_syllables
+
+_COMPILED_RULES = _compiled_rules()
+_ENGINE = _engine()
+
+
+_ALPHABET = [chr(cp) for cp in range(0x1000, 0x10A0)] + [" ", "\n", "/", "​", "a"]
+
+
+def test_engine_matches_sequential_rules_on_random_input():
+    """Fused engine output is byte-identical to the ordered rule loop."""
+    rng = random.Random(20240601)
+    for _ in range(3000):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 16)))
+        assert _ENGINE.apply(text) == apply_sequential(_COMPILED_RULES, text)
+
+
+def test_engine_matches_sequential_rules_on_sentence():
+    zg = "ျမန္မာျပည္ကိုခ်စ္တယ္ ေျက်ာ ကၤေ၇"
+    assert _ENGINE.apply(zg) == apply_sequential(_COMPILED_RULES, zg)
+
+
+def test_single_codepoint_rules_are_composed_in_order():
+    """Later single-codepoint rules see the output of earlier ones."""
+    engine = RuleEngine([(str(i), "x") for i in range(8)] + [("x", "yz"), ("y", "")])
+    assert [step.kind for step in engine.steps] == ["translate"]
+    assert engine.apply("0a7x") == "zazz"
+
+
+def test_rules_the_parser_cannot_analyse_run_sequentially(monkeypatch):
+    """Without ``re._parser`` every rule becomes its own unfiltered step."""
+    monkeypatch.setattr(para.engine, "_sre_parse", None)
+    engine = RuleEngine(BUILTIN.rules)
+    assert [step.kind for step in engine.steps] == ["pattern"] * len(BUILTIN.rules)
+    assert not engine.cluster_local and engine.spans("\u1031" * 5000) == [(0, 5000)]
+    rng = random.Random(3)
+    for _ in range(300):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 16)))
+        assert engine.apply(text) == apply_sequential(_COMPILED_RULES, text)
+
+    def broken(items):
+        raise AttributeError("changed shape")
+
+    monkeypatch.undo()
+    monkeypatch.setattr(para.engine, "_read_set", broken)
+    assert RuleEngine([("(a)?bc", "X")]).apply("abc bc") == "X X"
+
+
+def test_dependent_context_rules_stay_separate():
+    """A rule reading what an earlier rule writes must run after it."""
+    rules = [("(a)?bc", "X"), ("(q)?X", "Y")]
+    engine = RuleEngine(rules)
+    assert len(engine.steps) == 2
+    assert engine.apply("abc") == "Y"
+
+
+def test_prefilter_matches_sequential_rules_on_long_input():
+    """Long inputs take the probing path for the codepoint set."""
+    rng = random.Random(7)
+    text = "".join(rng.choice(_ALPHABET) for _ in range(2000))
+    assert _ENGINE.apply(text) == apply_sequential(_COMPILED_RULES, text)
+
+
+def test_prefilter_skips_rules_without_trigger_codepoints():
+    stats = RuleStats()
+    assert zg_to_unicode("\u1060", force=True, stats=stats) == "\u1039\u1000"
+    assert stats.applied + stats.skipped == len(_COMPILED_RULES)
+    assert stats.skipped > stats.applied
+
+
+def test_prefilter_tracks_codepoints_inserted_by_earlier_rules():
+    """A rule triggered only by another rule's output still runs."""
+    engine = RuleEngine([("a", "b"), ("bc", "X")])
+    stats = RuleStats()
+    assert engine.apply("ac", stats) == "X"
+    assert stats == RuleStats(applied=2, skipped=0)
+
+
+def test_profile_times_each_rule_without_changing_output():
+    rng = random.Random(5)
+    profile = RuleProfile()
+    for _ in range(500):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 16)))
+        assert _ENGINE.apply(text, profile) == _ENGINE.apply(text)
+    text = "".join(rng.choice(_ALPHABET) for _ in range(5000))
+    assert _ENGINE.apply(text, profile) == _ENGINE.apply(text)
+    assert sorted(profile.rules) == list(range(len(_COMPILED_RULES)))
+    assert profile.applied == sum(timing.runs for timing in profile.rules.values())
+    assert profile.skipped == sum(timing.skipped for timing in profile.rules.values())
+    ranked = profile.ranked()
+    assert ranked[0].seconds >= ranked[-1].seconds and profile.seconds > 0
+    assert all(not timing.matches for timing in profile.never_fired())
+
+
+def test_profile_counts_matches_and_changed_characters():
+    engine = RuleEngine([("a", "b"), ("(x)y", "\\1y"), ("q", "qq"), ("z", "")])
+    profile = RuleProfile()
+    assert engine.apply("aaxyz", profile) == "bbxy" and engine.apply("xyz", profile) == "xy"
+    a, xy, q, z = (profile.rules[i] for i in range(4))
+    assert (a.runs, a.matches, a.chars_changed, a.step) == (1, 2, 2, "translate")
+    assert (xy.matches, xy.chars_changed) == (2, 0)
+    assert (q.runs, q.skipped) == (0, 2)
+    assert (z.runs, z.matches, z.chars_changed) == (2, 2, 2)
+    assert [timing.index for timing in profile.never_fired()] == [2]
+
+
+def test_split_point_cuts_preserve_output():
+    """Converting both sides of a cut equals converting the whole text."""
+    rng = random.Random(11)
+    cuts = 0
+    for _ in range(2000):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 40)))
+        cut = _ENGINE.split_point(text)
+        if cut is None:
+            continue
+        cuts += 1
+        text += "".join(rng.choice(_ALPHABET) for _ in range(8))
+        assert _ENGINE.apply(text[:cut]) + _ENGINE.apply(text[cut:]) == _ENGINE.apply(text)
+    assert cuts > 1000
+
+
+def test_split_point_avoids_context_rules():
+    """U+1040 rules read across line breaks, so no cut is placed next to one."""
+    assert _ENGINE.split_point("\u1000\u102d\nabc") == 3
+    assert _ENGINE.split_point("a\u1040\n\u1040b\u1000\u1000") is None
+
+
+def test_can_cut_holds_for_any_surrounding_text():
+    """A cut accepted inside a window is safe whatever text lies around the window."""
+    rng = random.Random(13)
+    random_text = lambda n: "".join(rng.choice(_ALPHABET) for _ in range(n))
+    cuts = 0
+    for _ in range(2000):
+        window = random_text(rng.randint(1, 40))
+        cut = rng.randint(0, len(window))
+        if not _ENGINE.can_cut(window, cut):
+            continue
+        cuts += 1
+        before, after = random_text(8), random_text(8)
+        text = before + window + after
+        at = len(before) + cut
+        assert _ENGINE.apply(text[:at]) + _ENGINE.apply(text[at:]) == _ENGINE.apply(text)
+    assert cuts > 50
+    assert not _ENGINE.can_cut("a\n\n\n\u1040\nb", 2)
+
+
+def test_split_point_counts_only_characters_rules_cannot_delete():
+    """Deleting ZWSP moves U+1040 next to the line break, so the cut must stay away."""
+    text = "abc\n" + "\u200b" * 4 + "\u1040\u1000\u1000"
+    cut = _ENGINE.split_point(text)
+    assert cut is not None and cut < 4
+    assert _ENGINE.apply(text[:cut]) + _ENGINE.apply(text[cut:]) == _ENGINE.apply(text)
+
+
+_MARKUP = list('abc <>/="\n 0123') + ["\u200b"]
+
+
+def _markup_with_myanmar(rng, size):
+    parts = []
+    while sum(map(len, parts)) < size:
+        if rng.random() < 0.3:
+            parts.append("".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, 12))))
+        else:
+            parts.append("".join(rng.choice(_MARKUP) for _ in range(rng.randint(1, 60))))
+    return "".join(parts)
+
+
+def test_span_skipping_matches_sequential_rules():
+    """Markup-heavy input takes the span path and still matches the rule loop."""
+    rng = random.Random(3)
+    for _ in range(50):
+        text = _markup_with_myanmar(rng, 6000)
+        assert _ENGINE._spans(text, 0.75) is not None
+        assert _ENGINE.apply(text) == apply_sequential(_COMPILED_RULES, text)
+
+
+def test_spans_cover_myanmar_runs_and_touched_neighbours():
+    text = "<p>x \u1037y</p>\u200b<b>\u1000\u1039</b>"
+    assert [text[s:e] for s, e in _ENGINE.spans(text)] == [" \u1037", "\u200b", "\u1000\u1039"]
+
+
+def test_spans_reach_past_context_rules():
+    """U+1040 rules look at neighbouring non-Myanmar characters too."""
+    text = "<i>a\u1040b</i>"
+    (span,) = _ENGINE.spans(text)
+    assert span[0] <= text.index("a") and span[1] > text.index("b")
+
+
+def test_spans_survive_deletions_next_to_context_rules():
+    text = "x" * 5000 + "\n" + "\u200b" * 4 + "\u1040\u1000" + "y" * 5000
+    assert _ENGINE.apply(text) == apply_sequential(_COMPILED_RULES, text)
+
+
+def test_separable_pairs_convert_independently():
+    """Any cut between a separable pair splits the conversion exactly."""
+    assert _ENGINE.cluster_local
+    rng = random.Random(8)
+    checked = 0
+    for _ in range(4000):
+        left = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, 6)))
+        right = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, 6)))
+        if not _ENGINE.separable(left[-1], right[0]):
+            continue
+        checked += 1
+        assert (
+            apply_sequential(_COMPILED_RULES, left) + apply_sequential(_COMPILED_RULES, right)
+            == apply_sequential(_COMPILED_RULES, left + right)
+        )
+    assert checked > 1000
+
+
+def test_separable_follows_pairs_rules_read_and_write():
+    engine = RuleEngine([("a", "b"), ("bc", "X"), ("^d", "Y"), ("e$", "Z"), ("([^0-9])f", "\\1F")])
+    assert engine.separable("c", "b")
+    assert not engine.separable("b", "c")
+    # ``a`` becomes ``b`` before the ``bc`` rule runs.
+    assert not engine.separable("a", "c")
+    assert not engine.separable("x", "d")
+    assert not engine.separable("e", "x")
+    assert not engine.separable("x", "f")
+    assert engine.separable("1", "f")
+    assert not RuleEngine([("(?<=a)b", "c")]).cluster_local
+
+
+def test_apply_split_keeps_separable_boundaries():
+    rng = random.Random(17)
+    for _ in range(2000):
+        pieces = ["".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 6))) for _ in range(rng.randint(1, 5))]
+        converted = _ENGINE.apply_split(pieces)
+        assert len(converted) == len(pieces)
+        assert "".join(converted) == _ENGINE.apply("".join(pieces))
+    assert _ENGINE.apply_split(["a\u1031", "\u1000b"]) == ["a\u1000\u1031", "b"]
+
+
+def test_cluster_conversion_matches_whole_string_path():
+    rng = random.Random(9)
+    cache = LRUCache(64, 4096)
+    for _ in range(300):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 40)))
+        assert _ENGINE.apply_clusters(zawgyi_syllables(text), cache) == apply_sequential(_COMPILED_RULES, text)
+    assert cache.evictions > 0
+
+
+def test_cluster_conversion_serves_repeats_from_cache():
+    text = "\u1019\u103a\u1014\u1039\u1019\u102c \u1031\u1000\u103a\u102c\u1004\u1039\u1038 " * 50
+    cache = LRUCache(1000, 100000)
+    converted = _ENGINE.apply_clusters(zawgyi_syllables(text), cache)
+    assert converted == _ENGINE.apply(text)
+    assert cache.misses < 10
+    assert cache.hits > 150
@@ -0,0 +1,12 @@
+from para.fonts import font_encoding, fonts_encoding, rename_zawgyi_font
+
+
+def test_font_names_match_loosely_and_zawgyi_wins():
+    assert font_encoding("Zawgyi One") == font_encoding("'zawgyi_one'") == "zawgyi"
+    assert font_encoding(" Myanmar Text ") == "unicode"
+    assert font_encoding("Arial") is None
+    assert fonts_encoding(["Arial", "Pyidaungsu", "Zawgyi-One"]) == "zawgyi"
+    assert fonts_encoding(["Arial", "Padauk"]) == "unicode"
+    assert fonts_encoding([]) is None
+    assert rename_zawgyi_font("'Zawgyi-One'", "Padauk") == "'Padauk'"
+    assert rename_zawgyi_font("Arial", "Padauk") == "Arial"
@@ -0,0 +1,129 @@
+import random
+import zipfile
+
+import para.handlers
+from para.handlers import _split_ranges
+from para.convert import can_cut, STREAM_DETECT_CHARS, zg_to_unicode
+from para.io import convert_file, convert_tree, detect_document_encoding, find_files
+
+
+def test_find_files_applies_include_and_exclude_globs(tmp_path):
+    for name in ["a.txt", "b.docx", "c.png", "sub/d.txt", "sub/e.csv"]:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("x", encoding="utf-8")
+    names = lambda paths: [p.relative_to(tmp_path).as_posix() for p in paths]
+    assert names(find_files(str(tmp_path))) == ["a.txt", "b.docx", "sub/d.txt", "sub/e.csv"]
+    assert names(find_files(str(tmp_path), include=["*.txt"])) == ["a.txt", "sub/d.txt"]
+    assert names(find_files(str(tmp_path), exclude=["sub/*"])) == ["a.txt", "b.docx"]
+
+
+def test_convert_tree_summarizes_files_bytes_and_formats(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "x.txt").write_text("ၪ", encoding="utf-8")
+    (src / "y.csv").write_text("ၪ,ၪ", encoding="utf-8")
+    summary = convert_tree(input_dir=str(src), output_dir=str(tmp_path / "out"), jobs=1, assume_zawgyi=True)
+    assert not summary.failed
+    assert summary.formats == {".csv": 1, ".txt": 1}
+    assert summary.bytes == 3 + 7
+    assert (tmp_path / "out" / "y.csv").read_text(encoding="utf-8") == "ဉ,ဉ"
+
+
+def test_parallel_convert_file_matches_serial_conversion(tmp_path, monkeypatch):
+    rng = random.Random(5)
+    words = ["\u1031\u1000\u102c", "\u1040", "\u107e\u1019", "abc", "\u1004\u103a\u1039\u1000", " "]
+    lines = ["".join(rng.choice(words) for _ in range(rng.randint(0, 12))) for _ in range(400)]
+    src = tmp_path / "big.txt"
+    src.write_bytes("\r\n".join(lines).encode("utf-8"))
+    monkeypatch.setattr(para.handlers, "RANGE_BYTES", 256)
+    with open(src, "rb") as stream:
+        spans = _split_ranges(stream.read(), "utf-8", can_cut, 256)
+    assert len(spans) > 10
+    assert spans[0][0] == 0 and spans[-1][1] == src.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+
+    convert_file(input_path=str(src), output_path=str(tmp_path / "serial.txt"), return_text=False)
+    for jobs in (2, None):
+        out = tmp_path / f"parallel-{jobs}.txt"
+        convert_file(input_path=str(src), output_path=str(out), return_text=False, jobs=jobs)
+        assert out.read_bytes() == (tmp_path / "serial.txt").read_bytes()
+
+
+def _slides(path, paragraphs):
+    kind = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+    body = "".join(f"<a:p><a:r><a:t>{text}</a:t></a:r></a:p>" for text in paragraphs)
+    with zipfile.ZipFile(path, "w") as package:
+        package.writestr(
+            "[Content_Types].xml",
+            f'<Types><Override PartName="/ppt/slides/slide1.xml" ContentType="{kind}"/></Types>',
+        )
+        package.writestr("ppt/slides/slide1.xml", f'<p:sld xmlns:p="urn:p" xmlns:a="urn:a">{body}</p:sld>')
+
+
+def test_convert_file_scores_the_whole_text_file_before_streaming(tmp_path):
+    src = tmp_path / "late.txt"
+    text = "a\n" * STREAM_DETECT_CHARS + "ျမန္မာျပည္ကိုခ်စ္တယ္\n"
+    src.write_text(text, encoding="utf-8")
+    for jobs in (1, 2):
+        out = tmp_path / f"out{jobs}.txt"
+        convert_file(input_path=str(src), output_path=str(out), return_text=False, jobs=jobs)
+        assert out.read_text(encoding="utf-8") == zg_to_unicode(text)
+    assert zg_to_unicode(text).endswith("မြန်မာပြည်ကိုချစ်တယ်\n")
+
+
+def test_split_ranges_bounds_the_search_for_each_cut():
+    windows = []
+
+    def only_before_b(text, cut):
+        windows.append(len(text))
+        return text[cut - 1:cut + 1] == "\nB"
+
+    data = "".join(f"{'AB'[i % 7 == 6]}ၪ{i}\r\n" for i in range(20000)).encode("utf-8")
+    spans = _split_ranges(data, "utf-8", only_before_b, 4096)
+    assert len(spans) > 10 and all(data[start:start + 1] == b"B" for start, _ in spans[1:])
+    assert spans[-1][1] == len(data) and max(windows) <= 2 * para.handlers._CUT_WINDOW_BYTES
+
+    def never(text, cut):
+        windows.append(len(text))
+        return False
+
+    windows.clear()
+    assert _split_ranges(data, "utf-8", never, 4096) == [(0, len(data))]
+    assert len(windows) <= para.handlers._CUT_TRIES * (len(data) // 4096)
+    assert _split_ranges(b"x" * 100_000, "utf-8", only_before_b, 256) == [(0, 100_000)]
+
+
+def test_convert_file_applies_one_document_verdict_to_every_fragment(tmp_path):
+    src = tmp_path / "deck.pptx"
+    _slides(src, ["ေက", "ၪကၪ", "abc"])
+    assert detect_document_encoding(str(src)) == "zawgyi"
+    assert convert_file(input_path=str(src), output_path=str(tmp_path / "doc.pptx")) == "ကေ\nဉကဉ\nabc"
+    fragment = convert_file(input_path=str(src), output_path=str(tmp_path / "frag.pptx"), detection="fragment")
+    assert fragment == "ေက\nဉကဉ\nabc"
+
+    plain = tmp_path / "unicode.pptx"
+    _slides(plain, ["ကေ", "abc"])
+    convert_file(input_path=str(plain), output_path=str(tmp_path / "copy.pptx"), return_text=False)
+    assert (tmp_path / "copy.pptx").read_bytes() == plain.read_bytes()
+
+
+def test_convert_file_trusts_zawgyi_fonts_over_the_document_verdict(tmp_path):
+    word = "application/vnd.openxmlformats-officedocument.wordprocessingml"
+    src = tmp_path / "doc.docx"
+    body = (
+        '<w:document xmlns:w="urn:w"><w:body><w:p><w:r><w:t>မြန်မာစာ</w:t></w:r></w:p><w:p><w:r><w:rPr>'
+        '<w:rFonts w:ascii="Zawgyi-One"/></w:rPr><w:t>ေက</w:t></w:r></w:p></w:body></w:document>'
+    )
+    with zipfile.ZipFile(src, "w") as package:
+        package.writestr(
+            "[Content_Types].xml",
+            f'<Types><Override PartName="/word/document.xml" ContentType="{word}.document.main+xml"/>'
+            f'<Override PartName="/word/fontTable.xml" ContentType="{word}.fontTable+xml"/></Types>',
+        )
+        package.writestr("word/document.xml", body)
+        package.writestr("word/fontTable.xml", '<w:fonts xmlns:w="urn:w"><w:font w:name="Zawgyi-One"/></w:fonts>')
+    assert detect_document_encoding(str(src)) == "unicode"
+    assert convert_file(input_path=str(src), output_path=str(tmp_path / "out.docx")) == "မြန်မာစာ\nကေ"
+    convert_file(input_path=str(src), output_path=str(tmp_path / "copy.docx"), font_hints=False)
+    assert (tmp_path / "copy.docx").read_bytes() == src.read_bytes()
@@ -0,0 +1,102 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import para.io
+from para.io import convert_tree
+from para.manifest import Manifest, ManifestEntry, rules_fingerprint
+
+
+def _tree(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "zg.txt").write_text("ျမန္မာျပည္ကိုခ်စ္တယ္\n", encoding="utf-8")
+    (src / "uni.txt").write_text("မြန်မာပြည်ကိုချစ်တယ်\n", encoding="utf-8")
+    return src, tmp_path / "out", str(tmp_path / "manifest.jsonl")
+
+
+def _run(src, out, manifest):
+    return convert_tree(input_dir=str(src), output_dir=str(out), jobs=1, manifest=manifest)
+
+
+def test_manifest_skips_unchanged_files(tmp_path):
+    src, out, manifest = _tree(tmp_path)
+    first = _run(src, out, manifest)
+    assert len(first.converted) == 2 and not first.skipped
+    entries = Manifest(manifest).entries
+    assert {entry.encoding for entry in entries.values()} == {"zawgyi", "unicode"}
+    assert all(entry.rules == rules_fingerprint() for entry in entries.values())
+
+    assert len(_run(src, out, manifest).skipped) == 2
+    # A new mtime with the same content is still unchanged.
+    os.utime(src / "zg.txt", ns=(0, 0))
+    assert len(_run(src, out, manifest).skipped) == 2
+    (src / "uni.txt").write_text("ၪ\n", encoding="utf-8")
+    (out / "zg.txt").unlink()
+    again = _run(src, out, manifest)
+    assert sorted(os.path.basename(r.input_path) for r in again.converted) == ["uni.txt", "zg.txt"]
+    assert (out / "uni.txt").read_text(encoding="utf-8") == "ဉ\n"
+    assert len(open(manifest, encoding="utf-8").read().splitlines()) == 2
+
+
+def test_rules_version_change_reconverts_only_converted_files(tmp_path, monkeypatch):
+    src, out, manifest = _tree(tmp_path)
+    _run(src, out, manifest)
+    monkeypatch.setattr(para.io, "rules_fingerprint", lambda: "2+new")
+    summary = _run(src, out, manifest)
+    assert [os.path.basename(r.input_path) for r in summary.converted] == ["zg.txt"]
+    assert [os.path.basename(r.input_path) for r in summary.skipped] == ["uni.txt"]
+    assert {entry.rules for entry in Manifest(manifest).entries.values()} == {"2+new"}
+
+
+def test_manifest_ignores_torn_last_line(tmp_path):
+    path = tmp_path / "m.jsonl"
+    entry = ManifestEntry("a", "b", 1, 2, "ff", "zawgyi", "1+x", False, True)
+    path.write_text(json.dumps(entry.__dict__) + "\n" + '{"input": "c", "out', encoding="utf-8")
+    book = Manifest(str(path))
+    assert list(book.entries) == ["a"]
+    book.record(ManifestEntry("c", "d", 1, 2, "ee", None, "1+x", True, True))
+    book.close()
+    assert list(Manifest(str(path)).entries) == ["a", "c"]
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_detection_mode_change_reconverts(tmp_path):
+    src, out, manifest = _tree(tmp_path)
+    _run(src, out, manifest)
+    assert {entry.detection for entry in Manifest(manifest).entries.values()} == {"document"}
+    summary = convert_tree(
+        input_dir=str(src), output_dir=str(out), jobs=1, manifest=manifest, detection="fragment"
+    )
+    assert len(summary.converted) == 2 and not summary.skipped
+
+
+def test_font_option_change_reconverts(tmp_path):
+    src, out, manifest = _tree(tmp_path)
+    _run(src, out, manifest)
+    assert {entry.font_hints for entry in Manifest(manifest).entries.values()} == {True}
+    summary = convert_tree(
+        input_dir=str(src), output_dir=str(out), jobs=1, manifest=manifest, unicode_font="Padauk"
+    )
+    assert len(summary.converted) == 2 and not summary.skipped
+
+
+def test_manifest_records_the_verdict_each_file_was_converted_on(tmp_path, monkeypatch):
+    src, out, manifest = _tree(tmp_path)
+    for name, text in (("zg.pptx", "ျမန္မာျပည္ကိုခ်စ္တယ္"), ("uni.pptx", "မြန်မာပြည်ကိုချစ်တယ်")):
+        with zipfile.ZipFile(src / name, "w") as package:
+            package.writestr(
+                "[Content_Types].xml",
+                '<Types><Override PartName="/ppt/slides/slide1.xml" ContentType="application/'
+                'vnd.openxmlformats-officedocument.presentationml.slide+xml"/></Types>',
+            )
+            slide = f'<p:sld xmlns:p="urn:p" xmlns:a="urn:a"><a:p><a:r><a:t>{text}</a:t></a:r></a:p></p:sld>'
+            package.writestr("ppt/slides/slide1.xml", slide)
+    scored = []
+    file_encoding = para.io._file_encoding
+    monkeypatch.setattr(para.io, "_file_encoding", lambda *args: scored.append(args) or file_encoding(*args))
+    _run(src, out, manifest)
+    entries = {Path(path).name: entry.encoding for path, entry in Manifest(manifest).entries.items()}
+    assert entries == {"zg.txt": "zawgyi", "uni.txt": "unicode", "zg.pptx": "zawgyi", "uni.pptx": "unicode"}
+    assert len(scored) == 2
@@ -0,0 +1,381 @@
+import io
+import zipfile
+
+import pytest
+
+import para.ooxml
+from para.handlers import DocxHandler, get_handler, OdtHandler, PptxHandler, XlsxHandler
+from para.io import read_document_text
+from para.ooxml import PartRule, rewrite_part
+
+_MAIN = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    f'<Override PartName="/xl/workbook.xml" ContentType="{_MAIN}.sheet.main+xml"/>'
+    f'<Override PartName="/xl/sharedStrings.xml" ContentType="{_MAIN}.sharedStrings+xml"/>'
+    f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{_MAIN}.worksheet+xml"/>'
+    f'<Override PartName="/xl/worksheets/sheet2.xml" ContentType="{_MAIN}.worksheet+xml"/>'
+    "</Types>"
+)
+
+
+def _rewrite(xml: str, rule: PartRule, converter=str.upper) -> str:
+    target = io.BytesIO()
+    rewrite_part(io.BytesIO(xml.encode("utf-8")), target, rule, converter)
+    return target.getvalue().decode("utf-8")
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 1 << 20])
+def test_rewrite_part_changes_only_selected_text(monkeypatch, chunk):
+    monkeypatch.setattr(para.ooxml, "PART_CHUNK_BYTES", chunk)
+    xml = (
+        '<?xml version="1.0"?>\n<sst x:a="1" xmlns:x="urn:x"><si><t>ab &amp; c</t></si>'
+        '<si><r><rPr b="&gt;"/><x:t xml:space="preserve"> d </x:t></r><t/></si>'
+        "<si><t><![CDATA[e<f]]></t></si><keep>g</keep><!-- h --><si><t></t></si></sst>"
+    )
+    assert _rewrite(xml, PartRule(elements=frozenset({"t"}))) == (
+        '<?xml version="1.0"?>\n<sst x:a="1" xmlns:x="urn:x"><si><t>AB &amp; C</t></si>'
+        '<si><r><rPr b="&gt;"/><x:t xml:space="preserve"> D </x:t></r><t/></si>'
+        "<si><t>E&lt;F</t></si><keep>g</keep><!-- h --><si><t></t></si></sst>"
+    )
+
+
+def test_rewrite_part_converts_groups_of_runs_together(monkeypatch):
+    monkeypatch.setattr(para.ooxml, "PART_CHUNK_BYTES", 5)
+    xml = (
+        "<d><p><r><t>ab</t></r><r><t>cd</t></r><tab/><r><t>ef</t></r>"
+        "<r><box><p><r><t>in</t></r><r><t>ner</t></r></p></box></r><r><t>gh</t></r></p><t>solo</t></d>"
+    )
+    groups = []
+
+    def convert_runs(runs):
+        groups.append(runs)
+        joined = "".join(runs).upper()
+        return [joined] + [""] * (len(runs) - 1)
+
+    rule = PartRule(elements=frozenset({"t"}), group="p", breaks=frozenset({"tab"}))
+    target = io.BytesIO()
+    rewrite_part(io.BytesIO(xml.encode()), target, rule, str.title, convert_runs)
+    assert groups == [["ab", "cd"], ["in", "ner"], ["ef", "gh"]]
+    assert target.getvalue().decode() == (
+        "<d><p><r><t>ABCD</t></r><r><t></t></r><tab/><r><t>EFGH</t></r>"
+        "<r><box><p><r><t>INNER</t></r><r><t></t></r></p></box></r><r><t></t></r></p><t>Solo</t></d>"
+    )
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 1 << 20])
+def test_rewrite_part_converts_text_nodes_of_mixed_content(monkeypatch, chunk):
+    monkeypatch.setattr(para.ooxml, "PART_CHUNK_BYTES", chunk)
+    xml = (
+        "<o><x>skip</x><p>a&amp;b<span>c</span><!-- n -->d<s/>e<note><p>in</p></note>"
+        "<![CDATA[f<]]>g</p><h>head<b/></h></o>"
+    )
+    groups = []
+
+    def convert_runs(runs):
+        groups.append(runs)
+        return [run.upper() for run in runs]
+
+    rule = PartRule(elements=frozenset({"p", "h"}), breaks=frozenset({"s", "note"}), mixed=True)
+    target = io.BytesIO()
+    rewrite_part(io.BytesIO(xml.encode()), target, rule, str.title, convert_runs)
+    assert groups == [["a&b", "c", "d"]]
+    assert target.getvalue().decode() == (
+        "<o><x>skip</x><p>A&amp;B<span>C</span><!-- n -->D<s/>E<note><p>In</p></note>"
+        "F&lt;G</p><h>Head<b/></h></o>"
+    )
+
+
+def test_rewrite_part_respects_within_and_attributes():
+    xml = '<a><t>x</t><is><t>y</t></is><sheet id="1" name=\'s&quot;&gt;\'/></a>'
+    rule = PartRule(
+        elements=frozenset({"t"}),
+        within=frozenset({"is"}),
+        attributes={"sheet": frozenset({"name"})},
+    )
+    assert _rewrite(xml, rule) == '<a><t>x</t><is><t>Y</t></is><sheet id="1" name=\'S"&gt;\'/></a>'
+
+
+def test_xlsx_convert_rewrites_strings_once_and_copies_other_members(tmp_path):
+    source = tmp_path / "book.xlsx"
+    with zipfile.ZipFile(source, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("xl/workbook.xml", '<workbook><sheets><sheet name="ab" sheetId="1"/></sheets></workbook>')
+        package.writestr("xl/sharedStrings.xml", "<sst><si><t>ab</t></si><si><t>cd</t></si></sst>")
+        package.writestr(
+            "xl/worksheets/sheet1.xml",
+            '<worksheet><sheetData><row><c t="inlineStr"><is><t>cd</t></is></c><c><v>1</v></c></row>'
+            "</sheetData><headerFooter><oddHeader>&amp;Cab</oddHeader></headerFooter></worksheet>",
+        )
+        package.writestr("xl/media/image1.png", b"\x89PNG ab")
+    calls = []
+
+    def converter(text):
+        calls.append(text)
+        return text.upper()
+
+    XlsxHandler().convert(source, source, converter)
+    with zipfile.ZipFile(source) as package:
+        assert package.read("xl/workbook.xml") == b'<workbook><sheets><sheet name="AB" sheetId="1"/></sheets></workbook>'
+        assert package.read("xl/sharedStrings.xml") == b"<sst><si><t>AB</t></si><si><t>CD</t></si></sst>"
+        assert b"<is><t>CD</t></is>" in package.read("xl/worksheets/sheet1.xml")
+        assert b"<oddHeader>&amp;CAB</oddHeader>" in package.read("xl/worksheets/sheet1.xml")
+        assert package.read("xl/media/image1.png") == b"\x89PNG ab"
+        assert package.getinfo("xl/media/image1.png").compress_type == zipfile.ZIP_DEFLATED
+    assert sorted(calls) == ["&Cab", "ab", "cd"]
+
+
+def test_xlsx_iter_text_reads_cells_in_tab_order_and_stops_early(tmp_path):
+    source = tmp_path / "book.xlsx"
+    with zipfile.ZipFile(source, "w") as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr(
+            "xl/workbook.xml",
+            '<workbook xmlns:r="urn:r"><sheets><sheet name="b" r:id="rId2"/><sheet name="a" r:id="rId1"/>'
+            "</sheets></workbook>",
+        )
+        package.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships><Relationship Id="rId1" Target="worksheets/sheet1.xml"/>'
+            '<Relationship Id="rId2" Target="/xl/worksheets/sheet2.xml"/></Relationships>',
+        )
+        package.writestr(
+            "xl/sharedStrings.xml",
+            "<sst><si><t>zero</t></si><si><r><t>on</t></r><r><t>e</t></r><rPh><t>x</t></rPh></si>"
+            "<si><t></t></si></sst>",
+        )
+        package.writestr(
+            "xl/worksheets/sheet1.xml",
+            '<worksheet><sheetData><row><c t="s"><v>1</v></c><c><v>7</v></c><c t="b"><v>1</v></c>'
+            '<c t="inlineStr"><is><t>inline</t></is></c></row></sheetData></worksheet>',
+        )
+        package.writestr(
+            "xl/worksheets/sheet2.xml",
+            '<worksheet><sheetData><row><c t="s"><v>0</v></c><c t="s"><v>2</v></c>'
+            '<c t="str"><f>A1</f><v>formula</v></c></row></sheetData></worksheet>',
+        )
+    handler = XlsxHandler()
+    assert list(handler.iter_text(source)) == ["zero", "formula", "one", "inline"]
+    assert handler.read(source) == "zero\nformula\none\ninline"
+    assert list(handler.iter_text(source, max_cells=2)) == ["zero", "formula"]
+    assert list(handler.iter_text(source, max_sheets=1)) == ["zero", "formula"]
+    assert read_document_text(str(source), max_chars=6) == "zero\nformula"
+
+
+def _package(path, types, parts):
+    overrides = "".join(f'<Override PartName="/{name}" ContentType="{kind}"/>' for name, kind in types.items())
+    with zipfile.ZipFile(path, "w") as package:
+        package.writestr("[Content_Types].xml", f"<Types>{overrides}</Types>")
+        for name, data in parts.items():
+            package.writestr(name, data)
+
+
+def test_docx_convert_covers_every_text_part(tmp_path):
+    word = "application/vnd.openxmlformats-officedocument.wordprocessingml"
+    source = tmp_path / "doc.docx"
+    body = (
+        '<w:document xmlns:w="urn:w"><w:body><w:p><w:r><w:t>ab</w:t></w:r><w:r><w:drawing><w:txbxContent>'
+        "<w:p><w:r><w:t>box</w:t></w:r></w:p></w:txbxContent></w:drawing></w:r></w:p>"
+        "<w:tbl><w:tr><w:tc><w:tbl><w:tr><w:tc><w:p><w:r><w:t>cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+        '</w:tc></w:tr></w:tbl><w:p><w:r><w:instrText>PAGE</w:instrText></w:r></w:p></w:body></w:document>'
+    )
+    parts = {
+        "word/document.xml": body,
+        "word/footnotes.xml": '<w:footnotes xmlns:w="urn:w"><w:p><w:r><w:t>note</w:t></w:r></w:p></w:footnotes>',
+        "word/comments.xml": '<w:comments xmlns:w="urn:w"><w:p><w:r><w:t>remark</w:t></w:r></w:p></w:comments>',
+        "word/styles.xml": '<w:styles xmlns:w="urn:w"><w:t>style</w:t></w:styles>',
+    }
+    types = {
+        "word/document.xml": f"{word}.document.main+xml",
+        "word/footnotes.xml": f"{word}.footnotes+xml",
+        "word/comments.xml": f"{word}.comments+xml",
+        "word/styles.xml": f"{word}.styles+xml",
+    }
+    _package(source, types, parts)
+    handler = get_handler(source)
+    assert isinstance(handler, DocxHandler)
+    handler.convert(source, tmp_path / "out.docx", str.upper)
+    with zipfile.ZipFile(tmp_path / "out.docx") as package:
+        assert package.read("word/document.xml").decode() == (
+            body.replace("ab<", "AB<").replace("box", "BOX").replace("cell", "CELL")
+        )
+        assert b"<w:t>NOTE</w:t>" in package.read("word/footnotes.xml")
+        assert b"<w:t>REMARK</w:t>" in package.read("word/comments.xml")
+        assert package.read("word/styles.xml") == parts["word/styles.xml"].encode()
+    assert handler.read(source).split("\n") == ["box", "ab", "cell", "note", "remark"]
+
+
+def test_pptx_convert_rewrites_slides_and_notes(tmp_path):
+    slides = "application/vnd.openxmlformats-officedocument.presentationml"
+    source = tmp_path / "deck.pptx"
+    slide = '<p:sld xmlns:p="urn:p" xmlns:a="urn:a"><a:p><a:r><a:t>title</a:t></a:r></a:p></p:sld>'
+    notes = '<p:notes xmlns:p="urn:p" xmlns:a="urn:a"><a:p><a:r><a:t>speaker</a:t></a:r></a:p></p:notes>'
+    _package(
+        source,
+        {"ppt/notesSlides/notesSlide1.xml": f"{slides}.notesSlide+xml", "ppt/slides/slide1.xml": f"{slides}.slide+xml"},
+        {"ppt/notesSlides/notesSlide1.xml": notes, "ppt/slides/slide1.xml": slide},
+    )
+    handler = get_handler(source)
+    assert isinstance(handler, PptxHandler)
+    assert handler.read(source) == "title\nspeaker"
+    handler.convert(source, source, str.upper)
+    assert handler.read(source) == "TITLE\nSPEAKER"
+
+
+def test_odt_convert_streams_paragraphs_and_copies_members_raw(tmp_path):
+    source = tmp_path / "report.odt"
+    content = (
+        '<office:document-content xmlns:office="urn:o" xmlns:text="urn:t"><office:body><office:text>'
+        '<text:h>title</text:h><text:p>ab<text:span>cd</text:span><text:tab/>ef<text:note>'
+        "<text:note-body><text:p>note</text:p></text:note-body></text:note></text:p>"
+        "<text:p/></office:text></office:body></office:document-content>"
+    )
+    styles = '<office:styles xmlns:office="urn:o" xmlns:text="urn:t"><text:p>header</text:p></office:styles>'
+    with zipfile.ZipFile(source, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("mimetype", "application/vnd.oasis.opendocument.text", zipfile.ZIP_STORED)
+        package.writestr("content.xml", content)
+        package.writestr("styles.xml", styles)
+        package.writestr("meta.xml", "<meta>title</meta>")
+        package.writestr("Pictures/a.png", b"\x89PNG" * 1000)
+    handler = get_handler(source)
+    assert isinstance(handler, OdtHandler)
+    assert handler.read(source).split("\n") == ["title", "note", "abcd ef", "header"]
+    handler.convert(source, tmp_path / "out.odt", str.upper)
+    with zipfile.ZipFile(source) as before, zipfile.ZipFile(tmp_path / "out.odt") as after:
+        assert after.namelist() == before.namelist()
+        assert after.getinfo("mimetype").compress_type == zipfile.ZIP_STORED
+        assert after.read("content.xml").decode() == (
+            content.replace("title", "TITLE").replace("ab<", "AB<").replace("cd", "CD")
+            .replace("ef", "EF").replace(">note", ">NOTE")
+        )
+        assert after.read("styles.xml") == styles.replace("header", "HEADER").encode()
+        for name in ("mimetype", "meta.xml", "Pictures/a.png"):
+            assert after.read(name) == before.read(name)
+            assert after.getinfo(name).compress_size == before.getinfo(name).compress_size
+
+
+_HINTED = {"zawgyi": (str.upper, lambda runs: [run.upper() for run in runs])}
+
+
+def test_docx_font_hints_follow_styles_and_run_fonts(tmp_path):
+    word = "application/vnd.openxmlformats-officedocument.wordprocessingml"
+    source = tmp_path / "doc.docx"
+    styles = (
+        '<w:styles xmlns:w="urn:w"><w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Arial"/></w:rPr>'
+        '</w:rPrDefault></w:docDefaults><w:style w:type="paragraph" w:default="1" w:styleId="Normal"/>'
+        '<w:style w:type="paragraph" w:styleId="Zg"><w:rPr><w:rFonts w:cs="Zawgyi-One"/></w:rPr></w:style>'
+        '<w:style w:type="paragraph" w:styleId="ZgChild"><w:basedOn w:val="Zg"/></w:style>'
+        '<w:style w:type="character" w:styleId="Uni"><w:rPr><w:rFonts w:cs="Myanmar Text"/></w:rPr></w:style>'
+        "</w:styles>"
+    )
+    body = (
+        '<w:document xmlns:w="urn:w"><w:body><w:p><w:pPr><w:pStyle w:val="ZgChild"/><w:rPr>'
+        '<w:rFonts w:ascii="Pyidaungsu"/></w:rPr></w:pPr><w:r><w:t>ab</w:t></w:r><w:r><w:rPr>'
+        '<w:rStyle w:val="Uni"/></w:rPr><w:t>cd</w:t></w:r><w:r><w:t>ef</w:t></w:r></w:p><w:p><w:r><w:t>gh</w:t>'
+        '</w:r><w:r><w:rPr><w:rFonts w:ascii="zawgyi one"/></w:rPr><w:t>ij</w:t></w:r></w:p></w:body></w:document>'
+    )
+    fonts = '<w:fonts xmlns:w="urn:w"><w:font w:name="Zawgyi-One"/><w:font w:name="Arial"/></w:fonts>'
+    _package(
+        source,
+        {
+            "word/document.xml": f"{word}.document.main+xml",
+            "word/styles.xml": f"{word}.styles+xml",
+            "word/fontTable.xml": f"{word}.fontTable+xml",
+        },
+        {"word/document.xml": body, "word/styles.xml": styles, "word/fontTable.xml": fonts},
+    )
+    handler = DocxHandler()
+    assert handler.uses_zawgyi_fonts(source)
+    handler.convert(source, tmp_path / "out.docx", str.title, hinted=_HINTED, unicode_font="Pyidaungsu")
+    assert handler.read(tmp_path / "out.docx").split("\n") == ["ABcdEF", "GhIJ"]
+    with zipfile.ZipFile(tmp_path / "out.docx") as package:
+        assert b'w:ascii="Pyidaungsu"/></w:rPr><w:t>IJ' in package.read("word/document.xml")
+        assert package.read("word/styles.xml").decode() == styles.replace("Zawgyi-One", "Pyidaungsu")
+        assert package.read("word/fontTable.xml").decode() == fonts.replace("Zawgyi-One", "Pyidaungsu")
+
+    handler.convert(source, tmp_path / "plain.docx", str.title)
+    assert handler.read(tmp_path / "plain.docx").split("\n") == ["AbCdEf", "GhIj"]
+
+
+def test_xlsx_font_hints_follow_cell_formats_and_rich_text_fonts(tmp_path):
+    source = tmp_path / "book.xlsx"
+    with zipfile.ZipFile(source, "w") as package:
+        package.writestr(
+            "[Content_Types].xml",
+            _CONTENT_TYPES.replace(
+                "</Types>", f'<Override PartName="/xl/styles.xml" ContentType="{_MAIN}.styles+xml"/></Types>'
+            ),
+        )
+        package.writestr(
+            "xl/workbook.xml",
+            '<workbook xmlns:r="urn:r"><sheets><sheet name="s" r:id="rId1"/></sheets></workbook>',
+        )
+        package.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships><Relationship Id="rId1" Target="worksheets/sheet1.xml"/></Relationships>',
+        )
+        package.writestr(
+            "xl/styles.xml",
+            '<styleSheet><fonts><font><name val="Calibri"/></font><font><b/><name val="Zawgyi-One"/></font>'
+            '<font><name val="Myanmar Text"/></font></fonts><cellXfs><xf fontId="0"/><xf fontId="1"/>'
+            '<xf fontId="2"/></cellXfs></styleSheet>',
+        )
+        package.writestr(
+            "xl/sharedStrings.xml",
+            "<sst><si><t>zg</t></si><si><t>uni</t></si><si><t>mix</t></si>"
+            '<si><r><t>plain</t></r><r><rPr><rFont val="Zawgyi-One"/></rPr><t>rich</t></r></si></sst>',
+        )
+        package.writestr(
+            "xl/worksheets/sheet1.xml",
+            '<worksheet><sheetData><row><c s="1" t="s"><v>0</v></c><c s="2" t="s"><v>1</v></c>'
+            '<c t="s"><v>2</v></c><c s="1" t="s"><v>2</v></c><c s="1" t="inlineStr"><is><t>in</t></is></c>'
+            '<c t="inlineStr"><is><t>out</t></is></c></row></sheetData></worksheet>',
+        )
+    handler = XlsxHandler()
+    assert handler.uses_zawgyi_fonts(source)
+    handler.convert(source, tmp_path / "out.xlsx", str.title, hinted=_HINTED, unicode_font="Padauk")
+    with zipfile.ZipFile(tmp_path / "out.xlsx") as package:
+        assert package.read("xl/sharedStrings.xml").decode() == (
+            "<sst><si><t>ZG</t></si><si><t>uni</t></si><si><t>Mix</t></si>"
+            '<si><r><t>Plain</t></r><r><rPr><rFont val="Padauk"/></rPr><t>RICH</t></r></si></sst>'
+        )
+        sheet = package.read("xl/worksheets/sheet1.xml")
+        assert b"<t>IN</t>" in sheet and b"<t>Out</t>" in sheet
+        assert b'<name val="Padauk"/>' in package.read("xl/styles.xml")
+
+
+def test_odt_font_hints_follow_paragraph_and_span_styles(tmp_path):
+    source = tmp_path / "report.odt"
+    namespaces = 'xmlns:office="urn:o" xmlns:style="urn:s" xmlns:text="urn:t" xmlns:fo="urn:f" xmlns:svg="urn:v"'
+    content = (
+        f"<office:document-content {namespaces}><office:font-face-decls>"
+        "<style:font-face style:name=\"Zawgyi-One\" svg:font-family=\"'Zawgyi-One'\"/></office:font-face-decls>"
+        '<office:automatic-styles><style:style style:name="P1" style:family="paragraph" '
+        'style:parent-style-name="Zg"/><style:style style:name="T1" style:family="text">'
+        '<style:text-properties fo:font-family="Myanmar Text"/></style:style></office:automatic-styles>'
+        '<office:body><office:text><text:p text:style-name="P1">ab<text:span text:style-name="T1">cd'
+        "</text:span>ef</text:p><text:p>gh</text:p></office:text></office:body></office:document-content>"
+    )
+    styles = (
+        f'<office:document-styles {namespaces}><office:styles><style:default-style style:family="paragraph"/>'
+        '<style:style style:name="Zg" style:family="paragraph"><style:text-properties '
+        'style:font-name-complex="Zawgyi-One"/></style:style><style:style style:name="P1" '
+        'style:family="paragraph"/></office:styles><office:master-styles><text:p text:style-name="P1">'
+        "header</text:p></office:master-styles></office:document-styles>"
+    )
+    with zipfile.ZipFile(source, "w") as package:
+        package.writestr("mimetype", "application/vnd.oasis.opendocument.text")
+        package.writestr("content.xml", content)
+        package.writestr("styles.xml", styles)
+    handler = OdtHandler()
+    assert handler.uses_zawgyi_fonts(source)
+    handler.convert(source, tmp_path / "out.odt", str.title, hinted=_HINTED, unicode_font="Padauk")
+    # Automatic styles apply to their own part: the header's P1 is the plain common style.
+    assert handler.read(tmp_path / "out.odt").split("\n") == ["ABcdEF", "Gh", "Header"]
+    with zipfile.ZipFile(tmp_path / "out.odt") as package:
+        assert "<style:font-face style:name=\"Padauk\" svg:font-family=\"'Padauk'\"/>" in (
+            package.read("content.xml").decode()
+        )
+        assert b'style:font-name-complex="Padauk"' in package.read("styles.xml")
@@ -0,0 +1,101 @@
+import json
+import pickle
+from functools import partial
+from multiprocessing import get_context
+
+import pytest
+
+import para.convert
+from para.batch import parallel_map
+from para.convert import active_rule_set, use_rule_set, zg_to_unicode
+from para.engine import RuleEngine
+from para.manifest import rules_fingerprint
+from para.rules import ZAWGYI_TO_UNICODE_RULES
+from para.rulesets import BUILTIN, cache_dir, cache_path, compile_rule_set, load_rule_set, RuleSet
+
+_TINY = RuleSet("tiny", "2", (("a", "b"), ("(x)y", r"\1z")))
+
+
+def test_builtin_rule_set_is_the_rule_list():
+    assert list(BUILTIN.rules) == ZAWGYI_TO_UNICODE_RULES
+    assert BUILTIN.fingerprint.startswith(BUILTIN.version + "+")
+    assert RuleSet("other", BUILTIN.version, BUILTIN.rules).digest == BUILTIN.digest
+    assert RuleSet("builtin", BUILTIN.version, BUILTIN.rules[1:]).digest != BUILTIN.digest
+
+
+def test_load_rule_set(tmp_path):
+    path = tmp_path / "mine.json"
+    path.write_text(json.dumps({"rules": [["a", "b"], ["(x)y", r"\1z"]], "version": 2}), encoding="utf-8")
+    assert load_rule_set(path) == RuleSet("mine", "2", _TINY.rules)
+
+    for data in ([["a", "b"]], {"rules": [["a"]]}, {"rules": [["(", "b"]]}):
+        path.write_text(json.dumps(data), encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_rule_set(path)
+
+
+def test_compiled_engine_is_cached_until_the_rules_change(tmp_path, monkeypatch):
+    path = cache_path(_TINY, tmp_path)
+    engine = compile_rule_set(_TINY, tmp_path)
+    assert path.is_file() and engine.apply("axy") == "bxz"
+
+    # A warm cache is loaded, not rebuilt.
+    def rebuild(*args):
+        raise AssertionError("rebuilt a cached engine")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(RuleEngine, "__init__", rebuild)
+        assert compile_rule_set(_TINY, tmp_path).apply("axy") == "bxz"
+
+    changed = RuleSet(_TINY.name, _TINY.version, _TINY.rules[:1])
+    assert cache_path(changed, tmp_path) != path
+    assert compile_rule_set(changed, tmp_path).apply("axy") == "bxy"
+
+    # The engine for the changed rules replaced the old one.
+    assert [p.name for p in tmp_path.iterdir()] == [cache_path(changed, tmp_path).name]
+    other = RuleSet("other", "1", _TINY.rules)
+    compile_rule_set(other, tmp_path)
+    assert len(list(tmp_path.iterdir())) == 2
+    compile_rule_set(_TINY, tmp_path)
+
+    # A damaged cache file is rebuilt.
+    path.write_bytes(b"not a pickle")
+    assert compile_rule_set(_TINY, tmp_path).apply("axy") == "bxz"
+    assert isinstance(pickle.loads(path.read_bytes()), RuleEngine)
+
+
+def test_engine_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv("PARA_CACHE_DIR")
+    assert cache_dir() is None and cache_path(_TINY) is None
+    monkeypatch.setenv("PARA_CACHE_DIR", "")
+    assert cache_dir() is None
+
+
+def test_builtin_engine_survives_pickling():
+    engine = pickle.loads(pickle.dumps(RuleEngine(BUILTIN.rules)))
+    text = "ျမန္မာျပည္ကိုခ်စ္တယ္"
+    assert engine.apply(text) == RuleEngine(BUILTIN.rules).apply(text)
+
+
+def test_use_rule_set_switches_conversion_and_fingerprint(monkeypatch):
+    monkeypatch.setenv("PARA_CACHE_DIR", "")
+    try:
+        use_rule_set(_TINY)
+        assert active_rule_set() is _TINY
+        assert rules_fingerprint() == _TINY.fingerprint
+        assert zg_to_unicode("axy", force=True, normalize=False) == "bxz"
+    finally:
+        use_rule_set(BUILTIN)
+    assert para.convert._ENGINE is None
+    assert rules_fingerprint() == BUILTIN.fingerprint
+    assert zg_to_unicode("ၪ", force=True) == "ဉ"
+
+
+def test_pool_workers_convert_with_the_active_rule_set():
+    convert = partial(zg_to_unicode, force=True, normalize=False)
+    try:
+        use_rule_set(_TINY)
+        results = parallel_map(convert, ["axy", "xa"], workers=2, mp_context=get_context("spawn"))
+    finally:
+        use_rule_set(BUILTIN)
+    assert results == ["bxz", "xb"]
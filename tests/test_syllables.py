@@ -0,0 +1,23 @@
+import random
+
+from para.syllables import zawgyi_syllables
+
+
+def test_zawgyi_syllables_keep_prefixes_and_killed_consonants():
+    # ေက်ာင္း ("school"): E prefix, KA, medial YA, AA, NGA + asat, visarga.
+    school = "ေက်ာင္း"
+    assert zawgyi_syllables(school) == [school]
+    # ျမန္မာ: RA prefix + MA, then NA killed by asat joins MA's syllable.
+    assert zawgyi_syllables("ျမန္မာ") == ["ျမန္", "မာ"]
+
+
+def test_zawgyi_syllables_keep_other_text_in_runs():
+    assert zawgyi_syllables("ab, ကိ\n") == ["ab, ", "ကိ", "\n"]
+
+
+def test_zawgyi_syllables_concatenate_to_input():
+    rng = random.Random(5)
+    alphabet = [chr(cp) for cp in range(0x1000, 0x10A0)] + [" ", "\n", "a"]
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert "".join(zawgyi_syllables(text)) == text